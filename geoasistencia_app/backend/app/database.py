@@ -1,12 +1,41 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.engine import URL
+from sqlalchemy.pool import NullPool, QueuePool
+
+load_dotenv()
+
+
+def _env_bool(nombre: str, defecto: bool) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in {"1", "true", "yes", "si", "on"}
 
-DB_USER = "geo_user"
-DB_PASSWORD = "GeoPass123"
-DB_HOST = "127.0.0.1"
-DB_PORT = 5433
-DB_NAME = "geoasistencia"
+
+DB_USER = os.getenv("DB_USER", "geo_user")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "GeoPass123")
+DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
+DB_PORT = int(os.getenv("DB_PORT", "5433"))
+DB_NAME = os.getenv("DB_NAME", "geoasistencia")
+
+# Pool por proceso. Con N workers, las conexiones totales son N * (size + overflow).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "geoasistencia")
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+# "transaction" si hay un pooler tipo PgBouncer en modo transacción delante.
+DB_POOLER_MODE = os.getenv("DB_POOLER_MODE", "").strip().lower()
 
 DATABASE_URL = URL.create(
     # requirements.txt usa psycopg2-binary, por eso usamos psycopg2 aquí.
@@ -18,6 +47,253 @@ DATABASE_URL = URL.create(
     database=DB_NAME,
 )
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Réplica de lectura (streaming replication) para los endpoints analíticos.
+# Sin DB_READ_HOST todo va al primario. Usuario/clave/BD heredan del primario.
+DB_READ_HOST = os.getenv("DB_READ_HOST", "").strip()
+DB_READ_PORT = int(os.getenv("DB_READ_PORT", str(DB_PORT)))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+# Lag máximo tolerado antes de volver al primario, y cada cuánto se mide.
+DB_READ_MAX_LAG_S = float(os.getenv("DB_READ_MAX_LAG_S", "5"))
+DB_READ_LAG_CHECK_S = float(os.getenv("DB_READ_LAG_CHECK_S", "2"))
+# Tras una escritura, el mismo usuario lee del primario durante este tiempo.
+DB_READ_STICKY_S = float(os.getenv("DB_READ_STICKY_S", "10"))
+
+READ_DATABASE_URL = URL.create(
+    drivername="postgresql+psycopg2",
+    username=os.getenv("DB_READ_USER", DB_USER),
+    password=os.getenv("DB_READ_PASSWORD", DB_PASSWORD),
+    host=DB_READ_HOST or DB_HOST,
+    port=DB_READ_PORT,
+    database=os.getenv("DB_READ_NAME", DB_NAME),
+) if DB_READ_HOST else None
+
+# Postgres directo (sin pooler) para `manage.py db/particiones`: el advisory lock
+# de sesión de las migraciones y CREATE INDEX CONCURRENTLY no funcionan a través
+# de PgBouncer en modo transacción. Sin DB_DIRECT_HOST se usa DB_HOST.
+DB_DIRECT_HOST = os.getenv("DB_DIRECT_HOST", "").strip()
+DB_DIRECT_PORT = int(os.getenv("DB_DIRECT_PORT", str(DB_PORT)))
+
+
+# ----------------------
+# TELEMETRÍA DEL POOL
+# - Espera de checkout (histograma), timeouts y conexiones en uso.
+# - Se exponen en /metrics (ver app/utils/metricas.py).
+# ----------------------
+
+ESPERA_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _EstadisticasPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.buckets = [0] * len(ESPERA_BUCKETS)
+
+    def registrar(self, segundos: float, timeout: bool = False) -> None:
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+            for i, limite in enumerate(ESPERA_BUCKETS):
+                if segundos <= limite:
+                    self.buckets[i] += 1
+
+
+estadisticas_pool = _EstadisticasPool()
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout (cola + conexión nueva)."""
+
+    # Por engine (ver crear_engine): el pool se recrea en dispose() y las
+    # estadísticas tienen que sobrevivir.
+    estadisticas = estadisticas_pool
+    limite_overflow = DB_MAX_OVERFLOW
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.estadisticas.registrar(time.perf_counter() - t0, timeout=True)
+            raise
+        self.estadisticas.registrar(time.perf_counter() - t0)
+        return conn
+
+
+def pool_stats(eng=None) -> dict:
+    eng = eng or engine
+    pool = eng.pool
+    est = pool.estadisticas
+    with est._lock:
+        return {
+            "size": pool.size(),
+            "max_overflow": pool.limite_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "checkouts_total": est.checkouts,
+            "timeouts_total": est.timeouts,
+            "wait_seconds_sum": est.espera_total,
+            "wait_seconds_max": est.espera_max,
+            "wait_buckets": list(zip(ESPERA_BUCKETS, est.buckets)),
+        }
+
+
+def crear_engine(url=DATABASE_URL, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW, estadisticas=None):
+    connect_args = {"application_name": DB_APPLICATION_NAME, "connect_timeout": DB_CONNECT_TIMEOUT}
+    if DB_POOLER_MODE != "transaction" and DB_STATEMENT_TIMEOUT_MS > 0:
+        # Conexión directa: el timeout viaja como parámetro de arranque.
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    eng = create_engine(
+        url,
+        echo=False,
+        # limite_overflow: el max_overflow configurado (QueuePool no lo expone en su API).
+        poolclass=type(
+            "PoolMedido", (PoolMedido,), {"estadisticas": estadisticas or estadisticas_pool, "limite_overflow": max_overflow}
+        ),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+    if DB_POOLER_MODE == "transaction" and DB_STATEMENT_TIMEOUT_MS > 0:
+        # PgBouncer en modo transacción ignora `options` y reparte la conexión
+        # física entre clientes: el timeout se fija por transacción con SET LOCAL.
+        @event.listens_for(eng, "begin")
+        def _statement_timeout(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {DB_STATEMENT_TIMEOUT_MS}")
+
+    return eng
+
+
+def engine_directo():
+    """Engine sin pool contra Postgres directo, para mantenimiento (migraciones, particiones).
+
+    Sin statement_timeout: los backfills y los CREATE INDEX CONCURRENTLY pueden
+    tardar más que una petición. Con DB_POOLER_MODE=transaction exige DB_DIRECT_HOST.
+    """
+    if DB_POOLER_MODE == "transaction" and not DB_DIRECT_HOST:
+        raise RuntimeError(
+            "DB_POOLER_MODE=transaction: define DB_DIRECT_HOST (y DB_DIRECT_PORT) con el Postgres "
+            "sin pooler; las migraciones usan un advisory lock de sesión"
+        )
+    url = DATABASE_URL.set(host=DB_DIRECT_HOST or DB_HOST, port=DB_DIRECT_PORT)
+    return create_engine(
+        url,
+        echo=False,
+        poolclass=NullPool,
+        connect_args={"application_name": f"{DB_APPLICATION_NAME}-manage", "connect_timeout": DB_CONNECT_TIMEOUT},
+    )
+
+
+engine = crear_engine()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
+
+read_engine = (
+    crear_engine(READ_DATABASE_URL, DB_READ_POOL_SIZE, DB_READ_MAX_OVERFLOW, _EstadisticasPool())
+    if READ_DATABASE_URL is not None
+    else None
+)
+ReadSessionLocal = (
+    sessionmaker(bind=read_engine, autoflush=False, autocommit=False) if read_engine is not None else None
+)
+
+
+# ----------------------
+# ESCRITURAS RECIENTES (read-your-writes)
+# - app.security.deps guarda el usuario en session.info["usuario_id"].
+# - Si la sesión del primario escribió y confirmó, el usuario queda "pegado" al
+#   primario DB_READ_STICKY_S segundos para no leer de una réplica atrasada.
+# - Es por proceso: con varios workers lo acota además el guard de lag.
+# ----------------------
+
+_escrituras_lock = threading.Lock()
+_ultima_escritura: dict[str, float] = {}
+
+
+def marcar_escritura(usuario_id) -> None:
+    ahora = time.monotonic()
+    with _escrituras_lock:
+        _ultima_escritura[str(usuario_id)] = ahora
+        if len(_ultima_escritura) > 10_000:
+            limite = ahora - DB_READ_STICKY_S
+            for k in [k for k, t in _ultima_escritura.items() if t < limite]:
+                del _ultima_escritura[k]
+
+
+def escribio_hace_poco(usuario_id) -> bool:
+    t = _ultima_escritura.get(str(usuario_id))
+    return t is not None and time.monotonic() - t < DB_READ_STICKY_S
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _flush_escribe(session, flush_context):
+    session.info["escribio"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _dml_escribe(state):
+    # insert()/update()/delete() ejecutados sin pasar por el flush
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["escribio"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _registrar_escritura(session):
+    if session.info.pop("escribio", False) and session.info.get("usuario_id"):
+        marcar_escritura(session.info["usuario_id"])
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _descartar_escritura(session):
+    session.info.pop("escribio", None)
+
+
+_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+_lag_lock = threading.Lock()
+_lag_cache = {"medido": 0.0, "ok": False}
+
+
+def replica_disponible() -> bool:
+    """True si la réplica existe y su lag está bajo DB_READ_MAX_LAG_S.
+
+    El resultado se cachea DB_READ_LAG_CHECK_S segundos por proceso. Si la
+    réplica no responde se considera no disponible (lectura al primario).
+    """
+    if read_engine is None:
+        return False
+    ahora = time.monotonic()
+    if ahora - _lag_cache["medido"] < DB_READ_LAG_CHECK_S:
+        return _lag_cache["ok"]
+    with _lag_lock:
+        if ahora - _lag_cache["medido"] < DB_READ_LAG_CHECK_S:
+            return _lag_cache["ok"]
+        try:
+            with read_engine.connect() as conn:
+                lag = float(conn.execute(_LAG_SQL).scalar() or 0)
+            ok = lag <= DB_READ_MAX_LAG_S
+        except Exception:
+            ok = False
+        _lag_cache.update(medido=time.monotonic(), ok=ok)
+        return ok
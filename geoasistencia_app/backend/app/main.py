@@ -1,40 +1,103 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+import importlib
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from app.database import Base, engine
-from app import models  # noqa: F401
-from app.routes.auth import router as auth_router
-from app.routes.asistencia import router as asistencia_router
-from app.routes.admin import router as admin_router
-from app.routes.solicitudes import router as solicitudes_router
-
-Base.metadata.create_all(bind=engine)
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-app = FastAPI(title="GeoAsistencia API", version="1.0.0")
+# El esquema NO se crea al importar: cada worker abría una conexión e
+# inspeccionaba todas las tablas, y la app no arrancaba si Postgres no estaba
+# disponible en ese instante. Se gestiona con `python manage.py db migrar`.
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# (módulo, prefijo, tag). Los routers se importan dentro de create_app, no al
+# importar app.main (manage.py, gunicorn.conf.py y los scripts no los cargan).
+# No hay instancia a nivel de módulo: se sirve con la factory
+# (gunicorn `app.main:create_app()`, uvicorn `app.main:create_app --factory`).
+ROUTERS = (
+    ("app.routes.auth", "/auth", "auth"),
+    ("app.routes.asistencia", "/asistencia", "asistencia"),
+    ("app.routes.admin", "/admin", "admin"),
+    ("app.routes.solicitudes", "/solicitudes", "solicitudes"),
 )
 
-app.include_router(auth_router, prefix="/auth", tags=["auth"])
-app.include_router(asistencia_router, prefix="/asistencia", tags=["asistencia"])
-app.include_router(admin_router, prefix="/admin", tags=["admin"])
-app.include_router(solicitudes_router, prefix="/solicitudes", tags=["solicitudes"])
+STATIC_DIR = Path(__file__).parent / "static"
+# Frontend SPA (React build). Usa HashRouter, así que no requiere fallback de rutas.
+WEB_DIR = STATIC_DIR / "web"
 
-# Panel web (estático)
-app.mount("/panel", StaticFiles(directory="app/static/admin", html=True), name="panel")
 
-# Frontend SPA (React build). Usa HashRouter, así que no requiere fallback de rutas.
-WEB_DIR = Path(__file__).parent / 'static' / 'web'
-if WEB_DIR.exists() and (WEB_DIR / 'index.html').exists():
-    app.mount('/', StaticFiles(directory=str(WEB_DIR), html=True), name='web')
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Corre en cada worker (después del fork): aquí van los hilos de fondo.
+    from app.utils.eventos import escucha
+    from app.utils.pendientes import pendientes
+    from app.utils.presencia import presencia
+
+    pendientes.iniciar()
+    presencia.iniciar()
+    escucha.iniciar()
+    yield
+    escucha.detener()
+    presencia.detener()
+    pendientes.detener()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="GeoAsistencia API", version="1.0.0", lifespan=lifespan)
+
+    from app.utils.compresion import CompresionMiddleware
+    from app.utils.estaticos import StaticPrecomprimido
+
+    # JSON grande (reportes del mes) comprimido según Accept-Encoding.
+    app.add_middleware(CompresionMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    for modulo, prefix, tag in ROUTERS:
+        app.include_router(importlib.import_module(modulo).router, prefix=prefix, tags=[tag])
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics(request: Request):
+        from app.database import pool_stats, read_engine
+        from app.utils import metricas
+        from app.utils.periodos import periodos
+
+        metricas.autorizar(request)
+        # Métricas por proceso (etiqueta pid): con varios workers, sumar en Prometheus.
+        pools = {"primary": pool_stats()}
+        if read_engine is not None:
+            pools["replica"] = pool_stats(read_engine)
+        return metricas.render(metricas.metricas_pool(pools), metricas.metricas_periodos(periodos.estado()))
+
+    # Los mounts van al final: "/" captura cualquier ruta registrada después.
+    # Panel web (estático). Variantes .br/.gz del build y Cache-Control por archivo.
+    app.mount("/panel", StaticPrecomprimido(directory=str(STATIC_DIR / "admin"), html=True), name="panel")
+    if WEB_DIR.exists() and (WEB_DIR / "index.html").exists():
+        app.mount("/", StaticPrecomprimido(directory=str(WEB_DIR), html=True), name="web")
+
+    return app
+
+
+def precargar() -> None:
+    """Estado de solo lectura que conviene tener listo antes del fork.
+
+    gunicorn (preload_app) lo llama en el master: los workers heredan los
+    mappers configurados y el backend de hashing ya cargado, compartidos
+    copy-on-write en lugar de inicializarse en cada worker.
+    """
+    from sqlalchemy.orm import configure_mappers
+
+    from app import models  # noqa: F401
+    from app.security.hash import get_pwd_context
 
-@app.get("/health")
-def health():
-    return {"ok": True}
+    configure_mappers()
+    get_pwd_context().handler().get_backend()
@@ -0,0 +1,166 @@
+"""Migraciones versionadas del esquema.
+
+Cada módulo en `app/migrations/versions/` define:
+- VERSION (int, única y creciente) y NOMBRE
+- upgrade(conn): aplica el cambio
+- TRANSACCIONAL (opcional, True por defecto). Con False, `conn` viene en
+  AUTOCOMMIT (necesario para CREATE INDEX CONCURRENTLY y migraciones por lotes).
+- VERIFICACIONES (opcional): lista de dicts {"descripcion", "sql", "params", "indice"}
+  (`params` puede ser un callable, p. ej. para fechas relativas a hoy).
+  `verificar()` ejecuta EXPLAIN de cada consulta y exige que el plan use el índice.
+
+Cada versión escribe su DDL explícito (no `create_all` ni `Modelo.__table__`):
+el modelo cambia con el código, la migración tiene que crear siempre lo mismo.
+
+Las versiones aplicadas se registran en `schema_migrations`. Un advisory lock
+de sesión evita que dos procesos migren a la vez: necesita una conexión directa
+a Postgres (`engine_directo()` en app.database), no PgBouncer en modo transacción,
+que podría soltarlo o repartir la conexión física entre clientes.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import pkgutil
+from datetime import datetime
+from types import ModuleType
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.migrations import versions as _versions_pkg
+
+
+_LOCK_ID = 727_401_227  # constante arbitraria para pg_advisory_lock
+
+
+def migraciones() -> list[ModuleType]:
+    mods = [
+        importlib.import_module(f"{_versions_pkg.__name__}.{m.name}")
+        for m in pkgutil.iter_modules(_versions_pkg.__path__)
+    ]
+    mods.sort(key=lambda m: m.VERSION)
+    vistas = set()
+    for m in mods:
+        if m.VERSION in vistas:
+            raise RuntimeError(f"Versión de migración duplicada: {m.VERSION}")
+        vistas.add(m.VERSION)
+    return mods
+
+
+def _asegurar_tabla(conn: Connection) -> None:
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version integer PRIMARY KEY,"
+            " nombre character varying NOT NULL,"
+            " aplicada_at timestamp without time zone NOT NULL DEFAULT (now() AT TIME ZONE 'utc'))"
+        )
+    )
+
+
+def aplicadas(conn: Connection) -> dict[int, datetime]:
+    _asegurar_tabla(conn)
+    return {v: at for v, at in conn.execute(text("SELECT version, aplicada_at FROM schema_migrations")).all()}
+
+
+def aplicar(engine: Engine, hasta: int | None = None, log=print) -> list[int]:
+    """Aplica en orden las migraciones pendientes (hasta `hasta`, inclusive)."""
+    hechas = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _LOCK_ID})
+        try:
+            ya = aplicadas(lock_conn)
+            for m in migraciones():
+                if m.VERSION in ya or (hasta is not None and m.VERSION > hasta):
+                    continue
+                log(f"→ {m.VERSION:04d} {m.NOMBRE}")
+                registrar = text("INSERT INTO schema_migrations (version, nombre) VALUES (:v, :n)")
+                if getattr(m, "TRANSACCIONAL", True):
+                    with engine.begin() as conn:
+                        m.upgrade(conn)
+                        conn.execute(registrar, {"v": m.VERSION, "n": m.NOMBRE})
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        m.upgrade(conn)
+                        conn.execute(registrar, {"v": m.VERSION, "n": m.NOMBRE})
+                hechas.append(m.VERSION)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _LOCK_ID})
+    return hechas
+
+
+def estado(engine: Engine) -> list[dict]:
+    with engine.begin() as conn:
+        ya = aplicadas(conn)
+    return [
+        {"version": m.VERSION, "nombre": m.NOMBRE, "aplicada_at": ya.get(m.VERSION)}
+        for m in migraciones()
+    ]
+
+
+# ----------------------
+# VERIFICACIÓN CON EXPLAIN
+# ----------------------
+
+
+def _indices_plan(nodo: dict) -> set[str]:
+    nombres = set()
+    if nodo.get("Index Name"):
+        nombres.add(nodo["Index Name"])
+    for hijo in nodo.get("Plans", []) or []:
+        nombres |= _indices_plan(hijo)
+    return nombres
+
+
+def _indice_y_particiones(conn: Connection, indice: str) -> set[str]:
+    """Nombre del índice + los índices hijos (uno por partición) si es particionado."""
+    hijos = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:n)"
+        ),
+        {"n": indice},
+    ).all()
+    return {indice} | {h[0] for h in hijos}
+
+
+def verificar(engine: Engine) -> list[dict]:
+    """EXPLAIN de las consultas declaradas en VERIFICACIONES.
+
+    Con tablas pequeñas el planner prefiere seq scan aunque el índice exista;
+    por eso se desactiva `enable_seqscan`: lo que se comprueba es que el índice
+    sea utilizable para ese patrón de acceso.
+    """
+    with engine.begin() as conn:
+        ya = aplicadas(conn)
+
+    resultados = []
+    with engine.connect() as conn:
+        for m in migraciones():
+            for v in getattr(m, "VERIFICACIONES", []):
+                if m.VERSION not in ya:
+                    resultados.append(
+                        {"version": m.VERSION, "descripcion": v["descripcion"], "ok": False, "indices": [], "motivo": "migración no aplicada"}
+                    )
+                    continue
+                params = v.get("params") or {}
+                if callable(params):
+                    params = params()
+                with conn.begin():
+                    conn.execute(text("SET LOCAL enable_seqscan = off"))
+                    raw = conn.execute(text("EXPLAIN (FORMAT JSON) " + v["sql"]), params).scalar()
+                    plan = raw if isinstance(raw, list) else json.loads(raw)
+                    usados = _indices_plan(plan[0]["Plan"])
+                    aceptados = _indice_y_particiones(conn, v["indice"])
+                resultados.append(
+                    {
+                        "version": m.VERSION,
+                        "descripcion": v["descripcion"],
+                        "ok": bool(usados & aceptados),
+                        "indices": sorted(usados),
+                        "motivo": None if usados & aceptados else f"el plan no usa {v['indice']}",
+                    }
+                )
+    return resultados
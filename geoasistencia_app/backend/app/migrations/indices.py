@@ -0,0 +1,74 @@
+"""Helpers para crear índices sin bloquear escrituras.
+
+Requieren una conexión en AUTOCOMMIT (migraciones con TRANSACCIONAL = False):
+CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+def _estado_indice(conn: Connection, nombre: str) -> bool | None:
+    """None si no existe; True/False según pg_index.indisvalid."""
+    return conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema() AND c.relname = :n"
+        ),
+        {"n": nombre},
+    ).scalar()
+
+
+def crear_indice(conn: Connection, nombre: str, tabla: str, columnas: str, using: str = "btree") -> None:
+    """CREATE INDEX CONCURRENTLY idempotente.
+
+    Si un intento anterior quedó a medias (índice INVALID), se elimina y se reconstruye.
+    """
+    estado = _estado_indice(conn, nombre)
+    if estado is True:
+        return
+    if estado is False:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {nombre}"))
+    conn.execute(text(f"CREATE INDEX CONCURRENTLY {nombre} ON {tabla} USING {using} ({columnas})"))
+
+
+def _particiones(conn: Connection, tabla: str) -> list[str]:
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:t) ORDER BY c.relname"
+        ),
+        {"t": tabla},
+    ).all()
+    return [r[0] for r in rows]
+
+
+def crear_indice_particionado(conn: Connection, tabla: str, sufijo: str, columnas: str, using: str = "btree") -> str:
+    """Índice sobre una tabla particionada sin bloquearla.
+
+    Postgres no admite CONCURRENTLY sobre el padre, así que:
+    1) se crea el índice padre ON ONLY (vacío e inválido),
+    2) se crea CONCURRENTLY el índice de cada partición,
+    3) se adjunta cada uno al padre (al adjuntar todos, el padre pasa a válido).
+    Las particiones creadas después heredan el índice automáticamente.
+    """
+    padre = f"ix_{tabla}_{sufijo}"
+    es_particionada = conn.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:t)"), {"t": tabla}
+    ).scalar()
+    if not es_particionada:
+        crear_indice(conn, padre, tabla, columnas, using)
+        return padre
+
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {padre} ON ONLY {tabla} USING {using} ({columnas})"))
+    adjuntos = set(_particiones(conn, padre))
+    for particion in _particiones(conn, tabla):
+        hijo = f"{particion}_{sufijo}"
+        if hijo in adjuntos:
+            continue
+        crear_indice(conn, hijo, particion, columnas, using)
+        conn.execute(text(f"ALTER INDEX {padre} ATTACH PARTITION {hijo}"))
+    return padre
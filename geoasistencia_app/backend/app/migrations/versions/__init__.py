@@ -0,0 +1 @@
+# Migraciones versionadas: vNNNN_nombre.py (ver app/migrations/__init__.py)
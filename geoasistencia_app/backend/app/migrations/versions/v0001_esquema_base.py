@@ -0,0 +1,161 @@
+"""Esquema base: las tablas tal como las creaba `create_all` antes de las migraciones.
+
+DDL explícito y congelado: no depende de los modelos actuales (las columnas y
+tablas posteriores las crea cada versión). En una BD anterior a las
+migraciones (creada con create_all) no hace nada: todo es IF NOT EXISTS.
+Los nombres de PK/FK son los que Postgres asigna por defecto, como create_all.
+"""
+
+from sqlalchemy import text
+
+VERSION = 1
+NOMBRE = "esquema_base"
+
+_TIPOS = {
+    "tipo_red": ("WIFI", "IP_PUBLICA"),
+    "sync_status": ("pending", "processed", "failed"),
+    "tipo_asistencia": ("entrada", "salida", "manual"),
+    "modo_registro": ("app", "manual", "sync_offline"),
+}
+
+_TABLAS = [
+    """
+    CREATE TABLE IF NOT EXISTS sede (
+        sede_id uuid NOT NULL,
+        nombre character varying NOT NULL,
+        latitud character varying NOT NULL,
+        longitud character varying NOT NULL,
+        radio_metros integer NOT NULL,
+        direccion character varying,
+        created_at timestamp without time zone,
+        updated_at timestamp without time zone,
+        PRIMARY KEY (sede_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS solicitud_app (
+        solicitud_id uuid NOT NULL,
+        empresa character varying NOT NULL,
+        nombre_contacto character varying NOT NULL,
+        email_contacto character varying NOT NULL,
+        mensaje character varying NOT NULL,
+        created_at timestamp without time zone,
+        PRIMARY KEY (solicitud_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS red_empresa (
+        red_id uuid NOT NULL,
+        sede_id uuid REFERENCES sede (sede_id),
+        nombre_red character varying NOT NULL,
+        tipo tipo_red,
+        ssid character varying,
+        bssid character varying,
+        ip_publica character varying,
+        activa boolean,
+        PRIMARY KEY (red_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS usuario (
+        usuario_id uuid NOT NULL,
+        documento character varying NOT NULL,
+        nombre_real character varying NOT NULL,
+        email character varying NOT NULL UNIQUE,
+        password_hash character varying NOT NULL,
+        telefono character varying,
+        sede_id uuid REFERENCES sede (sede_id),
+        rol character varying NOT NULL,
+        consentimiento_geolocalizacion boolean,
+        created_at timestamp without time zone,
+        updated_at timestamp without time zone,
+        PRIMARY KEY (usuario_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS audit_log (
+        audit_id uuid NOT NULL,
+        actor_usuario_id uuid REFERENCES usuario (usuario_id),
+        entidad character varying NOT NULL,
+        entidad_id uuid,
+        accion character varying NOT NULL,
+        detalle jsonb,
+        ip character varying,
+        timestamp timestamp without time zone,
+        PRIMARY KEY (audit_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS offline_sync (
+        sync_id uuid NOT NULL,
+        usuario_id uuid REFERENCES usuario (usuario_id),
+        payload jsonb NOT NULL,
+        status sync_status,
+        created_at timestamp without time zone,
+        processed_at timestamp without time zone,
+        PRIMARY KEY (sync_id)
+    )
+    """,
+    # Sin particionar: la convierte v0002 (igual que en una BD existente).
+    """
+    CREATE TABLE IF NOT EXISTS registro_asistencia (
+        registro_id uuid NOT NULL,
+        usuario_id uuid REFERENCES usuario (usuario_id),
+        sede_id uuid REFERENCES sede (sede_id),
+        tipo tipo_asistencia,
+        timestamp_registro timestamp without time zone,
+        latitud character varying,
+        longitud character varying,
+        dentro_geocerca boolean,
+        modo modo_registro,
+        device_info jsonb,
+        evidence character varying,
+        ip_detectada character varying,
+        ssid_detectada character varying,
+        bssid_detectada character varying,
+        PRIMARY KEY (registro_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS reveal_requests (
+        reveal_id uuid NOT NULL,
+        solicitante_id uuid REFERENCES usuario (usuario_id),
+        motivo character varying NOT NULL,
+        timestamp_solicitud timestamp without time zone,
+        PRIMARY KEY (reveal_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS solicitud_asistencia_manual (
+        solicitud_id uuid NOT NULL,
+        usuario_id uuid NOT NULL REFERENCES usuario (usuario_id),
+        sede_id uuid NOT NULL REFERENCES sede (sede_id),
+        tipo character varying NOT NULL,
+        timestamp_evento timestamp without time zone NOT NULL,
+        latitud character varying,
+        longitud character varying,
+        device_info jsonb,
+        evidence character varying,
+        detalle character varying NOT NULL,
+        estado character varying NOT NULL,
+        created_at timestamp without time zone,
+        revisado_por uuid REFERENCES usuario (usuario_id),
+        revisado_at timestamp without time zone,
+        decision_comentario character varying,
+        PRIMARY KEY (solicitud_id)
+    )
+    """,
+]
+
+
+def upgrade(conn):
+    for nombre, valores in _TIPOS.items():
+        etiquetas = ", ".join(f"'{v}'" for v in valores)
+        conn.execute(
+            text(
+                f"DO $$ BEGIN CREATE TYPE {nombre} AS ENUM ({etiquetas}); "
+                "EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+            )
+        )
+    for ddl in _TABLAS:
+        conn.execute(text(ddl))
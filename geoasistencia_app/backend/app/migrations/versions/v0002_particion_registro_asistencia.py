@@ -0,0 +1,20 @@
+"""registro_asistencia particionada por mes (ver app/utils/particiones.py).
+
+Se ejecuta por lotes fuera de una transacción única para no bloquear las marcaciones.
+En una BD nueva la tabla de v0001 está vacía: la copia *_legacy vacía se elimina.
+"""
+
+from sqlalchemy import text
+
+from app.utils import particiones
+
+VERSION = 2
+NOMBRE = "particion_registro_asistencia"
+TRANSACCIONAL = False
+
+
+def upgrade(conn):
+    if particiones.migrar_a_particionada(conn.engine):
+        if conn.execute(text(f"SELECT NOT EXISTS (SELECT 1 FROM {particiones.LEGACY})")).scalar():
+            conn.execute(text(f"DROP TABLE {particiones.LEGACY}"))
+    particiones.asegurar_particiones_futuras(conn.engine)
@@ -0,0 +1,53 @@
+"""Índices de registro_asistencia según los accesos reales.
+
+- (sede_id, timestamp_registro): dashboard / listados / resúmenes por sede.
+- (usuario_id, timestamp_registro): mis-registros, dashboard del empleado, reportes.
+- BRIN(timestamp_registro): rangos globales (SUPERADMIN sin sede). La tabla es
+  append-only, así que el BRIN ocupa unos pocos KB por partición.
+"""
+
+from datetime import datetime, timedelta
+
+from app.migrations.indices import crear_indice_particionado
+
+VERSION = 3
+NOMBRE = "indices_registro_asistencia"
+TRANSACCIONAL = False
+
+_SEDE = "00000000-0000-0000-0000-000000000000"
+
+
+def _ultima_semana():
+    hasta = datetime.utcnow()
+    return {"sede": _SEDE, "usuario": _SEDE, "desde": hasta - timedelta(days=7), "hasta": hasta}
+
+
+def upgrade(conn):
+    crear_indice_particionado(conn, "registro_asistencia", "sede_ts", "sede_id, timestamp_registro")
+    crear_indice_particionado(conn, "registro_asistencia", "usuario_ts", "usuario_id, timestamp_registro")
+    crear_indice_particionado(conn, "registro_asistencia", "ts_brin", "timestamp_registro", using="brin")
+
+
+VERIFICACIONES = [
+    {
+        "descripcion": "registros de una sede en un rango (dashboard / listados)",
+        "sql": "SELECT registro_id FROM registro_asistencia "
+        "WHERE sede_id = CAST(:sede AS uuid) AND timestamp_registro >= :desde AND timestamp_registro < :hasta",
+        "params": _ultima_semana,
+        "indice": "ix_registro_asistencia_sede_ts",
+    },
+    {
+        "descripcion": "últimos registros de un empleado (mis-registros)",
+        "sql": "SELECT registro_id FROM registro_asistencia "
+        "WHERE usuario_id = CAST(:usuario AS uuid) ORDER BY timestamp_registro DESC LIMIT 10",
+        "params": _ultima_semana,
+        "indice": "ix_registro_asistencia_usuario_ts",
+    },
+    {
+        "descripcion": "rango global de fechas (SUPERADMIN sin sede)",
+        "sql": "SELECT count(*) FROM registro_asistencia "
+        "WHERE timestamp_registro >= :desde AND timestamp_registro < :hasta",
+        "params": _ultima_semana,
+        "indice": "ix_registro_asistencia_ts_brin",
+    },
+]
@@ -0,0 +1,63 @@
+"""Índices de solicitud_asistencia_manual, usuario, audit_log y offline_sync.
+
+- solicitud_asistencia_manual(estado, sede_id, created_at): bandeja de pendientes y conteo.
+- usuario(documento): búsqueda por código de empleado / reporte mensual.
+- usuario(sede_id, rol): empleados de una sede (resúmenes, faltantes, listados).
+- audit_log("timestamp"): el listado ordena por fecha DESC con LIMIT; un BRIN no
+  sirve para ese ORDER BY, por eso aquí se usa btree.
+- BRIN(offline_sync.created_at): tabla append-only consultada por rangos.
+"""
+
+from app.migrations.indices import crear_indice
+
+VERSION = 4
+NOMBRE = "indices_solicitudes_usuarios"
+TRANSACCIONAL = False
+
+_SEDE = {"sede": "00000000-0000-0000-0000-000000000000"}
+
+
+def upgrade(conn):
+    crear_indice(
+        conn,
+        "ix_solicitud_asistencia_manual_estado_sede_created",
+        "solicitud_asistencia_manual",
+        "estado, sede_id, created_at",
+    )
+    crear_indice(conn, "ix_usuario_documento", "usuario", "documento")
+    crear_indice(conn, "ix_usuario_sede_rol", "usuario", "sede_id, rol")
+    crear_indice(conn, "ix_audit_log_timestamp", "audit_log", '"timestamp"')
+    crear_indice(conn, "ix_offline_sync_created_brin", "offline_sync", "created_at", using="brin")
+
+
+VERIFICACIONES = [
+    {
+        "descripcion": "solicitudes pendientes de una sede (bandeja / contador)",
+        "sql": "SELECT solicitud_id FROM solicitud_asistencia_manual "
+        "WHERE estado = 'PENDIENTE' AND sede_id = CAST(:sede AS uuid) ORDER BY created_at DESC",
+        "params": _SEDE,
+        "indice": "ix_solicitud_asistencia_manual_estado_sede_created",
+    },
+    {
+        "descripcion": "usuario por código de empleado",
+        "sql": "SELECT usuario_id FROM usuario WHERE documento = 'EMP-XXX-0000'",
+        "indice": "ix_usuario_documento",
+    },
+    {
+        "descripcion": "empleados de una sede",
+        "sql": "SELECT usuario_id FROM usuario "
+        "WHERE sede_id = CAST(:sede AS uuid) AND rol NOT IN ('ADMIN', 'SUPERADMIN')",
+        "params": _SEDE,
+        "indice": "ix_usuario_sede_rol",
+    },
+    {
+        "descripcion": "auditoría más reciente",
+        "sql": 'SELECT audit_id FROM audit_log ORDER BY "timestamp" DESC LIMIT 100',
+        "indice": "ix_audit_log_timestamp",
+    },
+    {
+        "descripcion": "sincronizaciones offline por rango",
+        "sql": "SELECT count(*) FROM offline_sync WHERE created_at >= now() - interval '1 day'",
+        "indice": "ix_offline_sync_created_brin",
+    },
+]
@@ -0,0 +1,121 @@
+"""latitud/longitud de sede, registro_asistencia y solicitud_asistencia_manual: varchar -> double precision.
+
+ALTER COLUMN TYPE reescribiría la tabla con bloqueo exclusivo, así que se hace online:
+1) columnas nuevas *_num + trigger BEFORE que las rellena en cada INSERT/UPDATE,
+2) backfill por lotes (keyset por PK, una transacción por lote),
+3) swap en una transacción corta: se elimina la columna texto y se renombra la nueva.
+Valores no numéricos (datos viejos mal cargados) quedan en NULL.
+"""
+
+from sqlalchemy import text
+
+VERSION = 5
+NOMBRE = "coordenadas_numericas"
+TRANSACCIONAL = False
+
+# (tabla, pk, NOT NULL)
+_TABLAS = [
+    ("sede", "sede_id", True),
+    ("solicitud_asistencia_manual", "solicitud_id", False),
+    ("registro_asistencia", "registro_id", False),
+]
+_LOTE = 5000
+
+
+def _tipo_actual(conn, tabla: str) -> str | None:
+    return conn.execute(
+        text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :t AND column_name = 'latitud'"
+        ),
+        {"t": tabla},
+    ).scalar()
+
+
+def _preparar(conn, tabla: str) -> None:
+    conn.execute(
+        text(
+            f"ALTER TABLE {tabla} ADD COLUMN IF NOT EXISTS latitud_num double precision, "
+            "ADD COLUMN IF NOT EXISTS longitud_num double precision"
+        )
+    )
+    conn.execute(
+        text(
+            f"""
+            CREATE OR REPLACE FUNCTION {tabla}_coords_num() RETURNS trigger AS $$
+            BEGIN
+                NEW.latitud_num := geo_a_double(NEW.latitud);
+                NEW.longitud_num := geo_a_double(NEW.longitud);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+    )
+    conn.execute(text(f"DROP TRIGGER IF EXISTS {tabla}_coords_num_trg ON {tabla}"))
+    conn.execute(
+        text(
+            f"CREATE TRIGGER {tabla}_coords_num_trg BEFORE INSERT OR UPDATE OF latitud, longitud ON {tabla} "
+            f"FOR EACH ROW EXECUTE FUNCTION {tabla}_coords_num()"
+        )
+    )
+
+
+def _backfill(conn, tabla: str, pk: str) -> None:
+    sql = text(
+        f"""
+        WITH lote AS (
+            SELECT {pk} FROM {tabla} WHERE {pk} > :ultimo ORDER BY {pk} LIMIT :n
+        ), upd AS (
+            UPDATE {tabla} t
+            SET latitud_num = geo_a_double(t.latitud), longitud_num = geo_a_double(t.longitud)
+            FROM lote WHERE t.{pk} = lote.{pk}
+        )
+        SELECT count(*), (SELECT {pk} FROM lote ORDER BY {pk} DESC LIMIT 1) FROM lote
+        """
+    )
+    ultimo = "00000000-0000-0000-0000-000000000000"
+    while True:
+        with conn.engine.begin() as tx:
+            n, ultimo_lote = tx.execute(sql, {"ultimo": ultimo, "n": _LOTE}).one()
+        if not n:
+            return
+        ultimo = str(ultimo_lote)
+
+
+def _intercambiar(conn, tabla: str, not_null: bool) -> None:
+    # Transacción propia: `conn` está en AUTOCOMMIT y LOCK TABLE necesita una.
+    # Las filas insertadas durante el backfill ya las completó el trigger.
+    with conn.engine.begin() as tx:
+        tx.execute(text("SET LOCAL lock_timeout = '5s'"))
+        tx.execute(text(f"LOCK TABLE {tabla} IN ACCESS EXCLUSIVE MODE"))
+        tx.execute(text(f"DROP TRIGGER IF EXISTS {tabla}_coords_num_trg ON {tabla}"))
+        tx.execute(text(f"DROP FUNCTION IF EXISTS {tabla}_coords_num()"))
+        tx.execute(text(f"ALTER TABLE {tabla} DROP COLUMN latitud, DROP COLUMN longitud"))
+        tx.execute(text(f"ALTER TABLE {tabla} RENAME COLUMN latitud_num TO latitud"))
+        tx.execute(text(f"ALTER TABLE {tabla} RENAME COLUMN longitud_num TO longitud"))
+        if not_null:
+            tx.execute(text(f"ALTER TABLE {tabla} ALTER COLUMN latitud SET NOT NULL, ALTER COLUMN longitud SET NOT NULL"))
+
+
+def upgrade(conn):
+    conn.execute(
+        text(
+            """
+            CREATE OR REPLACE FUNCTION geo_a_double(v text) RETURNS double precision AS $$
+            BEGIN
+                RETURN NULLIF(btrim(v), '')::double precision;
+            EXCEPTION WHEN invalid_text_representation THEN
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql IMMUTABLE
+            """
+        )
+    )
+    for tabla, pk, not_null in _TABLAS:
+        if _tipo_actual(conn, tabla) == "double precision":
+            continue  # ya migrada
+        _preparar(conn, tabla)
+        _backfill(conn, tabla, pk)
+        _intercambiar(conn, tabla, not_null)
+    conn.execute(text("DROP FUNCTION IF EXISTS geo_a_double(text)"))
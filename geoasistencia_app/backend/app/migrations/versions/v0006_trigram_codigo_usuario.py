@@ -0,0 +1,28 @@
+"""Índice trigram sobre usuario.documento.
+
+Los filtros por código del panel usan `documento ILIKE '%texto%'`; con un btree
+eso es seq scan. GIN + pg_trgm sirve prefijo y subcadena. El camino normal es el
+índice en memoria (app/utils/codigos.py); este índice cubre el fallback a SQL.
+"""
+
+from sqlalchemy import text
+
+from app.migrations.indices import crear_indice
+
+VERSION = 6
+NOMBRE = "trigram_codigo_usuario"
+TRANSACCIONAL = False
+
+
+def upgrade(conn):
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    crear_indice(conn, "ix_usuario_documento_trgm", "usuario", "documento gin_trgm_ops", using="gin")
+
+
+VERIFICACIONES = [
+    {
+        "descripcion": "búsqueda de código por subcadena (ILIKE)",
+        "sql": "SELECT usuario_id FROM usuario WHERE documento ILIKE '%LOJ-4F%'",
+        "indice": "ix_usuario_documento_trgm",
+    },
+]
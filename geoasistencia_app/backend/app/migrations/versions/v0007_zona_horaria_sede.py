@@ -0,0 +1,18 @@
+"""sede.zona_horaria: zona IANA de cada sede (antes, America/Guayaquil fija en el código).
+
+ADD COLUMN con DEFAULT constante no reescribe la tabla (Postgres 11+).
+"""
+
+from sqlalchemy import text
+
+VERSION = 7
+NOMBRE = "zona_horaria_sede"
+
+
+def upgrade(conn):
+    conn.execute(
+        text(
+            "ALTER TABLE sede ADD COLUMN IF NOT EXISTS zona_horaria character varying "
+            "NOT NULL DEFAULT 'America/Guayaquil'"
+        )
+    )
@@ -0,0 +1,82 @@
+"""marca_agua: contadores de versión por ámbito para ETags (ver app/utils/marcas_agua.py).
+
+Triggers AFTER por fila suben el contador de cada (tipo, clave) afectado:
+- sede: ('sede', sede_id)
+- usuario: ('usuario', sede_id) de la fila vieja y de la nueva (cambio de sede)
+- registro_asistencia: ('registro', sede_id) y ('registro_usuario', usuario_id)
+
+Sin sede, la clave es el UUID cero. El UPSERT bloquea la fila del contador hasta
+el commit de la escritura: es una fila por sede, y las marcaciones son
+transacciones cortas.
+"""
+
+from sqlalchemy import text
+
+VERSION = 8
+NOMBRE = "marca_agua"
+
+_TRIGGERS = {
+    "sede": """
+        IF TG_OP <> 'INSERT' THEN PERFORM geo_marcar('sede', OLD.sede_id); END IF;
+        IF TG_OP <> 'DELETE' THEN PERFORM geo_marcar('sede', NEW.sede_id); END IF;
+    """,
+    "usuario": """
+        IF TG_OP <> 'INSERT' THEN PERFORM geo_marcar('usuario', OLD.sede_id); END IF;
+        IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.sede_id IS DISTINCT FROM OLD.sede_id) THEN
+            PERFORM geo_marcar('usuario', NEW.sede_id);
+        END IF;
+    """,
+    "registro_asistencia": """
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM geo_marcar('registro', OLD.sede_id);
+            PERFORM geo_marcar('registro_usuario', OLD.usuario_id);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM geo_marcar('registro', NEW.sede_id);
+            PERFORM geo_marcar('registro_usuario', NEW.usuario_id);
+        END IF;
+    """,
+}
+
+
+def upgrade(conn):
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS marca_agua ("
+            " tipo character varying NOT NULL,"
+            " clave uuid NOT NULL,"
+            " version bigint NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (tipo, clave))"
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE OR REPLACE FUNCTION geo_marcar(p_tipo text, p_clave uuid) RETURNS void AS $$
+                INSERT INTO marca_agua (tipo, clave, version)
+                VALUES (p_tipo, COALESCE(p_clave, '00000000-0000-0000-0000-000000000000'), 1)
+                ON CONFLICT (tipo, clave) DO UPDATE SET version = marca_agua.version + 1
+            $$ LANGUAGE sql
+            """
+        )
+    )
+    for tabla, cuerpo in _TRIGGERS.items():
+        conn.execute(
+            text(
+                f"""
+                CREATE OR REPLACE FUNCTION {tabla}_marca_agua() RETURNS trigger AS $$
+                BEGIN
+                    {cuerpo}
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+                """
+            )
+        )
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {tabla}_marca_agua_trg ON {tabla}"))
+        conn.execute(
+            text(
+                f"CREATE TRIGGER {tabla}_marca_agua_trg AFTER INSERT OR UPDATE OR DELETE ON {tabla} "
+                f"FOR EACH ROW EXECUTE FUNCTION {tabla}_marca_agua()"
+            )
+        )
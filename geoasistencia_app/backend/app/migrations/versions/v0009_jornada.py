@@ -0,0 +1,59 @@
+"""jornada: turnos entrada→salida derivados de registro_asistencia (app/utils/jornadas.py).
+
+- jornada(usuario_id, fecha): hoja de horas de un empleado, O(días) del rango.
+- jornada(sede_id, fecha): totales por empleado de una sede (nómina).
+
+La tabla nace vacía; el histórico se llena con `python manage.py jornadas reconstruir`.
+"""
+
+from sqlalchemy import text
+
+from app.migrations.indices import crear_indice
+
+VERSION = 9
+NOMBRE = "jornada"
+TRANSACCIONAL = False
+
+_CERO = "00000000-0000-0000-0000-000000000000"
+
+# Sin FK a registro_asistencia: está particionada (PK compuesta).
+_TABLA = """
+CREATE TABLE IF NOT EXISTS jornada (
+    jornada_id uuid NOT NULL,
+    usuario_id uuid NOT NULL REFERENCES usuario (usuario_id),
+    sede_id uuid REFERENCES sede (sede_id),
+    fecha date NOT NULL,
+    entrada_id uuid,
+    entrada_at timestamp without time zone,
+    salida_id uuid,
+    salida_at timestamp without time zone,
+    estado character varying NOT NULL,
+    segundos integer NOT NULL,
+    updated_at timestamp without time zone,
+    PRIMARY KEY (jornada_id)
+)
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(_TABLA))
+    crear_indice(conn, "ix_jornada_usuario_fecha", "jornada", "usuario_id, fecha")
+    crear_indice(conn, "ix_jornada_sede_fecha", "jornada", "sede_id, fecha")
+
+
+VERIFICACIONES = [
+    {
+        "descripcion": "hoja de horas de un empleado (rango de fechas)",
+        "sql": "SELECT fecha, segundos FROM jornada WHERE usuario_id = CAST(:usuario AS uuid) "
+        "AND fecha BETWEEN CURRENT_DATE - 31 AND CURRENT_DATE",
+        "params": {"usuario": _CERO},
+        "indice": "ix_jornada_usuario_fecha",
+    },
+    {
+        "descripcion": "horas por empleado de una sede (rango de fechas)",
+        "sql": "SELECT usuario_id, sum(segundos) FROM jornada WHERE sede_id = CAST(:sede AS uuid) "
+        "AND fecha BETWEEN CURRENT_DATE - 31 AND CURRENT_DATE GROUP BY usuario_id",
+        "params": {"sede": _CERO},
+        "indice": "ix_jornada_sede_fecha",
+    },
+]
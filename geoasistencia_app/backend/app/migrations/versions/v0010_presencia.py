@@ -0,0 +1,60 @@
+"""presencia: última marcación por usuario (ocupación en vivo, app/utils/presencia.py).
+
+- Una fila por usuario; se llena con la última entrada/salida de las últimas 24 h
+  (DISTINCT ON sobre el índice usuario_ts, solo las particiones recientes).
+- presencia(sede_id, tipo, timestamp_registro): fallback SQL de la ocupación
+  mientras el estado en memoria no está listo.
+"""
+
+from sqlalchemy import text
+
+from app.migrations.indices import crear_indice
+
+VERSION = 10
+NOMBRE = "presencia"
+TRANSACCIONAL = False
+
+_TABLA = """
+CREATE TABLE IF NOT EXISTS presencia (
+    usuario_id uuid NOT NULL REFERENCES usuario (usuario_id),
+    sede_id uuid REFERENCES sede (sede_id),
+    registro_id uuid NOT NULL,
+    tipo character varying NOT NULL,
+    timestamp_registro timestamp without time zone NOT NULL,
+    dentro_geocerca boolean,
+    updated_at timestamp without time zone,
+    PRIMARY KEY (usuario_id)
+)
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(_TABLA))
+    conn.execute(
+        text(
+            """
+            INSERT INTO presencia (usuario_id, sede_id, registro_id, tipo, timestamp_registro, dentro_geocerca, updated_at)
+            SELECT DISTINCT ON (usuario_id)
+                   usuario_id, sede_id, registro_id, tipo::text, timestamp_registro, dentro_geocerca,
+                   now() AT TIME ZONE 'utc'
+            FROM registro_asistencia
+            WHERE usuario_id IS NOT NULL
+              AND tipo IN ('entrada', 'salida')
+              AND timestamp_registro >= (now() AT TIME ZONE 'utc') - interval '24 hours'
+            ORDER BY usuario_id, timestamp_registro DESC
+            ON CONFLICT (usuario_id) DO NOTHING
+            """
+        )
+    )
+    crear_indice(conn, "ix_presencia_sede_tipo_ts", "presencia", "sede_id, tipo, timestamp_registro")
+
+
+VERIFICACIONES = [
+    {
+        "descripcion": "presentes en una sede (fallback SQL de la ocupación)",
+        "sql": "SELECT usuario_id FROM presencia WHERE sede_id = CAST(:sede AS uuid) AND tipo = 'entrada' "
+        "AND timestamp_registro >= (now() AT TIME ZONE 'utc') - interval '16 hours'",
+        "params": {"sede": "00000000-0000-0000-0000-000000000000"},
+        "indice": "ix_presencia_sede_tipo_ts",
+    },
+]
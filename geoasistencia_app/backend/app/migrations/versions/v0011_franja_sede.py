@@ -0,0 +1,56 @@
+"""franja_sede + franja_pendiente: agregado por franjas de 15 min (app/utils/franjas.py).
+
+- La PK (sede_id, fecha, minuto) sirve la analítica de una sede.
+- franja_sede(fecha): la vista global (SUPERADMIN sin sede) filtra solo por fecha.
+
+Las tablas nacen vacías; el histórico se llena con `python manage.py franjas reconstruir`
+(después de `jornadas reconstruir`).
+"""
+
+from sqlalchemy import text
+
+from app.migrations.indices import crear_indice
+
+VERSION = 11
+NOMBRE = "franja_sede"
+TRANSACCIONAL = False
+
+_TABLAS = [
+    """
+    CREATE TABLE IF NOT EXISTS franja_sede (
+        sede_id uuid NOT NULL REFERENCES sede (sede_id),
+        fecha date NOT NULL,
+        minuto smallint NOT NULL,
+        entradas integer NOT NULL,
+        salidas integer NOT NULL,
+        primeras integer NOT NULL,
+        suben integer NOT NULL,
+        bajan integer NOT NULL,
+        PRIMARY KEY (sede_id, fecha, minuto)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS franja_pendiente (
+        sede_id uuid NOT NULL,
+        fecha date NOT NULL,
+        PRIMARY KEY (sede_id, fecha)
+    )
+    """,
+]
+
+
+def upgrade(conn):
+    for ddl in _TABLAS:
+        conn.execute(text(ddl))
+    crear_indice(conn, "ix_franja_sede_fecha", "franja_sede", "fecha")
+
+
+VERIFICACIONES = [
+    {
+        "descripcion": "franjas de una sede en un trimestre",
+        "sql": "SELECT minuto, sum(entradas) FROM franja_sede WHERE sede_id = CAST(:sede AS uuid) "
+        "AND fecha >= CURRENT_DATE - 92 AND fecha < CURRENT_DATE GROUP BY minuto",
+        "params": {"sede": "00000000-0000-0000-0000-000000000000"},
+        "indice": "franja_sede_pkey",
+    },
+]
@@ -0,0 +1,55 @@
+"""resumen_periodo: totales por sede y día/semana/mes (app/utils/resumenes.py).
+
+- La PK (sede_id, grano, inicio) sirve la serie de una sede.
+- resumen_periodo(grano, inicio): la vista global (SUPERADMIN sin sede).
+
+La tabla nace vacía; el histórico se llena con `python manage.py franjas reconstruir`
+(recalcula las franjas y el resumen de cada día).
+"""
+
+from sqlalchemy import text
+
+from app.migrations.indices import crear_indice
+
+VERSION = 12
+NOMBRE = "resumen_periodo"
+TRANSACCIONAL = False
+
+_TABLA = """
+CREATE TABLE IF NOT EXISTS resumen_periodo (
+    sede_id uuid NOT NULL REFERENCES sede (sede_id),
+    grano character varying(8) NOT NULL,
+    inicio date NOT NULL,
+    entradas integer NOT NULL,
+    salidas integer NOT NULL,
+    fuera_geocerca integer NOT NULL,
+    asistidos integer NOT NULL,
+    tarde integer NOT NULL,
+    jornadas integer NOT NULL,
+    segundos bigint NOT NULL,
+    PRIMARY KEY (sede_id, grano, inicio)
+)
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(_TABLA))
+    crear_indice(conn, "ix_resumen_periodo_grano_inicio", "resumen_periodo", "grano, inicio")
+
+
+VERIFICACIONES = [
+    {
+        "descripcion": "serie semanal de una sede en un año",
+        "sql": "SELECT inicio, asistidos FROM resumen_periodo WHERE sede_id = CAST(:sede AS uuid) "
+        "AND grano = 'week' AND inicio >= CURRENT_DATE - 365 AND inicio < CURRENT_DATE",
+        "params": {"sede": "00000000-0000-0000-0000-000000000000"},
+        "indice": "resumen_periodo_pkey",
+    },
+    {
+        "descripcion": "serie mensual de todas las sedes",
+        "sql": "SELECT inicio, sum(asistidos) FROM resumen_periodo WHERE grano = 'month' "
+        "AND inicio >= CURRENT_DATE - 1825 AND inicio < CURRENT_DATE GROUP BY inicio",
+        "params": {},
+        "indice": "ix_resumen_periodo_grano_inicio",
+    },
+]
@@ -0,0 +1,134 @@
+"""turno + feriado: horarios esperados y calendario de feriados (app/utils/turnos.py).
+
+- `geo_turnos_esperados(desde, hasta)`: una fila por (empleado, fecha laborable)
+  de [desde, hasta) con la hora de entrada esperada y el límite de tardanza.
+  Resuelve en SQL la precedencia empleado > sede > global, la vigencia de cada
+  turno y los feriados (globales o de la sede del empleado). Tardanzas y faltas
+  se calculan con un JOIN contra esta serie.
+- Se siembra el horario global equivalente a la regla anterior (entrada 08:00,
+  tolerancia 10 min), de lunes a viernes: fines de semana y feriados dejan de
+  contar como falta.
+"""
+
+from datetime import time
+
+from sqlalchemy import text
+
+from app.migrations.indices import crear_indice
+from app.utils.ids import uuid7
+
+VERSION = 13
+NOMBRE = "turnos"
+TRANSACCIONAL = False
+
+_CERO = "00000000-0000-0000-0000-000000000000"
+
+_TABLAS = [
+    """
+    CREATE TABLE IF NOT EXISTS turno (
+        turno_id uuid NOT NULL,
+        sede_id uuid REFERENCES sede (sede_id),
+        usuario_id uuid REFERENCES usuario (usuario_id),
+        dia_semana smallint NOT NULL,
+        hora_entrada time without time zone NOT NULL,
+        tolerancia_min smallint NOT NULL,
+        hora_salida time without time zone,
+        vigente_desde date,
+        vigente_hasta date,
+        PRIMARY KEY (turno_id),
+        CONSTRAINT ck_turno_dia_semana CHECK (dia_semana BETWEEN 1 AND 7),
+        CONSTRAINT ck_turno_tolerancia CHECK (tolerancia_min >= 0)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS feriado (
+        feriado_id uuid NOT NULL,
+        fecha date NOT NULL,
+        sede_id uuid REFERENCES sede (sede_id),
+        nombre character varying NOT NULL,
+        PRIMARY KEY (feriado_id)
+    )
+    """,
+]
+
+_SEMBRAR = text(
+    "INSERT INTO turno (turno_id, dia_semana, hora_entrada, tolerancia_min) "
+    "VALUES (CAST(:id AS uuid), :dia, :entrada, 10)"
+)
+
+_FUNCION = """
+CREATE OR REPLACE FUNCTION geo_turnos_esperados(p_desde date, p_hasta date)
+RETURNS TABLE (usuario_id uuid, sede_id uuid, fecha date, hora_entrada time, limite_tarde time)
+LANGUAGE sql STABLE AS $$
+    WITH dias AS (
+        SELECT g::date AS fecha, extract(isodow FROM g)::int AS dow
+        FROM generate_series(p_desde, p_hasta - 1, interval '1 day') AS g
+    ), vigentes AS (
+        -- turnos vigentes cada día (cualquier día de la semana): definen el nivel que aplica
+        SELECT t.*, d.fecha, d.dow
+        FROM turno t
+        JOIN dias d ON (t.vigente_desde IS NULL OR t.vigente_desde <= d.fecha)
+                   AND (t.vigente_hasta IS NULL OR t.vigente_hasta >= d.fecha)
+    ), con_propio AS (
+        SELECT DISTINCT usuario_id, fecha FROM vigentes WHERE usuario_id IS NOT NULL
+    ), con_sede AS (
+        SELECT DISTINCT sede_id, fecha FROM vigentes WHERE usuario_id IS NULL AND sede_id IS NOT NULL
+    ), empleados AS (
+        SELECT u.usuario_id, u.sede_id
+        FROM usuario u
+        WHERE upper(coalesce(u.rol, '')) NOT IN ('ADMIN', 'SUPERADMIN')
+    ), candidatos AS (
+        SELECT e.usuario_id, e.sede_id, v.fecha, v.hora_entrada, v.tolerancia_min
+        FROM empleados e
+        JOIN vigentes v ON v.usuario_id = e.usuario_id AND v.dia_semana = v.dow
+        UNION ALL
+        SELECT e.usuario_id, e.sede_id, v.fecha, v.hora_entrada, v.tolerancia_min
+        FROM empleados e
+        JOIN vigentes v ON v.usuario_id IS NULL AND v.sede_id = e.sede_id AND v.dia_semana = v.dow
+        WHERE NOT EXISTS (SELECT 1 FROM con_propio p WHERE p.usuario_id = e.usuario_id AND p.fecha = v.fecha)
+        UNION ALL
+        SELECT e.usuario_id, e.sede_id, v.fecha, v.hora_entrada, v.tolerancia_min
+        FROM empleados e
+        JOIN vigentes v ON v.usuario_id IS NULL AND v.sede_id IS NULL AND v.dia_semana = v.dow
+        WHERE NOT EXISTS (SELECT 1 FROM con_propio p WHERE p.usuario_id = e.usuario_id AND p.fecha = v.fecha)
+          AND NOT EXISTS (SELECT 1 FROM con_sede s WHERE s.sede_id = e.sede_id AND s.fecha = v.fecha)
+    )
+    -- Dos turnos el mismo día en el mismo nivel (turno partido): cuenta el primero
+    SELECT DISTINCT ON (c.usuario_id, c.fecha)
+           c.usuario_id, c.sede_id, c.fecha, c.hora_entrada,
+           (c.hora_entrada + make_interval(mins => c.tolerancia_min))::time
+    FROM candidatos c
+    WHERE NOT EXISTS (
+        SELECT 1 FROM feriado f
+        WHERE f.fecha = c.fecha AND (f.sede_id IS NULL OR f.sede_id = c.sede_id)
+    )
+    ORDER BY c.usuario_id, c.fecha, c.hora_entrada
+$$
+"""
+
+
+def upgrade(conn):
+    for ddl in _TABLAS:
+        conn.execute(text(ddl))
+    crear_indice(conn, "ix_turno_sede", "turno", "sede_id")
+    crear_indice(conn, "ix_turno_usuario", "turno", "usuario_id")
+    crear_indice(conn, "ix_feriado_fecha", "feriado", "fecha")
+    conn.execute(text(_FUNCION))
+    if conn.execute(text("SELECT 1 FROM turno LIMIT 1")).first() is None:
+        conn.execute(_SEMBRAR, [{"id": str(uuid7()), "dia": d, "entrada": time(8, 0)} for d in range(1, 6)])
+
+
+VERIFICACIONES = [
+    {
+        "descripcion": "feriados de un mes",
+        "sql": "SELECT fecha, sede_id FROM feriado WHERE fecha >= CURRENT_DATE - 31 AND fecha < CURRENT_DATE",
+        "params": {},
+        "indice": "ix_feriado_fecha",
+    },
+    {
+        "descripcion": "turnos propios de un empleado",
+        "sql": "SELECT dia_semana, hora_entrada FROM turno WHERE usuario_id = CAST(:usuario AS uuid)",
+        "params": {"usuario": _CERO},
+        "indice": "ix_turno_usuario",
+    },
+]
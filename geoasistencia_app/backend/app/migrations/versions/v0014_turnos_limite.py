@@ -0,0 +1,96 @@
+"""geo_turnos_esperados: límite de tardanza como timestamp (local y UTC).
+
+- `limite_tarde` pasa de `time` a `timestamp` local (fecha + entrada +
+  tolerancia): un turno de 23:55 con 10 min de tolerancia vence el día
+  siguiente a las 00:05, no a las 00:05 del mismo día (con `time` se daba la
+  vuelta y toda llegada contaba como tarde).
+- `limite_utc`: el mismo límite en UTC (como `timestamp_registro`), con la
+  zona de la sede del empleado. Un turno esperado solo cuenta como falta
+  cuando su límite ya pasó: hoy, antes de la hora de entrada, no hay falta.
+- Cambia el tipo de retorno: DROP + CREATE. Si había turnos que cruzaban la
+  medianoche, los días ya resumidos quedan pendientes de recálculo.
+"""
+
+from sqlalchemy import text
+
+from app.utils.tiempo import TZ_DEFECTO
+
+VERSION = 14
+NOMBRE = "turnos_limite"
+
+_FUNCION = """
+CREATE FUNCTION geo_turnos_esperados(p_desde date, p_hasta date)
+RETURNS TABLE (
+    usuario_id uuid, sede_id uuid, fecha date, hora_entrada time,
+    limite_tarde timestamp, limite_utc timestamp
+)
+LANGUAGE sql STABLE AS $$
+    WITH dias AS (
+        SELECT g::date AS fecha, extract(isodow FROM g)::int AS dow
+        FROM generate_series(p_desde, p_hasta - 1, interval '1 day') AS g
+    ), vigentes AS (
+        -- turnos vigentes cada día (cualquier día de la semana): definen el nivel que aplica
+        SELECT t.*, d.fecha, d.dow
+        FROM turno t
+        JOIN dias d ON (t.vigente_desde IS NULL OR t.vigente_desde <= d.fecha)
+                   AND (t.vigente_hasta IS NULL OR t.vigente_hasta >= d.fecha)
+    ), con_propio AS (
+        SELECT DISTINCT usuario_id, fecha FROM vigentes WHERE usuario_id IS NOT NULL
+    ), con_sede AS (
+        SELECT DISTINCT sede_id, fecha FROM vigentes WHERE usuario_id IS NULL AND sede_id IS NOT NULL
+    ), empleados AS (
+        SELECT u.usuario_id, u.sede_id, coalesce(s.zona_horaria, '{tz}') AS zona
+        FROM usuario u
+        LEFT JOIN sede s ON s.sede_id = u.sede_id
+        WHERE upper(coalesce(u.rol, '')) NOT IN ('ADMIN', 'SUPERADMIN')
+    ), candidatos AS (
+        SELECT e.usuario_id, e.sede_id, e.zona, v.fecha, v.hora_entrada, v.tolerancia_min
+        FROM empleados e
+        JOIN vigentes v ON v.usuario_id = e.usuario_id AND v.dia_semana = v.dow
+        UNION ALL
+        SELECT e.usuario_id, e.sede_id, e.zona, v.fecha, v.hora_entrada, v.tolerancia_min
+        FROM empleados e
+        JOIN vigentes v ON v.usuario_id IS NULL AND v.sede_id = e.sede_id AND v.dia_semana = v.dow
+        WHERE NOT EXISTS (SELECT 1 FROM con_propio p WHERE p.usuario_id = e.usuario_id AND p.fecha = v.fecha)
+        UNION ALL
+        SELECT e.usuario_id, e.sede_id, e.zona, v.fecha, v.hora_entrada, v.tolerancia_min
+        FROM empleados e
+        JOIN vigentes v ON v.usuario_id IS NULL AND v.sede_id IS NULL AND v.dia_semana = v.dow
+        WHERE NOT EXISTS (SELECT 1 FROM con_propio p WHERE p.usuario_id = e.usuario_id AND p.fecha = v.fecha)
+          AND NOT EXISTS (SELECT 1 FROM con_sede s WHERE s.sede_id = e.sede_id AND s.fecha = v.fecha)
+    ), elegidos AS (
+        -- Dos turnos el mismo día en el mismo nivel (turno partido): cuenta el primero
+        SELECT DISTINCT ON (c.usuario_id, c.fecha)
+               c.usuario_id, c.sede_id, c.zona, c.fecha, c.hora_entrada,
+               c.fecha + c.hora_entrada + make_interval(mins => c.tolerancia_min) AS limite
+        FROM candidatos c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM feriado f
+            WHERE f.fecha = c.fecha AND (f.sede_id IS NULL OR f.sede_id = c.sede_id)
+        )
+        ORDER BY c.usuario_id, c.fecha, c.hora_entrada
+    )
+    SELECT usuario_id, sede_id, fecha, hora_entrada, limite,
+           timezone('UTC', timezone(zona, limite))
+    FROM elegidos
+$$
+"""
+
+# Días ya resumidos cuyo `tarde` se calculó con un límite que daba la vuelta
+_PENDIENTES = """
+INSERT INTO franja_pendiente (sede_id, fecha)
+SELECT sede_id, inicio FROM resumen_periodo WHERE grano = 'day'
+ON CONFLICT DO NOTHING
+"""
+_CRUZAN_MEDIANOCHE = """
+SELECT 1 FROM turno
+WHERE hora_entrada + make_interval(mins => tolerancia_min) < hora_entrada
+LIMIT 1
+"""
+
+
+def upgrade(conn):
+    conn.execute(text("DROP FUNCTION IF EXISTS geo_turnos_esperados(date, date)"))
+    conn.execute(text(_FUNCION.replace("{tz}", TZ_DEFECTO.replace("'", "''"))))
+    if conn.execute(text(_CRUZAN_MEDIANOCHE)).first() is not None:
+        conn.execute(text(_PENDIENTES))
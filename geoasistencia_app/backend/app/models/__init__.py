@@ -8,3 +8,8 @@ from .red_empresa import RedEmpresa
 from .reveal_request import RevealRequest
 from .solicitud_app import SolicitudApp
 from .solicitud_asistencia_manual import SolicitudAsistenciaManual
+from .jornada import Jornada
+from .presencia import Presencia
+from .franja_sede import FranjaSede, FranjaPendiente
+from .resumen_periodo import ResumenPeriodo
+from .turno import Turno, Feriado
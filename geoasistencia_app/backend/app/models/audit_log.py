@@ -2,12 +2,12 @@ from sqlalchemy import Column, String, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.database import Base
 from datetime import datetime
-import uuid
+from app.utils.ids import uuid7
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
 
-    audit_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    audit_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
 
     actor_usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuario.usuario_id"))
     entidad = Column(String, nullable=False)
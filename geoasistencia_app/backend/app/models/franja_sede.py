@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Date, Integer, SmallInteger, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+
+class FranjaSede(Base):
+    """Agregado por sede, fecha local y franja de 15 minutos (app/utils/franjas.py).
+
+    Solo empleados (sin ADMIN/SUPERADMIN). Se recalcula por (sede, fecha) a partir
+    de registro_asistencia y jornada; no se edita a mano.
+    """
+
+    __tablename__ = "franja_sede"
+
+    sede_id = Column(UUID(as_uuid=True), ForeignKey("sede.sede_id"), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    minuto = Column(SmallInteger, primary_key=True)  # inicio de la franja, minutos desde 00:00 local
+
+    entradas = Column(Integer, nullable=False, default=0)
+    salidas = Column(Integer, nullable=False, default=0)
+    primeras = Column(Integer, nullable=False, default=0)  # primera entrada del empleado ese día
+    # Cambios de ocupación (jornadas CERRADAS): `suben` cuenta las que empiezan en la
+    # franja y, en la de 00:00, las nocturnas que vienen del día anterior; `bajan`,
+    # las que terminan. Ocupación a una hora = suma acumulada del día hasta esa franja.
+    suben = Column(Integer, nullable=False, default=0)
+    bajan = Column(Integer, nullable=False, default=0)
+
+
+class FranjaPendiente(Base):
+    """(sede, fecha) con marcaciones nuevas: su agregado se recalcula antes de leerlo."""
+
+    __tablename__ = "franja_pendiente"
+
+    sede_id = Column(UUID(as_uuid=True), primary_key=True)
+    fecha = Column(Date, primary_key=True)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+from datetime import datetime
+from app.utils.ids import uuid7
+
+
+class Jornada(Base):
+    """Turno trabajado: una entrada emparejada con su salida.
+
+    Tabla derivada de `registro_asistencia` (ver app/utils/jornadas.py): se
+    recalcula al registrar o aprobar una marcación y con
+    `python manage.py jornadas reconstruir`. No se edita a mano.
+    """
+
+    __tablename__ = "jornada"
+
+    jornada_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+
+    usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuario.usuario_id"), nullable=False)
+    sede_id = Column(UUID(as_uuid=True), ForeignKey("sede.sede_id"))
+
+    # Fecha local (zona de la sede) de la entrada; de la salida si no hubo entrada.
+    # Un turno nocturno cuenta entero en el día en que empezó.
+    fecha = Column(Date, nullable=False)
+
+    # Sin FK: registro_asistencia está particionada (PK compuesta).
+    entrada_id = Column(UUID(as_uuid=True))
+    entrada_at = Column(DateTime)
+    salida_id = Column(UUID(as_uuid=True))
+    salida_at = Column(DateTime)
+
+    # CERRADA | ABIERTA (entrada sin salida aún) | INCOMPLETA (entrada sin salida,
+    # ya no emparejable) | SIN_ENTRADA (salida huérfana)
+    estado = Column(String, nullable=False)
+    segundos = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
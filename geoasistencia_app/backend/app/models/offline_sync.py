@@ -2,12 +2,12 @@ from sqlalchemy import Column, String, DateTime, Enum, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.database import Base
 from datetime import datetime
-import uuid
+from app.utils.ids import uuid7
 
 class OfflineSync(Base):
     __tablename__ = "offline_sync"
 
-    sync_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    sync_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
 
     usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuario.usuario_id"))
 
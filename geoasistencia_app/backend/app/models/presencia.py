@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+from datetime import datetime
+
+
+class Presencia(Base):
+    """Última marcación de cada usuario (una fila por usuario).
+
+    Se actualiza en la misma transacción que la marcación (app/utils/presencia.py)
+    y solo si el evento es más reciente que el guardado: una sincronización
+    offline tardía no pisa el estado actual.
+    """
+
+    __tablename__ = "presencia"
+
+    usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuario.usuario_id"), primary_key=True)
+    sede_id = Column(UUID(as_uuid=True), ForeignKey("sede.sede_id"))
+
+    registro_id = Column(UUID(as_uuid=True), nullable=False)
+    tipo = Column(String, nullable=False)  # entrada | salida
+    timestamp_registro = Column(DateTime, nullable=False)
+    dentro_geocerca = Column(Boolean)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,24 +1,27 @@
 from sqlalchemy import (
     Column, String, Boolean, DateTime, ForeignKey, Enum, Integer
 )
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSONB, DOUBLE_PRECISION
 from app.database import Base
 from datetime import datetime
-import uuid
+from app.utils.ids import uuid7
 
 class RegistroAsistencia(Base):
     __tablename__ = "registro_asistencia"
+    # Particionada por mes (RANGE sobre timestamp_registro). La PK debe incluir
+    # la columna de partición; registro_id sigue siendo único en la práctica.
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp_registro)"}
 
-    registro_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    registro_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
 
     usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuario.usuario_id"))
     sede_id = Column(UUID(as_uuid=True), ForeignKey("sede.sede_id"))
 
     tipo = Column(Enum("entrada", "salida", "manual", name="tipo_asistencia"))
-    timestamp_registro = Column(DateTime, default=datetime.utcnow)
+    timestamp_registro = Column(DateTime, primary_key=True, nullable=False, default=datetime.utcnow)
 
-    latitud = Column(String)
-    longitud = Column(String)
+    latitud = Column(DOUBLE_PRECISION)
+    longitud = Column(DOUBLE_PRECISION)
     dentro_geocerca = Column(Boolean)
 
     modo = Column(Enum("app", "manual", "sync_offline", name="modo_registro"))
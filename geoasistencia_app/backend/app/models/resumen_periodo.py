@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer, BigInteger, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+
+class ResumenPeriodo(Base):
+    """Totales de asistencia por sede y periodo local: día, semana (lunes) y mes.
+
+    Jerárquica (app/utils/resumenes.py): las filas `day` se recalculan desde
+    registro_asistencia y jornada junto con las franjas del día; las `week` y
+    `month` se suman desde las `day`. Solo empleados (sin ADMIN/SUPERADMIN).
+    No se edita a mano.
+    """
+
+    __tablename__ = "resumen_periodo"
+
+    sede_id = Column(UUID(as_uuid=True), ForeignKey("sede.sede_id"), primary_key=True)
+    grano = Column(String(8), primary_key=True)  # day | week | month
+    inicio = Column(Date, primary_key=True)  # primer día local del periodo
+
+    entradas = Column(Integer, nullable=False, default=0)
+    salidas = Column(Integer, nullable=False, default=0)
+    fuera_geocerca = Column(Integer, nullable=False, default=0)
+    # Empleado-días con al menos una entrada en la sede, y de esos los que llegaron tarde
+    asistidos = Column(Integer, nullable=False, default=0)
+    tarde = Column(Integer, nullable=False, default=0)
+    # Jornadas CERRADAS cuya fecha cae en el periodo
+    jornadas = Column(Integer, nullable=False, default=0)
+    segundos = Column(BigInteger, nullable=False, default=0)
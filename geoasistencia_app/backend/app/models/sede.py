@@ -1,5 +1,5 @@
 from sqlalchemy import Column, String, Integer, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, DOUBLE_PRECISION
 from app.database import Base
 from datetime import datetime
 import uuid
@@ -10,10 +10,12 @@ class Sede(Base):
     sede_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     nombre = Column(String, nullable=False)
-    latitud = Column(String, nullable=False)      # DECIMAL(9,6) se maneja como string/float
-    longitud = Column(String, nullable=False)
+    latitud = Column(DOUBLE_PRECISION, nullable=False)
+    longitud = Column(DOUBLE_PRECISION, nullable=False)
     radio_metros = Column(Integer, nullable=False)
     direccion = Column(String)
+    # Zona IANA: define el "día local" de la sede (reportes, tardanzas, faltas).
+    zona_horaria = Column(String, nullable=False, default="America/Guayaquil", server_default="America/Guayaquil")
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,9 +1,9 @@
 from sqlalchemy import Column, String, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, DOUBLE_PRECISION
 from sqlalchemy.dialects.postgresql import JSONB
 from app.database import Base
 from datetime import datetime
-import uuid
+from app.utils.ids import uuid7
 
 
 class SolicitudAsistenciaManual(Base):
@@ -18,7 +18,7 @@ class SolicitudAsistenciaManual(Base):
 
     __tablename__ = "solicitud_asistencia_manual"
 
-    solicitud_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    solicitud_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
 
     usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuario.usuario_id"), nullable=False)
     sede_id = Column(UUID(as_uuid=True), ForeignKey("sede.sede_id"), nullable=False)
@@ -29,8 +29,8 @@ class SolicitudAsistenciaManual(Base):
     # Momento del evento que se desea registrar (no necesariamente el momento de solicitud)
     timestamp_evento = Column(DateTime, nullable=False, default=datetime.utcnow)
 
-    latitud = Column(String, nullable=True)
-    longitud = Column(String, nullable=True)
+    latitud = Column(DOUBLE_PRECISION, nullable=True)
+    longitud = Column(DOUBLE_PRECISION, nullable=True)
     device_info = Column(JSONB, nullable=True)
     evidence = Column(String, nullable=True)
 
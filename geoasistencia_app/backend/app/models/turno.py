@@ -0,0 +1,46 @@
+from sqlalchemy import CheckConstraint, Column, Date, ForeignKey, SmallInteger, String, Time
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+from app.utils.ids import uuid7
+
+
+class Turno(Base):
+    """Horario esperado de entrada por día de la semana (app/utils/turnos.py).
+
+    Tres niveles; gana el más específico con alguna fila vigente en la fecha:
+    empleado (usuario_id) > sede (sede_id) > global (ambos NULL). Un empleado con
+    turnos propios no hereda ningún día del horario de su sede. Un día sin fila
+    en el nivel que aplica no es laborable (no cuenta como falta).
+    """
+
+    __tablename__ = "turno"
+    __table_args__ = (
+        CheckConstraint("dia_semana BETWEEN 1 AND 7", name="ck_turno_dia_semana"),
+        CheckConstraint("tolerancia_min >= 0", name="ck_turno_tolerancia"),
+    )
+
+    turno_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+
+    sede_id = Column(UUID(as_uuid=True), ForeignKey("sede.sede_id"))
+    usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuario.usuario_id"))
+
+    dia_semana = Column(SmallInteger, nullable=False)  # ISO: 1 = lunes … 7 = domingo
+    hora_entrada = Column(Time, nullable=False)  # hora local de la sede
+    tolerancia_min = Column(SmallInteger, nullable=False, default=0)  # tarde: después de entrada + tolerancia
+    hora_salida = Column(Time)
+
+    # Vigencia (inclusive). Cambiar un horario sin tocar el histórico: cerrar la
+    # fila vieja con vigente_hasta y crear otra con vigente_desde.
+    vigente_desde = Column(Date)
+    vigente_hasta = Column(Date)
+
+
+class Feriado(Base):
+    """Día no laborable: de todas las sedes (sede_id NULL) o de una."""
+
+    __tablename__ = "feriado"
+
+    feriado_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    fecha = Column(Date, nullable=False)
+    sede_id = Column(UUID(as_uuid=True), ForeignKey("sede.sede_id"))
+    nombre = Column(String, nullable=False)
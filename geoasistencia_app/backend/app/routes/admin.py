@@ -1,19 +1,30 @@
 from __future__ import annotations
 
+import asyncio
+import csv
+import io
+import json
 import uuid
 import re
 from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo
 from fastapi import APIRouter, Depends, HTTPException, Request, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import String, and_, case, cast, func, insert, or_, update
 
+from app.database import SessionLocal
 from app.models.usuario import Usuario
 from app.models.sede import Sede
 from app.models.audit_log import AuditLog
+from app.models.jornada import Jornada
+from app.models.presencia import Presencia
 from app.models.registro_asistencia import RegistroAsistencia
 from app.models.solicitud_asistencia_manual import SolicitudAsistenciaManual
 from app.models.reveal_request import RevealRequest
+from app.models.turno import Feriado, Turno
 from app.models.registro_asistencia import RegistroAsistencia
 from app.schemas.admin_schema import (
     AdminLoginRequest,
@@ -23,11 +34,35 @@ from app.schemas.admin_schema import (
     UsuarioUpdate,
     RevealPIIRequest,
     ActionVerifyRequest,
+    TurnoCreate,
+    FeriadoCreate,
 )
-from app.security.deps import get_db, get_current_user, require_roles
-from app.security.hash import verify_password, hash_password
+from app.security.deps import get_db, get_current_user, get_read_db, require_roles
+from app.security.hash import hash_password, hash_passwords, verify_password
 from app.security.jwt import create_token, decode_token
-from app.utils.geo import distancia_metros
+from app.utils.geo import distancia_metros, distancia_metros_sql
+from app.utils.codigos import codigos as indice_codigos
+from app.utils.eventos import datos_registro, hub, publicar, publicar_muchos
+from app.utils.ids import uuid7
+from app.utils import derivados, franjas, jornadas, resumenes, turnos
+from app.utils.marcas_agua import condicional
+from app.utils.llegadas import llegadas
+from app.utils.pendientes import pendientes
+from app.utils.periodos import cerrado as periodo_cerrado, periodos
+from app.utils.presencia import presencia, vigencia as vigencia_presencia
+from app.utils.respuestas import JSONRapido, como_dicts
+from app.utils.tiempo import (
+    RANGOS,
+    RANGOS_LARGOS,
+    a_local,
+    fecha_local_sql,
+    hoy,
+    limites_alcance,
+    local_sql,
+    rango_fechas,
+    zona_valida,
+    zonas_sede,
+)
 
 
 router = APIRouter()
@@ -166,24 +201,33 @@ def verify_action(
 
 @router.get("/mi-sede")
 def mi_sede(
+    request: Request,
     db: Session = Depends(get_db),
     user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
 ):
     if not user.sede_id:
         raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
 
+    cabeceras, no_modificado = condicional(request, db, [("sede", user.sede_id)], user.sede_id)
+    if no_modificado:
+        return no_modificado
+
     sede = db.query(Sede).filter(Sede.sede_id == user.sede_id).first()
     if not sede:
         raise HTTPException(status_code=404, detail="Sede no encontrada")
 
-    return {
-        "sede_id": str(sede.sede_id),
-        "nombre": sede.nombre,
-        "latitud": sede.latitud,
-        "longitud": sede.longitud,
-        "radio_metros": sede.radio_metros,
-        "direccion": sede.direccion,
-    }
+    return JSONRapido(
+        {
+            "sede_id": str(sede.sede_id),
+            "nombre": sede.nombre,
+            "latitud": sede.latitud,
+            "longitud": sede.longitud,
+            "radio_metros": sede.radio_metros,
+            "direccion": sede.direccion,
+            "zona_horaria": sede.zona_horaria,
+        },
+        headers=cabeceras,
+    )
 
 
 @router.put("/mi-sede")
@@ -247,26 +291,134 @@ def actualizar_mi_sede(
 # ----------------------
 
 
-def _local_tz():
-    # Ecuador
-    return ZoneInfo("America/Guayaquil")
+def _hoy_alcance(zonas: tuple[str, ...]):
+    # Alcance global con varias zonas: la fecha es la de TZ_DEFECTO y cada
+    # sede la cuenta en su propia hora local.
+    return hoy(zonas[0] if len(zonas) == 1 else None)
+
+
+# Consultas por rango de fechas. Siempre filtran con límites UTC constantes
+# (cacheados por zona y fecha en app/utils/tiempo.py) para que Postgres pode
+# las particiones mensuales (ver app/utils/particiones.py -> verificar_pruning).
+
+
+def _rango_alcance(q, col_ts, col_sede, desde, hasta, zonas: tuple[str, ...], sede_unida: bool = False):
+    """Filtra `col_ts` a [desde, hasta) en la hora local de cada sede.
+
+    Con una sola zona bastan los límites UTC; si el alcance mezcla zonas se
+    filtra además la fecha local de cada fila en SQL (`sede_unida`: la
+    consulta ya tiene el join con Sede).
+    """
+    start_utc, end_utc = limites_alcance(zonas, desde, hasta)
+    q = q.filter(col_ts >= start_utc, col_ts < end_utc)
+    if len(zonas) > 1:
+        if not sede_unida:
+            q = q.join(Sede, Sede.sede_id == col_sede)
+        fecha = fecha_local_sql(col_ts, Sede.zona_horaria)
+        q = q.filter(fecha >= desde, fecha < hasta)
+    return q
+
+
+def _hora_local_cols(col_ts):
+    """local_date y local_time (texto) calculados en SQL con la zona de la sede.
+
+    La consulta debe tener el join con Sede.
+    """
+    local = local_sql(col_ts, Sede.zona_horaria)
+    return func.to_char(local, "YYYY-MM-DD"), func.to_char(local, "HH24:MI:SS")
+
+
+def _con_hora_local(q, col_ts):
+    return q.add_columns(*_hora_local_cols(col_ts))
+
+
+def _minusculas(col):
+    # (x or "").lower() en SQL. A texto antes del coalesce: con el ENUM
+    # tipo_asistencia, '' se leería como valor del enum (y no lo es).
+    return func.lower(func.coalesce(cast(col, String), ""))
+
+
+def _asistencias_rango_query(db: Session, desde, hasta, sede_target_id: str | None):
+    """Registros de empleados (no ADMIN/SUPERADMIN) con usuario y sede, en fechas locales [desde, hasta)."""
+    q = (
+        db.query(RegistroAsistencia, Usuario, Sede)
+        .join(Usuario, Usuario.usuario_id == RegistroAsistencia.usuario_id)
+        .join(Sede, Sede.sede_id == RegistroAsistencia.sede_id)
+        .filter(Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]))
+    )
+    if sede_target_id:
+        q = q.filter(RegistroAsistencia.sede_id == sede_target_id)
+    zonas = zonas_sede.de_alcance(sede_target_id)
+    return _rango_alcance(
+        q, RegistroAsistencia.timestamp_registro, RegistroAsistencia.sede_id, desde, hasta, zonas, sede_unida=True
+    )
+
+
+def _filtro_codigo(q, col_usuario_id, code: str):
+    """Filtro por código de empleado (subcadena, sin mayúsculas).
 
+    Resuelve los usuario_id en memoria (app/utils/codigos.py) y filtra por
+    `usuario_id IN (...)`; si el índice no está disponible, ILIKE (trigram).
+    """
+    ids = indice_codigos.buscar(code)
+    if ids is None:
+        return q.filter(Usuario.documento.ilike(f"%{code}%"))
+    return q.filter(col_usuario_id.in_(ids))
+
+
+_EMPLEADO_ROLES = ["EMPLEADO", "Colaborador", "colaborador", "empleado"]
+_CLAVES_DASHBOARD_SEDES = (
+    "sede_id", "nombre", "total_empleados", "entradas_hoy", "salidas_hoy", "fuera_geocerca_hoy",
+)
 
-def _utc_bounds_for_local_day(days_ago: int = 0):
-    tz = _local_tz()
-    now_local = datetime.now(tz)
-    d = (now_local.date() - timedelta(days=days_ago))
-    start_local = datetime(d.year, d.month, d.day, 0, 0, 0, tzinfo=tz)
-    end_local = start_local + timedelta(days=1)
-    start_utc = start_local.astimezone(timezone.utc).replace(tzinfo=None)
-    end_utc = end_local.astimezone(timezone.utc).replace(tzinfo=None)
-    return start_utc, end_utc
+
+def _dashboard_por_sede(db: Session, hoy_local, zonas: tuple[str, ...], sede_target_id: str | None):
+    """Contadores de hoy de cada sede en una sola consulta: sede LEFT JOIN (empleados) LEFT JOIN (marcaciones)."""
+    empleados = (
+        db.query(Usuario.sede_id.label("sede_id"), func.count().label("n"))
+        .filter(Usuario.rol.in_(_EMPLEADO_ROLES))
+        .group_by(Usuario.sede_id)
+        .subquery()
+    )
+    tipo = RegistroAsistencia.tipo  # ENUM tipo_asistencia: sin lower()
+    q = (
+        db.query(
+            RegistroAsistencia.sede_id.label("sede_id"),
+            func.count().filter(tipo == "entrada").label("entradas"),
+            func.count().filter(tipo == "salida").label("salidas"),
+            func.count().filter(RegistroAsistencia.dentro_geocerca.is_(False)).label("fuera"),
+        )
+        .join(Sede, Sede.sede_id == RegistroAsistencia.sede_id)
+    )
+    q = _rango_alcance(
+        q, RegistroAsistencia.timestamp_registro, RegistroAsistencia.sede_id,
+        hoy_local, hoy_local + timedelta(days=1), zonas, sede_unida=True,
+    )
+    marcaciones = q.group_by(RegistroAsistencia.sede_id).subquery()
+
+    filas = (
+        db.query(
+            Sede.sede_id,
+            Sede.nombre,
+            func.coalesce(empleados.c.n, 0),
+            func.coalesce(marcaciones.c.entradas, 0),
+            func.coalesce(marcaciones.c.salidas, 0),
+            func.coalesce(marcaciones.c.fuera, 0),
+        )
+        .outerjoin(empleados, empleados.c.sede_id == Sede.sede_id)
+        .outerjoin(marcaciones, marcaciones.c.sede_id == Sede.sede_id)
+    )
+    if sede_target_id:
+        filas = filas.filter(Sede.sede_id == sede_target_id)
+    return como_dicts(_CLAVES_DASHBOARD_SEDES, filas.order_by(Sede.nombre).all())
 
 
 @router.get("/dashboard")
 def dashboard(
+    request: Request,
     sede_id: str | None = None,
-    db: Session = Depends(get_db),
+    desglose: bool = False,
+    db: Session = Depends(get_read_db),
     user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
 ):
     role = _role(user)
@@ -279,53 +431,92 @@ def dashboard(
     else:
         sede_target_id = sede_id  # opcional (si no viene, es global)
 
-    start_utc, end_utc = _utc_bounds_for_local_day(0)
+    zonas = zonas_sede.de_alcance(sede_target_id)
+    hoy_local = _hoy_alcance(zonas)
+    dias = [hoy_local - timedelta(days=i) for i in range(6, -1, -1)]
+
+    # 304 si no hubo marcaciones ni cambios de usuarios o sedes en el alcance (y no cambió el día).
+    # "sede": desglose lista nombre de cada sede (renombrar/crear una cambia la respuesta).
+    ambitos = [("registro", sede_target_id), ("usuario", sede_target_id), ("sede", sede_target_id)]
+    cabeceras, no_modificado = condicional(request, db, ambitos, role, sede_target_id, hoy_local, zonas)
+    if no_modificado:
+        return no_modificado
+
+    # desglose=true: una fila por sede (SUPERADMIN: todas) en un solo round trip, sin serie 7d
+    if desglose:
+        sedes = _dashboard_por_sede(db, hoy_local, zonas, sede_target_id)
+        return JSONRapido(
+            {
+                "scope": "por_sede",
+                "date": hoy_local.isoformat(),
+                "total_empleados": sum(f["total_empleados"] for f in sedes),
+                "entradas_hoy": sum(f["entradas_hoy"] for f in sedes),
+                "salidas_hoy": sum(f["salidas_hoy"] for f in sedes),
+                "fuera_geocerca_hoy": sum(f["fuera_geocerca_hoy"] for f in sedes),
+                "sedes": sedes,
+            },
+            headers=cabeceras,
+        )
 
     # Usuarios visibles
-    q_users = db.query(Usuario).filter(Usuario.rol.in_(["EMPLEADO", "Colaborador", "colaborador", "empleado"]))
+    q_users = db.query(Usuario).filter(Usuario.rol.in_(_EMPLEADO_ROLES))
     if sede_target_id:
         q_users = q_users.filter(Usuario.sede_id == sede_target_id)
     total_empleados = q_users.count()
 
-    # Asistencias hoy
-    q_today = db.query(RegistroAsistencia).filter(
-        RegistroAsistencia.timestamp_registro >= start_utc,
-        RegistroAsistencia.timestamp_registro < end_utc,
+    # Serie 7 días (incluye hoy): una consulta agrupada por fecha local de la sede.
+    # Los días ya cerrados salen del caché de periodos; solo se consulta desde el primero que falte.
+    por_dia = {}
+    for d in dias[:-1]:
+        guardado = periodos.obtener(("dashboard_dia", sede_target_id, d)) if periodo_cerrado(d + timedelta(days=1), zonas) else None
+        if guardado is None:
+            break
+        por_dia[d] = guardado
+    consulta_desde = dias[len(por_dia)]
+    generacion = periodos.generacion()
+
+    tipo = RegistroAsistencia.tipo  # ENUM tipo_asistencia: sin lower()
+    fecha = fecha_local_sql(RegistroAsistencia.timestamp_registro, Sede.zona_horaria)
+    q = (
+        db.query(
+            fecha,
+            func.count().filter(tipo == "entrada"),
+            func.count().filter(tipo == "salida"),
+            func.count().filter(RegistroAsistencia.dentro_geocerca.is_(False)),
+        )
+        .select_from(RegistroAsistencia)
+        .join(Sede, Sede.sede_id == RegistroAsistencia.sede_id)
     )
     if sede_target_id:
-        q_today = q_today.filter(RegistroAsistencia.sede_id == sede_target_id)
-
-    regs_today = q_today.all()
-    entradas_hoy = sum(1 for r in regs_today if (r.tipo or "").lower() == "entrada")
-    salidas_hoy = sum(1 for r in regs_today if (r.tipo or "").lower() == "salida")
-    fuera_hoy = sum(1 for r in regs_today if r.dentro_geocerca is False)
+        q = q.filter(RegistroAsistencia.sede_id == sede_target_id)
+    q = _rango_alcance(
+        q, RegistroAsistencia.timestamp_registro, RegistroAsistencia.sede_id,
+        consulta_desde, hoy_local + timedelta(days=1), zonas, sede_unida=True,
+    )
+    consultados = {d: (e, s, f) for d, e, s, f in q.group_by(fecha).all()}
+    for d in dias[len(por_dia):]:
+        por_dia[d] = consultados.get(d, (0, 0, 0))
+        if d < hoy_local and periodo_cerrado(d + timedelta(days=1), zonas):
+            periodos.guardar(("dashboard_dia", sede_target_id, d), sede_target_id, d, d + timedelta(days=1), por_dia[d], generacion)
 
-    # Serie 7 días
     serie = []
-    for i in range(6, -1, -1):
-        s_utc, e_utc = _utc_bounds_for_local_day(i)
-        q = db.query(RegistroAsistencia).filter(
-            RegistroAsistencia.timestamp_registro >= s_utc,
-            RegistroAsistencia.timestamp_registro < e_utc,
-        )
-        if sede_target_id:
-            q = q.filter(RegistroAsistencia.sede_id == sede_target_id)
-        regs = q.all()
-        entradas = sum(1 for r in regs if (r.tipo or "").lower() == "entrada")
-        salidas = sum(1 for r in regs if (r.tipo or "").lower() == "salida")
-        fuera = sum(1 for r in regs if r.dentro_geocerca is False)
-        date_local = (datetime.now(_local_tz()).date() - timedelta(days=i)).isoformat()
-        serie.append({"date": date_local, "entradas": entradas, "salidas": salidas, "fuera": fuera})
+    for d in dias:
+        entradas, salidas, fuera = por_dia.get(d, (0, 0, 0))
+        serie.append({"date": d.isoformat(), "entradas": entradas, "salidas": salidas, "fuera": fuera})
+    entradas_hoy, salidas_hoy, fuera_hoy = por_dia.get(hoy_local, (0, 0, 0))
 
-    return {
-        "scope": "sede" if sede_target_id else "global",
-        "sede_id": sede_target_id,
-        "total_empleados": total_empleados,
-        "entradas_hoy": entradas_hoy,
-        "salidas_hoy": salidas_hoy,
-        "fuera_geocerca_hoy": fuera_hoy,
-        "serie_7d": serie,
-    }
+    return JSONRapido(
+        {
+            "scope": "sede" if sede_target_id else "global",
+            "sede_id": sede_target_id,
+            "total_empleados": total_empleados,
+            "entradas_hoy": entradas_hoy,
+            "salidas_hoy": salidas_hoy,
+            "fuera_geocerca_hoy": fuera_hoy,
+            "serie_7d": serie,
+        },
+        headers=cabeceras,
+    )
 
 
 @router.get("/asistencias")
@@ -338,7 +529,15 @@ def asistencias_recientes(
 
     # Solo registros de empleados (no ADMIN/SUPERADMIN)
     q = (
-        db.query(RegistroAsistencia, Usuario)
+        db.query(
+            RegistroAsistencia.registro_id,
+            RegistroAsistencia.timestamp_registro,
+            _minusculas(RegistroAsistencia.tipo),
+            RegistroAsistencia.dentro_geocerca,
+            RegistroAsistencia.modo,
+            Usuario.documento,
+            RegistroAsistencia.sede_id,
+        )
         .join(Usuario, Usuario.usuario_id == RegistroAsistencia.usuario_id)
         .filter(Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]))
     )
@@ -351,19 +550,275 @@ def asistencias_recientes(
         .all()
     )
 
-    return [
-        {
-            "registro_id": str(r.registro_id),
-            "timestamp_registro": r.timestamp_registro.isoformat() if r.timestamp_registro else None,
-            "tipo": (r.tipo or "").lower(),
-            "dentro_geocerca": bool(r.dentro_geocerca) if r.dentro_geocerca is not None else None,
-            "modo": r.modo,
-            "usuario_codigo": u.documento,
-            "sede_id": str(r.sede_id) if r.sede_id else None,
-        }
-        for (r, u) in rows
-    ]
+    return JSONRapido(como_dicts(_CLAVES_RECIENTES, rows))
+
+
+_CLAVES_RECIENTES = (
+    "registro_id", "timestamp_registro", "tipo", "dentro_geocerca", "modo", "usuario_codigo", "sede_id",
+)
+
+
+
+# ----------------------
+# EVENTOS EN VIVO (SSE)
+# - Una conexión por admin en lugar de sondear /asistencias y /dashboard.
+# - EventSource no permite cabeceras: el token va en ?token=.
+# - Eventos: registro, solicitud y contadores (los del dashboard de hoy +
+#   pendientes), recalculados a partir de una foto inicial + deltas.
+# ----------------------
+
+
+SSE_HEARTBEAT_S = 15
+
+
+def _contadores_hoy(db: Session, sede_target_id: str | None) -> dict:
+    zonas = zonas_sede.de_alcance(sede_target_id)
+    hoy_local = _hoy_alcance(zonas)
+    # tipo es el ENUM tipo_asistencia (valores en minúsculas): se compara directo
+    tipo = RegistroAsistencia.tipo
+    q = db.query(
+        func.count().filter(tipo == "entrada"),
+        func.count().filter(tipo == "salida"),
+        func.count().filter(RegistroAsistencia.dentro_geocerca.is_(False)),
+    ).select_from(RegistroAsistencia)
+    if sede_target_id:
+        q = q.filter(RegistroAsistencia.sede_id == sede_target_id)
+    q = _rango_alcance(
+        q, RegistroAsistencia.timestamp_registro, RegistroAsistencia.sede_id,
+        hoy_local, hoy_local + timedelta(days=1), zonas,
+    )
+    entradas, salidas, fuera = q.one()
+
+    if pendientes.listo():
+        n_pend = pendientes.total(sede_target_id)
+    else:
+        qp = (
+            db.query(func.count())
+            .select_from(SolicitudAsistenciaManual)
+            .join(Usuario, Usuario.usuario_id == SolicitudAsistenciaManual.usuario_id)
+            .filter(SolicitudAsistenciaManual.estado == "PENDIENTE", Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]))
+        )
+        if sede_target_id:
+            qp = qp.filter(SolicitudAsistenciaManual.sede_id == sede_target_id)
+        n_pend = qp.scalar()
+
+    return {
+        "date": hoy_local.isoformat(),
+        "entradas_hoy": entradas,
+        "salidas_hoy": salidas,
+        "fuera_geocerca_hoy": fuera,
+        "pendientes": n_pend,
+    }
+
+
+def _sse_auth(token: str, sede_id: str | None) -> tuple[str | None, dict]:
+    """Valida el token del stream y devuelve (sede objetivo, contadores iniciales).
+
+    Usa una sesión propia y la cierra: el stream no retiene conexiones del pool.
+    """
+    try:
+        payload = decode_token(token)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Token inválido")
+    db = SessionLocal()
+    try:
+        user = db.query(Usuario).filter(Usuario.usuario_id == payload.get("sub")).first()
+        if not user or _role(user) not in {"ADMIN", "SUPERADMIN"}:
+            raise HTTPException(status_code=403, detail="No autorizado")
+        if _role(user) == "ADMIN":
+            if not user.sede_id:
+                raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+            sede_target_id = str(user.sede_id)
+        else:
+            sede_target_id = sede_id
+        return sede_target_id, _contadores_hoy(db, sede_target_id)
+    finally:
+        db.close()
+
+
+def _contadores_hoy_nueva_sesion(sede_target_id: str | None) -> dict:
+    db = SessionLocal()
+    try:
+        return _contadores_hoy(db, sede_target_id)
+    finally:
+        db.close()
+
+
+def _sse(evento: str, datos: dict) -> str:
+    return f"event: {evento}\ndata: {json.dumps(datos, default=str, separators=(',', ':'))}\n\n"
+
+
+@router.get("/eventos")
+async def eventos_stream(
+    request: Request,
+    token: str | None = None,
+    sede_id: str | None = None,
+    authorization: str = Header(default=""),
+):
+    if not token and authorization.startswith("Bearer "):
+        token = authorization.split(" ", 1)[1].strip()
+    if not token:
+        raise HTTPException(status_code=401, detail="Falta token")
+
+    sede_target_id, contadores = await run_in_threadpool(_sse_auth, token, sede_id)
+
+    async def stream():
+        cola = hub.suscribir(sede_target_id)
+        try:
+            yield "retry: 5000\n\n"
+            yield _sse("contadores", contadores)
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    ev = await asyncio.wait_for(cola.get(), timeout=SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                if ev.get("tipo") not in ("registro", "solicitud"):
+                    continue  # eventos internos entre workers (p. ej. `usuario`)
+
+                datos = ev.get("datos") or {}
+                yield _sse(ev["tipo"], {"sede_id": ev.get("sede_id"), **datos})
+
+                if ev["tipo"] == "registro":
+                    if _hoy_alcance(zonas_sede.de_alcance(sede_target_id)).isoformat() != contadores["date"]:
+                        # Cambio de día: nueva foto en lugar de acumular sobre ayer.
+                        contadores.update(await run_in_threadpool(_contadores_hoy_nueva_sesion, sede_target_id))
+                    elif datos.get("local_date") == contadores["date"]:
+                        # (local_date va en la hora de la sede del registro; una
+                        # solicitud aprobada de otro día no cuenta para hoy)
+                        t = (datos.get("tipo") or "").lower()
+                        if t == "entrada":
+                            contadores["entradas_hoy"] += 1
+                        elif t == "salida":
+                            contadores["salidas_hoy"] += 1
+                        if datos.get("dentro_geocerca") is False:
+                            contadores["fuera_geocerca_hoy"] += 1
+                elif ev["tipo"] == "solicitud":
+                    contadores["pendientes"] = (
+                        pendientes.total(sede_target_id)
+                        if pendientes.listo()
+                        else max(0, contadores["pendientes"] + int(datos.get("delta_pendientes") or 0))
+                    )
+                yield _sse("contadores", contadores)
+        finally:
+            hub.desuscribir(sede_target_id, cola)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ----------------------
+# OCUPACIÓN EN VIVO (ADMIN / SUPERADMIN)
+# - Quién está ahora en cada sede: última marcación = entrada (app/utils/presencia.py)
+# - Se responde desde memoria; la tabla `presencia` solo mientras el estado arranca
+# ----------------------
+
+
+def _sede_ocupacion(user: Usuario, sede_id: str | None) -> str | None:
+    if _role(user) == "ADMIN":
+        if not user.sede_id:
+            raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+        if sede_id and str(sede_id) != str(user.sede_id):
+            raise HTTPException(status_code=403, detail="No autorizado")
+        return str(user.sede_id)
+    return sede_id
+
+
+def _presentes_bd(db: Session):
+    return (
+        db.query(Presencia)
+        .filter(Presencia.tipo == "entrada", Presencia.timestamp_registro >= vigencia_presencia())
+    )
+
+
+@router.get("/ocupacion")
+def ocupacion(
+    sede_id: str | None = None,
+    db: Session = Depends(get_read_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    sede_target_id = _sede_ocupacion(user, sede_id)
+
+    if presencia.listo():
+        fuente = "memoria"
+        if sede_target_id:
+            por_sede = {sede_target_id: presencia.ocupacion(sede_target_id)}
+        else:
+            por_sede = presencia.ocupacion_total()
+    else:
+        fuente = "bd"
+        q = _presentes_bd(db).with_entities(Presencia.sede_id, func.count())
+        if sede_target_id:
+            q = q.filter(Presencia.sede_id == sede_target_id)
+        por_sede = {str(s): n for s, n in q.group_by(Presencia.sede_id).all()}
+        if sede_target_id:
+            por_sede.setdefault(sede_target_id, 0)
+
+    items = [{"sede_id": s, "presentes": n} for s, n in sorted(por_sede.items()) if n or s == sede_target_id]
+    return {
+        "scope": "sede" if sede_target_id else "global",
+        "fuente": fuente,
+        "total": sum(i["presentes"] for i in items),
+        "items": items,
+    }
+
+
+@router.get("/ocupacion/{sede_id}/presentes")
+def ocupacion_presentes(
+    sede_id: str,
+    db: Session = Depends(get_read_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    """Lista nominal de presentes (evacuación): código, desde qué hora y si marcó dentro de la geocerca."""
+    try:
+        sede_target_id = str(uuid.UUID(sede_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="sede_id inválido")
+    _sede_ocupacion(user, sede_target_id)
+
+    if presencia.listo():
+        fuente = "memoria"
+        filas = [
+            (uid, m["codigo"], m["ts"], m["dentro_geocerca"], m["empleado"])
+            for uid, m in presencia.presentes(sede_target_id)
+        ]
+    else:
+        fuente = "bd"
+        filas = (
+            _presentes_bd(db)
+            .join(Usuario, Usuario.usuario_id == Presencia.usuario_id)
+            .filter(Presencia.sede_id == sede_target_id)
+            .with_entities(
+                Presencia.usuario_id,
+                Usuario.documento,
+                Presencia.timestamp_registro,
+                Presencia.dentro_geocerca,
+                func.upper(func.coalesce(Usuario.rol, "")).notin_(["ADMIN", "SUPERADMIN"]),
+            )
+            .all()
+        )
 
+    tz = zonas_sede.nombre(sede_target_id)
+    items = sorted(
+        (
+            {
+                "usuario_id": str(uid),
+                "codigo": codigo,
+                "desde": a_local(ts, tz).isoformat(timespec="seconds"),
+                "dentro_geocerca": dentro,
+                "empleado": empleado,
+            }
+            for uid, codigo, ts, dentro, empleado in filas
+        ),
+        key=lambda i: i["codigo"] or "",
+    )
+    return JSONRapido({"sede_id": sede_target_id, "fuente": fuente, "total": len(items), "items": items})
 
 
 @router.get("/asistencias/list")
@@ -375,7 +830,7 @@ def asistencias_listado(
     codigo: str | None = None,
     offset: int = 0,
     limit: int = 200,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
 ):
     """Listado completo de asistencias dentro de un rango (día/semana/mes).
@@ -392,65 +847,53 @@ def asistencias_listado(
     else:
         sede_target_id = sede_id
 
-    range_name, start_date, end_date, start_utc, end_utc = _utc_bounds_for_local_range(range, date)
+    range_name, start_date, end_date = _rango_local(range, date, zonas_sede.de_alcance(sede_target_id))
 
     offset = max(0, int(offset))
     limit = max(1, min(int(limit), 500))
 
-    base_q = (
-        db.query(RegistroAsistencia, Usuario, Sede)
-        .join(Usuario, Usuario.usuario_id == RegistroAsistencia.usuario_id)
-        .join(Sede, Sede.sede_id == RegistroAsistencia.sede_id)
-        .filter(
-            RegistroAsistencia.timestamp_registro >= start_utc,
-            RegistroAsistencia.timestamp_registro < end_utc,
-            Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]),
-        )
-    )
-    if sede_target_id:
-        base_q = base_q.filter(RegistroAsistencia.sede_id == sede_target_id)
+    base_q = _asistencias_rango_query(db, start_date, end_date, sede_target_id)
 
     # Filtro por "documento/código" (por privacidad, se usa el código interno del empleado)
     q_code = (codigo or documento or "").strip()
     if q_code:
-        base_q = base_q.filter(Usuario.documento.ilike(f"%{q_code}%"))
+        base_q = _filtro_codigo(base_q, RegistroAsistencia.usuario_id, q_code)
 
     total = base_q.count()
 
     rows = (
-        base_q.order_by(RegistroAsistencia.timestamp_registro.desc())
+        base_q.with_entities(
+            RegistroAsistencia.registro_id,
+            RegistroAsistencia.timestamp_registro,
+            *_hora_local_cols(RegistroAsistencia.timestamp_registro),
+            _minusculas(RegistroAsistencia.tipo),
+            RegistroAsistencia.dentro_geocerca,
+            RegistroAsistencia.modo,
+            Usuario.documento,
+            RegistroAsistencia.sede_id,
+            Sede.nombre,
+        )
+        .order_by(RegistroAsistencia.timestamp_registro.desc())
         .offset(offset)
         .limit(limit)
         .all()
     )
 
-    items = []
-    for r, u, sd in rows:
-        local_dt = _to_local(r.timestamp_registro) if r.timestamp_registro else None
-        items.append(
-            {
-                "registro_id": str(r.registro_id),
-                "timestamp_registro": r.timestamp_registro.isoformat() if r.timestamp_registro else None,
-                "local_date": local_dt.date().isoformat() if local_dt else None,
-                "local_time": local_dt.strftime("%H:%M:%S") if local_dt else None,
-                "tipo": (r.tipo or "").lower(),
-                "dentro_geocerca": bool(r.dentro_geocerca) if r.dentro_geocerca is not None else None,
-                "modo": r.modo,
-                "usuario_codigo": u.documento,
-                "sede_id": str(r.sede_id) if r.sede_id else None,
-                "sede_nombre": sd.nombre if sd else None,
-            }
-        )
-
-    return {
+    return JSONRapido({
         "range": range_name,
         "from": start_date.isoformat(),
         "to": (end_date - timedelta(days=1)).isoformat(),
         "offset": offset,
         "limit": limit,
         "total": total,
-        "items": items,
-    }
+        "items": como_dicts(_CLAVES_LISTADO, rows),
+    })
+
+
+_CLAVES_LISTADO = (
+    "registro_id", "timestamp_registro", "local_date", "local_time", "tipo", "dentro_geocerca",
+    "modo", "usuario_codigo", "sede_id", "sede_nombre",
+)
 
 
 @router.get("/asistencias/{registro_id}/detalle")
@@ -502,7 +945,7 @@ def asistencia_detalle(
     )
     db.commit()
 
-    local_dt = _to_local(r.timestamp_registro) if r.timestamp_registro else None
+    local_dt = a_local(r.timestamp_registro, sd.zona_horaria)
     return {
         "registro_id": str(r.registro_id),
         "tipo": (r.tipo or "").lower(),
@@ -528,12 +971,24 @@ def asistencia_detalle(
     }
 
 
+def _mes_param(month: str) -> tuple[int, int]:
+    try:
+        y, m = month.split("-", 1)
+        year = int(y)
+        mon = int(m)
+        if mon < 1 or mon > 12:
+            raise ValueError()
+    except Exception:
+        raise HTTPException(status_code=400, detail="month debe ser YYYY-MM")
+    return year, mon
+
+
 @router.get("/asistencias/reporte")
 def reporte_asistencias_empleado(
     documento: str,
     month: str,
     sede_id: str | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
 ):
     """Reporte de asistencias de un empleado por mes.
@@ -544,14 +999,7 @@ def reporte_asistencias_empleado(
     code = (documento or "").strip()
     if not code:
         raise HTTPException(status_code=400, detail="documento es requerido")
-    try:
-        y, m = month.split("-", 1)
-        year = int(y)
-        mon = int(m)
-        if mon < 1 or mon > 12:
-            raise ValueError()
-    except Exception:
-        raise HTTPException(status_code=400, detail="month debe ser YYYY-MM")
+    year, mon = _mes_param(month)
 
     role = _role(user)
     if role == "ADMIN":
@@ -559,41 +1007,28 @@ def reporte_asistencias_empleado(
     else:
         sede_target_id = sede_id
 
-    # rango local del mes
-    tz = _local_tz()
-    start_date = datetime(year, mon, 1, tzinfo=tz).date()
-    if mon == 12:
-        end_date = datetime(year + 1, 1, 1, tzinfo=tz).date()
-    else:
-        end_date = datetime(year, mon + 1, 1, tzinfo=tz).date()
-    start_local = datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0, tzinfo=tz)
-    end_local = datetime(end_date.year, end_date.month, end_date.day, 0, 0, 0, tzinfo=tz)
-    start_utc = start_local.astimezone(timezone.utc).replace(tzinfo=None)
-    end_utc = end_local.astimezone(timezone.utc).replace(tzinfo=None)
+    # rango local del mes (en la hora de cada sede)
+    start_date, end_date = rango_fechas("month", datetime(year, mon, 1).date())
 
-    q = (
-        db.query(RegistroAsistencia, Usuario, Sede)
-        .join(Usuario, Usuario.usuario_id == RegistroAsistencia.usuario_id)
-        .join(Sede, Sede.sede_id == RegistroAsistencia.sede_id)
-        .filter(
-            RegistroAsistencia.timestamp_registro >= start_utc,
-            RegistroAsistencia.timestamp_registro < end_utc,
-            Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]),
-            Usuario.documento == code,
-        )
-    )
-    if sede_target_id:
-        q = q.filter(RegistroAsistencia.sede_id == sede_target_id)
+    # Mes cerrado: del caché de periodos (se invalida si una aprobación tardía cae en el mes)
+    cerrado = periodo_cerrado(end_date, zonas_sede.de_alcance(sede_target_id))
+    clave = ("reporte", sede_target_id, code, start_date)
+    if cerrado:
+        guardado = periodos.obtener(clave)
+        if guardado is not None:
+            return JSONRapido(guardado)
+    generacion = periodos.generacion()
+
+    q = _asistencias_rango_query(db, start_date, end_date, sede_target_id).filter(Usuario.documento == code)
 
-    rows = q.order_by(RegistroAsistencia.timestamp_registro.asc()).all()
+    rows = _con_hora_local(q, RegistroAsistencia.timestamp_registro).order_by(RegistroAsistencia.timestamp_registro.asc()).all()
     items = []
     days_with_any = set()
     entradas = 0
     salidas = 0
-    for r, u, sd in rows:
-        local_dt = _to_local(r.timestamp_registro) if r.timestamp_registro else None
-        if local_dt:
-            days_with_any.add(local_dt.date().isoformat())
+    for r, u, sd, local_date, local_time in rows:
+        if local_date:
+            days_with_any.add(local_date)
         t = (r.tipo or "").lower()
         if t == "entrada":
             entradas += 1
@@ -603,8 +1038,8 @@ def reporte_asistencias_empleado(
             {
                 "registro_id": str(r.registro_id),
                 "timestamp_registro": r.timestamp_registro.isoformat() if r.timestamp_registro else None,
-                "local_date": local_dt.date().isoformat() if local_dt else None,
-                "local_time": local_dt.strftime("%H:%M:%S") if local_dt else None,
+                "local_date": local_date,
+                "local_time": local_time,
                 "tipo": t,
                 "dentro_geocerca": bool(r.dentro_geocerca) if r.dentro_geocerca is not None else None,
                 "modo": r.modo,
@@ -613,7 +1048,7 @@ def reporte_asistencias_empleado(
             }
         )
 
-    return {
+    resultado = {
         "documento": code,
         "month": f"{year:04d}-{mon:02d}",
         "total_registros": len(items),
@@ -622,6 +1057,9 @@ def reporte_asistencias_empleado(
         "salidas": salidas,
         "items": items,
     }
+    if cerrado:
+        periodos.guardar(clave, sede_target_id, start_date, end_date, resultado, generacion)
+    return JSONRapido(resultado)
 
 
 # ----------------------
@@ -653,7 +1091,8 @@ def manual_asistencias_list(
     else:
         sede_target_id = sede_id
 
-    range_name, start_date, end_date, start_utc, end_utc = _utc_bounds_for_local_range(range, date)
+    zonas = zonas_sede.de_alcance(sede_target_id)
+    range_name, start_date, end_date = _rango_local(range, date, zonas)
 
     offset = max(0, int(offset))
     limit = max(1, min(int(limit), 500))
@@ -663,54 +1102,55 @@ def manual_asistencias_list(
         .join(Usuario, Usuario.usuario_id == SolicitudAsistenciaManual.usuario_id)
         .join(Sede, Sede.sede_id == SolicitudAsistenciaManual.sede_id)
         .filter(
-            SolicitudAsistenciaManual.created_at >= start_utc,
-            SolicitudAsistenciaManual.created_at < end_utc,
             SolicitudAsistenciaManual.estado == status,
             Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]),
         )
     )
     if sede_target_id:
         q = q.filter(SolicitudAsistenciaManual.sede_id == sede_target_id)
+    q = _rango_alcance(
+        q, SolicitudAsistenciaManual.created_at, SolicitudAsistenciaManual.sede_id,
+        start_date, end_date, zonas, sede_unida=True,
+    )
 
     code = (documento or "").strip()
     if code:
-        q = q.filter(Usuario.documento.ilike(f"%{code}%"))
+        q = _filtro_codigo(q, SolicitudAsistenciaManual.usuario_id, code)
 
     total = q.count()
     rows = (
-        q.order_by(SolicitudAsistenciaManual.created_at.desc())
+        q.with_entities(
+            SolicitudAsistenciaManual.solicitud_id,
+            SolicitudAsistenciaManual.estado,
+            _minusculas(SolicitudAsistenciaManual.tipo),
+            SolicitudAsistenciaManual.timestamp_evento,
+            *_hora_local_cols(SolicitudAsistenciaManual.timestamp_evento),
+            Usuario.documento,
+            Sede.sede_id,
+            Sede.nombre,
+            SolicitudAsistenciaManual.created_at,
+        )
+        .order_by(SolicitudAsistenciaManual.created_at.desc())
         .offset(offset)
         .limit(limit)
         .all()
     )
 
-    items = []
-    for sol, u, sd in rows:
-        local_dt = _to_local(sol.timestamp_evento) if sol.timestamp_evento else None
-        items.append(
-            {
-                "solicitud_id": str(sol.solicitud_id),
-                "estado": sol.estado,
-                "tipo": (sol.tipo or "").lower(),
-                "timestamp_evento": sol.timestamp_evento.isoformat() if sol.timestamp_evento else None,
-                "local_date": local_dt.date().isoformat() if local_dt else None,
-                "local_time": local_dt.strftime("%H:%M:%S") if local_dt else None,
-                "usuario_codigo": u.documento,
-                "sede_id": str(sd.sede_id),
-                "sede_nombre": sd.nombre,
-                "created_at": sol.created_at.isoformat() if sol.created_at else None,
-            }
-        )
-
-    return {
+    return JSONRapido({
         "range": range_name,
         "from": start_date.isoformat(),
         "to": (end_date - timedelta(days=1)).isoformat(),
         "offset": offset,
         "limit": limit,
         "total": total,
-        "items": items,
-    }
+        "items": como_dicts(_CLAVES_SOLICITUDES, rows),
+    })
+
+
+_CLAVES_SOLICITUDES = (
+    "solicitud_id", "estado", "tipo", "timestamp_evento", "local_date", "local_time",
+    "usuario_codigo", "sede_id", "sede_nombre", "created_at",
+)
 
 
 
@@ -753,7 +1193,22 @@ def manual_asistencias_count(
         q = q.filter(SolicitudAsistenciaManual.sede_id == sede_target_id)
 
     code = (documento or "").strip()
+
+    # Badge de notificaciones: pendientes sin filtro de código salen de memoria.
+    if status == "PENDIENTE" and not code and pendientes.listo():
+        return {"status": status.lower(), "count": pendientes.total(sede_target_id)}
+
     if code:
+        ids = indice_codigos.buscar(code)
+        if ids is not None:
+            # Los ids ya son solo de empleados: el conteo no necesita el join.
+            qc = db.query(func.count()).select_from(SolicitudAsistenciaManual).filter(
+                SolicitudAsistenciaManual.estado == status,
+                SolicitudAsistenciaManual.usuario_id.in_(ids),
+            )
+            if sede_target_id:
+                qc = qc.filter(SolicitudAsistenciaManual.sede_id == sede_target_id)
+            return {"status": status.lower(), "count": qc.scalar()}
         q = q.filter(Usuario.documento.ilike(f"%{code}%"))
 
     return {"status": status.lower(), "count": q.count()}
@@ -799,7 +1254,7 @@ def manual_asistencia_detalle(
     )
     db.commit()
 
-    local_dt = _to_local(sol.timestamp_evento) if sol.timestamp_evento else None
+    local_dt = a_local(sol.timestamp_evento, sd.zona_horaria)
     return {
         "solicitud_id": str(sol.solicitud_id),
         "estado": sol.estado,
@@ -830,6 +1285,12 @@ class ManualDecision(BaseModel):
     comentario: str | None = None
 
 
+class ManualBulkDecision(BaseModel):
+    ids: list[str] = Field(..., min_length=1, max_length=500)
+    decision: str = Field(..., pattern="^(approve|reject)$")
+    comentario: str | None = None
+
+
 @router.post("/manual-asistencias/{solicitud_id}/decide")
 def manual_asistencia_decide(
     solicitud_id: str,
@@ -863,16 +1324,10 @@ def manual_asistencia_decide(
         raise HTTPException(status_code=400, detail="Sede no encontrada")
 
     if decision == "approve":
-        try:
-            dist = distancia_metros(
-                float(sol.latitud), float(sol.longitud),
-                float(sede.latitud), float(sede.longitud)
-            ) if sol.latitud is not None and sol.longitud is not None else None
-        except Exception:
-            dist = None
         dentro = None
-        if dist is not None:
-            dentro = dist <= float(sede.radio_metros)
+        if sol.latitud is not None and sol.longitud is not None:
+            dist = distancia_metros(sol.latitud, sol.longitud, sede.latitud, sede.longitud)
+            dentro = dist <= sede.radio_metros
 
         reg = RegistroAsistencia(
             usuario_id=sol.usuario_id,
@@ -887,6 +1342,8 @@ def manual_asistencia_decide(
             evidence=sol.evidence,
         )
         db.add(reg)
+        db.flush()
+        derivados.actualizar(db, [reg])
         sol.estado = "APROBADA"
         action = "APPROVE"
     else:
@@ -907,77 +1364,228 @@ def manual_asistencia_decide(
             ip=getattr(req.client, "host", None) if req else None,
         )
     )
+    # Las solicitudes de ADMIN/SUPERADMIN no cuentan en el badge.
+    rol_solicitante, codigo = (
+        db.query(Usuario.rol, Usuario.documento).filter(Usuario.usuario_id == sol.usuario_id).one()
+    )
+    empleado = (rol_solicitante or "").upper() not in {"ADMIN", "SUPERADMIN"}
+    db.flush()
+    publicar(db, "solicitud", sol.sede_id, {
+        "solicitud_id": str(sol.solicitud_id),
+        "estado": sol.estado,
+        "usuario_codigo": codigo,
+        "delta_pendientes": -1 if empleado else 0,
+    })
+    if decision == "approve":
+        publicar(db, "registro", reg.sede_id, datos_registro(reg, codigo, empleado, a_local(reg.timestamp_registro, zonas_sede.nombre(reg.sede_id)).date().isoformat()))
     db.commit()
+    if empleado:
+        pendientes.ajustar(sol.sede_id, -1)
 
     return {"ok": True, "estado": sol.estado}
 
 
-# ----------------------
-# ASISTENCIAS - RESÚMENES (ADMIN / SUPERADMIN)
+@router.post("/manual-asistencias/decide")
+def manual_asistencias_decide_bulk(
+    payload: ManualBulkDecision,
+    action_token: str = Header(None, alias="X-Action-Token"),
+    db: Session = Depends(get_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+    req: Request = None,
+):
+    """Aprueba/rechaza varias solicitudes con un solo token MANUAL_REVIEW.
+
+    Mismas reglas que /manual-asistencias/{id}/decide (incluidas las solicitudes de
+    ADMIN/SUPERADMIN, que no cuentan en el badge), pero en una transacción:
+    - bloquea las solicitudes (FOR UPDATE) y evalúa la geocerca en SQL,
+    - un UPDATE para todas las válidas + INSERT en lote de registros y auditoría,
+    - responde un resultado por id (las inválidas no abortan el resto).
+    """
+    if not action_token:
+        raise HTTPException(status_code=401, detail="Se requiere verificación (X-Action-Token)")
+    _require_action_token(user, action_token, "MANUAL_REVIEW")
+
+    decision = (payload.decision or "").lower()
+    comentario = (payload.comentario or "").strip() if payload.comentario else None
+    role = _role(user)
+
+    # Resultados por id normalizado (str(UUID)): el mismo id en mayúsculas y
+    # minúsculas es una sola solicitud. Los ids inválidos, por el texto recibido.
+    resultados: dict[str, dict] = {}
+    pedidos: dict[uuid.UUID, str] = {}
+    claves: dict[str, str] = {}  # texto recibido -> clave en resultados
+    for raw in map(str, payload.ids):
+        try:
+            sid = uuid.UUID(raw)
+        except ValueError:
+            claves[raw] = raw
+            resultados[raw] = {"ok": False, "status": 400, "detail": "Id inválido"}
+            continue
+        pedidos[sid] = claves[raw] = str(sid)
+
+    dist = distancia_metros_sql(
+        SolicitudAsistenciaManual.latitud, SolicitudAsistenciaManual.longitud, Sede.latitud, Sede.longitud
+    )
+    dentro_expr = case(
+        (
+            and_(SolicitudAsistenciaManual.latitud.isnot(None), SolicitudAsistenciaManual.longitud.isnot(None)),
+            dist <= Sede.radio_metros,
+        ),
+        else_=None,
+    )
+    filas = (
+        db.query(SolicitudAsistenciaManual, Usuario.rol, dentro_expr.label("dentro"), Usuario.documento)
+        .join(Usuario, Usuario.usuario_id == SolicitudAsistenciaManual.usuario_id)
+        .join(Sede, Sede.sede_id == SolicitudAsistenciaManual.sede_id)
+        .filter(SolicitudAsistenciaManual.solicitud_id.in_(list(pedidos)))
+        .with_for_update(of=SolicitudAsistenciaManual)
+        .all()
+        if pedidos
+        else []
+    )
+    encontradas = {sol.solicitud_id: (sol, rol, dentro) for sol, rol, dentro, _ in filas}
+    codigos = {sol.solicitud_id: codigo for sol, _, _, codigo in filas}
+
+    validas = []
+    for sid, raw in pedidos.items():
+        fila = encontradas.get(sid)
+        if fila is None:
+            resultados[raw] = {"ok": False, "status": 404, "detail": "Solicitud no encontrada"}
+        elif role == "ADMIN" and str(fila[0].sede_id) != str(user.sede_id):
+            resultados[raw] = {"ok": False, "status": 403, "detail": "No autorizado"}
+        elif (fila[0].estado or "").upper() != "PENDIENTE":
+            resultados[raw] = {"ok": False, "status": 409, "detail": "La solicitud ya fue procesada"}
+        else:
+            validas.append((raw, fila[0], fila[2]))
+    # Las solicitudes de ADMIN/SUPERADMIN no cuentan en el badge.
+    empleados = {
+        sid for sid, (_, rol, _) in encontradas.items() if (rol or "").upper() not in {"ADMIN", "SUPERADMIN"}
+    }
+
+    estado = "APROBADA" if decision == "approve" else "RECHAZADA"
+    action = "APPROVE" if decision == "approve" else "REJECT"
+
+    if validas:
+        ahora = datetime.utcnow()
+        db.execute(
+            update(SolicitudAsistenciaManual)
+            .where(
+                SolicitudAsistenciaManual.solicitud_id.in_([sol.solicitud_id for _, sol, _ in validas]),
+                SolicitudAsistenciaManual.estado == "PENDIENTE",
+            )
+            .values(estado=estado, revisado_por=user.usuario_id, revisado_at=ahora, decision_comentario=comentario)
+            .execution_options(synchronize_session=False)
+        )
+        eventos = [
+            ("solicitud", sol.sede_id, {
+                "solicitud_id": str(sol.solicitud_id),
+                "estado": estado,
+                "usuario_codigo": codigos.get(sol.solicitud_id),
+                "delta_pendientes": -1 if sol.solicitud_id in empleados else 0,
+            })
+            for _, sol, _ in validas
+        ]
+        if decision == "approve":
+            registros = [
+                {
+                    "registro_id": uuid7(),
+                    "usuario_id": sol.usuario_id,
+                    "sede_id": sol.sede_id,
+                    "tipo": (sol.tipo or "").lower(),
+                    "timestamp_registro": sol.timestamp_evento or ahora,
+                    "latitud": sol.latitud,
+                    "longitud": sol.longitud,
+                    "dentro_geocerca": dentro,
+                    "modo": "manual",
+                    "device_info": sol.device_info,
+                    "evidence": sol.evidence,
+                }
+                for _, sol, dentro in validas
+            ]
+            db.execute(insert(RegistroAsistencia), registros)
+            nuevos = [RegistroAsistencia(**fila) for fila in registros]
+            derivados.actualizar(db, nuevos)
+            for (_, sol, _), reg in zip(validas, nuevos):
+                local_date = a_local(reg.timestamp_registro, zonas_sede.nombre(reg.sede_id)).date().isoformat()
+                empleado = sol.solicitud_id in empleados
+                eventos.append(
+                    ("registro", reg.sede_id, datos_registro(reg, codigos.get(sol.solicitud_id), empleado, local_date))
+                )
+        publicar_muchos(db, eventos)
+        ip = getattr(req.client, "host", None) if req else None
+        db.execute(
+            insert(AuditLog),
+            [
+                {
+                    "actor_usuario_id": user.usuario_id,
+                    "entidad": "solicitud_asistencia_manual",
+                    "entidad_id": sol.solicitud_id,
+                    "accion": f"MANUAL_{action}",
+                    "detalle": {"comentario": comentario, "bulk": True},
+                    "ip": ip,
+                }
+                for _, sol, _ in validas
+            ],
+        )
+        for raw, _, _ in validas:
+            resultados[raw] = {"ok": True, "status": 200, "estado": estado}
+    db.commit()
+    for _, sol, _ in validas:
+        if sol.solicitud_id in empleados:
+            pendientes.ajustar(sol.sede_id, -1)
+
+    items = [{"solicitud_id": raw, **resultados[claves[raw]]} for raw in claves]
+    return {
+        "decision": decision,
+        "procesadas": len(validas),
+        "fallidas": sum(1 for r in resultados.values() if not r["ok"]),
+        "items": items,
+    }
+
+
+# ----------------------
+# ASISTENCIAS - RESÚMENES (ADMIN / SUPERADMIN)
 # - Día / Semana / Mes
 # - Totales: asistidos / tarde / faltas
-# - Faltantes: empleados sin ENTRADA en la fecha seleccionada
+# - Faltantes: empleados con turno y sin ENTRADA en la fecha seleccionada
 #
-# Nota (MVP): "tarde" se calcula con una regla por defecto (08:10)
-# hasta que exista configuración de horarios por sede.
+# "tarde" y "faltas" se evalúan en SQL contra los turnos esperados de cada
+# empleado (app/utils/turnos.py): sin turno ese día (fin de semana, feriado)
+# no hay falta ni tardanza, y un turno solo es falta cuando su límite de
+# tardanza ya pasó (hoy antes de la hora de entrada, días futuros: no).
 # ----------------------
 
 
-LATE_CUTOFF_HOUR = 8
-LATE_CUTOFF_MINUTE = 10
+def _fecha_param(valor: str, nombre: str):
+    try:
+        return datetime.fromisoformat(valor).date()
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"{nombre} debe ser YYYY-MM-DD")
 
 
-def _to_local(dt_value: datetime) -> datetime:
-    """Convierte un datetime a hora local (America/Guayaquil).
+def _rango_local(range_name: str, date_str: str | None, zonas: tuple[str, ...], largos: bool = False):
+    """(range_name, inicio, fin exclusivo) en fechas locales; sin `date`, hoy.
 
-    Soporta valores naive (assumidos en UTC) y aware (se convierte según tzinfo).
+    `largos`: acepta además quarter|year (solo endpoints servidos desde agregados).
     """
+    base_date = _fecha_param(date_str, "date") if date_str else _hoy_alcance(zonas)
 
-    tz = _local_tz()
-    if dt_value is None:
-        return None
-
-    if dt_value.tzinfo is None:
-        dt_value = dt_value.replace(tzinfo=timezone.utc)
-    else:
-        dt_value = dt_value.astimezone(timezone.utc)
-
-    return dt_value.astimezone(tz)
+    range_name = (range_name or "week").lower()
+    permitidos = RANGOS + RANGOS_LARGOS if largos else RANGOS
+    if range_name not in permitidos:
+        raise HTTPException(status_code=400, detail="range debe ser " + "|".join(permitidos))
 
+    start_date, end_date = rango_fechas(range_name, base_date)
+    return range_name, start_date, end_date
 
-def _utc_bounds_for_local_range(range_name: str, date_str: str | None):
-    tz = _local_tz()
-    base_date = datetime.now(tz).date()
-    if date_str:
-        try:
-            base_date = datetime.fromisoformat(date_str).date()
-        except Exception:
-            raise HTTPException(status_code=400, detail="date debe ser YYYY-MM-DD")
 
-    range_name = (range_name or "week").lower()
-    if range_name not in {"day", "week", "month"}:
-        raise HTTPException(status_code=400, detail="range debe ser day|week|month")
-
-    if range_name == "day":
-        start_date = base_date
-        end_date = base_date + timedelta(days=1)
-    elif range_name == "week":
-        # Lunes a domingo
-        start_date = base_date - timedelta(days=base_date.weekday())
-        end_date = start_date + timedelta(days=7)
-    else:
-        start_date = base_date.replace(day=1)
-        # primer día del siguiente mes
-        if start_date.month == 12:
-            end_date = start_date.replace(year=start_date.year + 1, month=1)
-        else:
-            end_date = start_date.replace(month=start_date.month + 1)
-
-    start_local = datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0, tzinfo=tz)
-    end_local = datetime(end_date.year, end_date.month, end_date.day, 0, 0, 0, tzinfo=tz)
-    start_utc = start_local.astimezone(timezone.utc).replace(tzinfo=None)
-    end_utc = end_local.astimezone(timezone.utc).replace(tzinfo=None)
-    return range_name, start_date, end_date, start_utc, end_utc
+def _rango_libre(desde: str, hasta: str):
+    """("custom", desde, hasta + 1 día): rango libre con ambos extremos incluidos."""
+    start_date = _fecha_param(desde, "desde")
+    end_date = _fecha_param(hasta, "hasta") + timedelta(days=1)
+    if end_date <= start_date:
+        raise HTTPException(status_code=400, detail="hasta debe ser igual o posterior a desde")
+    return "custom", start_date, end_date
 
 
 def _employees_query(db: Session, sede_target_id: str | None):
@@ -987,98 +1595,258 @@ def _employees_query(db: Session, sede_target_id: str | None):
     return q
 
 
-@router.get("/asistencias/resumen")
-def asistencias_resumen(
-    range: str = "week",
-    date: str | None = None,
-    sede_id: str | None = None,
-    db: Session = Depends(get_db),
-    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
-):
-    role = _role(user)
-    # ADMIN: solo su sede
-    if role == "ADMIN":
-        if not user.sede_id:
-            raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
-        sede_target_id = str(user.sede_id)
-    else:
-        sede_target_id = sede_id
+def _primeras_entradas(db: Session, start_date, end_date, zonas: tuple[str, ...], sede_target_id: str | None):
+    """Subconsulta (usuario_id, fecha, primera): primera ENTRADA por empleado y fecha local de la sede."""
+    local = local_sql(RegistroAsistencia.timestamp_registro, Sede.zona_horaria)
+    fecha = fecha_local_sql(RegistroAsistencia.timestamp_registro, Sede.zona_horaria)
+    q = (
+        db.query(
+            RegistroAsistencia.usuario_id.label("usuario_id"),
+            fecha.label("fecha"),
+            func.min(local).label("primera"),
+        )
+        .join(Sede, Sede.sede_id == RegistroAsistencia.sede_id)
+        .filter(RegistroAsistencia.tipo == "entrada")
+    )
+    if sede_target_id:
+        q = q.filter(RegistroAsistencia.sede_id == sede_target_id)
+    q = _rango_alcance(
+        q, RegistroAsistencia.timestamp_registro, RegistroAsistencia.sede_id,
+        start_date, end_date, zonas, sede_unida=True,
+    )
+    return q.group_by(RegistroAsistencia.usuario_id, fecha).subquery()
 
-    range_name, start_date, end_date, start_utc, end_utc = _utc_bounds_for_local_range(range, date)
 
-    empleados = _employees_query(db, sede_target_id).all()
-    empleados_ids = {str(e.usuario_id) for e in empleados}
+def _falta(primeras, esperado, ahora_utc):
+    """Turno esperado sin ENTRADA cuyo límite de tardanza ya pasó (hoy, antes de la entrada, no es falta)."""
+    return and_(primeras.c.primera.is_(None), esperado.c.limite_utc < ahora_utc)
 
-    # Registros de ENTRADA en el rango (solo no-admin)
-    q = (
-        db.query(RegistroAsistencia, Usuario)
-        .join(Usuario, Usuario.usuario_id == RegistroAsistencia.usuario_id)
-        .filter(
-            RegistroAsistencia.timestamp_registro >= start_utc,
-            RegistroAsistencia.timestamp_registro < end_utc,
-            (RegistroAsistencia.tipo == "entrada"),
-            Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]),
+
+_CLAVES_RESUMEN_SEDES = ("sede_id", "nombre", "empleados", "asistidos", "tarde", "faltas")
+
+
+def _resumen_por_sede(db: Session, start_date, end_date, zonas: tuple[str, ...], sede_target_id: str | None):
+    """Asistidos / tarde / faltas de cada sede en el rango, en una sola consulta.
+
+    Mismas reglas que el resumen global: primera ENTRADA por (empleado, fecha local
+    de la sede donde marcó); el empleado cuenta en su sede asignada, y tarde/faltas
+    contra sus turnos esperados.
+    """
+    primeras = _primeras_entradas(db, start_date, end_date, zonas, sede_target_id)
+    esperado = turnos.esperados(start_date, end_date)
+    cruce = and_(primeras.c.usuario_id == esperado.c.usuario_id, primeras.c.fecha == esperado.c.fecha)
+
+    no_admin = Usuario.rol.notin_(["ADMIN", "SUPERADMIN"])
+    empleados = (
+        db.query(Usuario.sede_id.label("sede_id"), func.count().label("n"))
+        .filter(no_admin)
+        .group_by(Usuario.sede_id)
+        .subquery()
+    )
+    asistencia = (
+        db.query(Usuario.sede_id.label("sede_id"), func.count().label("asistidos"))
+        .join(primeras, primeras.c.usuario_id == Usuario.usuario_id)
+        .filter(no_admin)
+        .group_by(Usuario.sede_id)
+        .subquery()
+    )
+    por_turno = (
+        db.query(
+            esperado.c.sede_id.label("sede_id"),
+            func.count().filter(primeras.c.primera > esperado.c.limite_tarde).label("tarde"),
+            func.count().filter(_falta(primeras, esperado, datetime.utcnow())).label("faltas"),
         )
+        .select_from(esperado)
+        .outerjoin(primeras, cruce)
+        .group_by(esperado.c.sede_id)
+        .subquery()
+    )
+
+    filas = (
+        db.query(
+            Sede.sede_id,
+            Sede.nombre,
+            func.coalesce(empleados.c.n, 0),
+            func.coalesce(asistencia.c.asistidos, 0),
+            func.coalesce(por_turno.c.tarde, 0),
+            func.coalesce(por_turno.c.faltas, 0),
+        )
+        .outerjoin(empleados, empleados.c.sede_id == Sede.sede_id)
+        .outerjoin(asistencia, asistencia.c.sede_id == Sede.sede_id)
+        .outerjoin(por_turno, por_turno.c.sede_id == Sede.sede_id)
     )
     if sede_target_id:
-        q = q.filter(RegistroAsistencia.sede_id == sede_target_id)
+        filas = filas.filter(Sede.sede_id == sede_target_id)
+    return como_dicts(_CLAVES_RESUMEN_SEDES, filas.order_by(Sede.nombre).all())
 
-    rows = q.all()
 
-    # first entrada por (date, usuario)
-    first_entry = {}  # (iso_date, user_id) -> local_dt
-    for r, u in rows:
-        if not r.timestamp_registro:
-            continue
-        u_id = str(u.usuario_id)
-        if u_id not in empleados_ids:
-            continue
-        local_dt = _to_local(r.timestamp_registro)
-        iso_date = local_dt.date().isoformat()
-        key = (iso_date, u_id)
-        prev = first_entry.get(key)
-        if prev is None or local_dt < prev:
-            first_entry[key] = local_dt
+def _resumen_largo(db: Session, range_name: str, start_date, end_date, sede_target_id: str | None, desglose: bool) -> dict:
+    """Resumen de un trimestre, año o rango libre desde el agregado por día/semana/mes.
 
-    cutoff = datetime(2000, 1, 1, LATE_CUTOFF_HOUR, LATE_CUTOFF_MINUTE).time()
+    Serie en el grano que deje como mucho resumenes.MAX_PUNTOS cubetas; sin detalle
+    nominal (para un día concreto, `asistencias/faltantes`). `asistidos` cuenta por
+    sede de la marcación.
+    """
+    grano = resumenes.elegir_grano(start_date, end_date)
+    if grano is None:
+        raise HTTPException(status_code=400, detail=f"Rango demasiado largo (máximo {resumenes.MAX_PUNTOS} meses)")
 
-    serie = []
-    totals_asistidos = 0
-    totals_tarde = 0
-    totals_faltas = 0
+    # El refresco escribe: va al primario en su propia sesión; la lectura sigue en `db`.
+    franjas.refrescar_aparte(sede_target_id, start_date, end_date)
+
+    base = {
+        "range": range_name,
+        "from": start_date.isoformat(),
+        "to": (end_date - timedelta(days=1)).isoformat(),
+    }
+
+    def _fila(t: dict) -> dict:
+        return {
+            "asistidos": t["asistidos"],
+            "tarde": t["tarde"],
+            "esperados": t["esperados"],
+            "faltas": t["faltas"],
+            "entradas": t["entradas"],
+            "salidas": t["salidas"],
+            "fuera_geocerca": t["fuera_geocerca"],
+            "jornadas": t["jornadas"],
+            "horas": jornadas.horas(t["segundos"]),
+        }
+
+    if desglose:
+        n_empleados = dict(
+            db.query(Usuario.sede_id, func.count())
+            .filter(Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]))
+            .group_by(Usuario.sede_id)
+            .all()
+        )
+        q = db.query(Sede.sede_id, Sede.nombre)
+        if sede_target_id:
+            q = q.filter(Sede.sede_id == sede_target_id)
+        totales = resumenes.por_sede(db, sede_target_id, start_date, end_date)
+        vacio = dict.fromkeys(resumenes.CAMPOS + ("esperados", "faltas"), 0)
+        sedes = []
+        for s_id, nombre in q.order_by(Sede.nombre).all():
+            n = n_empleados.get(s_id, 0)
+            sedes.append(
+                {
+                    "sede_id": str(s_id),
+                    "nombre": nombre,
+                    "empleados": n,
+                    **_fila(totales.get(str(s_id), vacio)),
+                }
+            )
+        return {
+            **base,
+            "scope": "por_sede",
+            "totales": {
+                k: round(sum(f[k] for f in sedes), 2) for k in ("empleados", "asistidos", "tarde", "faltas", "horas")
+            },
+            "sedes": sedes,
+        }
+
+    n = _employees_query(db, sede_target_id).count()
+    serie = resumenes.serie(db, sede_target_id, start_date, end_date, grano)
+    suma = {c: sum(p[c] for p in serie) for c in resumenes.CAMPOS + ("esperados", "faltas")}
+    return {
+        **base,
+        "scope": "sede" if sede_target_id else "global",
+        "sede_id": sede_target_id,
+        "empleados": n,
+        "grano": grano,
+        "totales": _fila(suma),
+        "serie": [
+            {"date": p["desde"], "hasta": p["hasta"], "dias": p["dias"], **_fila(p)}
+            for p in serie
+        ],
+    }
+
+
+def _resumen(
+    db: Session,
+    range_name: str,
+    start_date,
+    end_date,
+    date: str | None,
+    zonas: tuple[str, ...],
+    sede_target_id: str | None,
+    desglose: bool,
+) -> dict:
+    """Cuerpo de `asistencias/resumen` (sin caché)."""
+    # Trimestre, año o rango libre: desde resumen_periodo, no desde las marcaciones
+    if range_name not in RANGOS:
+        return _resumen_largo(db, range_name, start_date, end_date, sede_target_id, desglose)
+
+    # desglose=true: totales por sede (SUPERADMIN: todas) en un solo round trip, sin detalle nominal
+    if desglose:
+        sedes = _resumen_por_sede(db, start_date, end_date, zonas, sede_target_id)
+        return {
+            "range": range_name,
+            "from": start_date.isoformat(),
+            "to": (end_date - timedelta(days=1)).isoformat(),
+            "scope": "por_sede",
+            "totales": {k: sum(f[k] for f in sedes) for k in ("empleados", "asistidos", "tarde", "faltas")},
+            "sedes": sedes,
+        }
 
+    n_empleados = _employees_query(db, sede_target_id).count()
+    # Para el panel, usamos la fecha seleccionada para detalle (por defecto: hoy)
+    hoy_local = _hoy_alcance(zonas)
+    detail_date = hoy_local if not date else datetime.fromisoformat(date).date()
+
+    # Primera ENTRADA por (fecha local, usuario), agrupada en SQL con la zona de
+    # cada sede, cruzada con los turnos esperados del rango.
+    primeras = _primeras_entradas(db, start_date, end_date, zonas, sede_target_id)
+    esperado = turnos.esperados(start_date, end_date)
+    cruce = and_(primeras.c.usuario_id == esperado.c.usuario_id, primeras.c.fecha == esperado.c.fecha)
+    es_tarde = primeras.c.primera > esperado.c.limite_tarde
+    es_falta = _falta(primeras, esperado, datetime.utcnow())
+
+    # Asistidos: empleados (de la sede) con ENTRADA, tuvieran turno o no
+    q = (
+        db.query(primeras.c.fecha, func.count())
+        .join(Usuario, Usuario.usuario_id == primeras.c.usuario_id)
+        .filter(Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]))
+    )
+    if sede_target_id:
+        q = q.filter(Usuario.sede_id == sede_target_id)
+    asistidos = dict(q.group_by(primeras.c.fecha).all())
+
+    q = (
+        db.query(esperado.c.fecha, func.count(), func.count().filter(es_tarde), func.count().filter(es_falta))
+        .select_from(esperado)
+        .outerjoin(primeras, cruce)
+    )
+    if sede_target_id:
+        q = q.filter(esperado.c.sede_id == sede_target_id)
+    por_turno = {f: (n, t, fa) for f, n, t, fa in q.group_by(esperado.c.fecha).all()}
+
+    serie = []
     d = start_date
     while d < end_date:
-        iso = d.isoformat()
-        present = 0
-        late = 0
-        for e in empleados:
-            k = (iso, str(e.usuario_id))
-            dt_local = first_entry.get(k)
-            if dt_local is not None:
-                present += 1
-                if dt_local.time() > cutoff:
-                    late += 1
-        faltas = max(0, len(empleados) - present)
-        serie.append({"date": iso, "asistidos": present, "tarde": late, "faltas": faltas})
-        totals_asistidos += present
-        totals_tarde += late
-        totals_faltas += faltas
+        esperados, tarde, faltas = por_turno.get(d, (0, 0, 0))
+        serie.append(
+            {"date": d.isoformat(), "asistidos": asistidos.get(d, 0), "tarde": tarde, "esperados": esperados, "faltas": faltas}
+        )
         d = d + timedelta(days=1)
 
-    # Para el panel, usamos la fecha seleccionada para detalle (por defecto: hoy)
-    detail_date = (datetime.now(_local_tz()).date() if not date else datetime.fromisoformat(date).date()).isoformat()
-
+    # Detalle nominal del día: faltantes y tardanzas, ya filtrados en SQL
+    q = (
+        db.query(Usuario.usuario_id, Usuario.documento, Usuario.sede_id, primeras.c.primera)
+        .select_from(esperado)
+        .join(Usuario, Usuario.usuario_id == esperado.c.usuario_id)
+        .outerjoin(primeras, cruce)
+        .filter(esperado.c.fecha == detail_date, or_(es_falta, es_tarde))
+    )
+    if sede_target_id:
+        q = q.filter(esperado.c.sede_id == sede_target_id)
     faltantes = []
     tarde_list = []
-    for e in empleados:
-        k = (detail_date, str(e.usuario_id))
-        dt_local = first_entry.get(k)
-        if dt_local is None:
-            faltantes.append({"usuario_id": str(e.usuario_id), "codigo": e.documento, "sede_id": str(e.sede_id) if e.sede_id else None})
+    for u_id, codigo, u_sede, primera in q.order_by(Usuario.documento).all():
+        if primera is None:
+            faltantes.append({"usuario_id": str(u_id), "codigo": codigo, "sede_id": str(u_sede) if u_sede else None})
         else:
-            if dt_local.time() > cutoff:
-                tarde_list.append({"usuario_id": str(e.usuario_id), "codigo": e.documento, "hora": dt_local.time().strftime("%H:%M")})
+            tarde_list.append({"usuario_id": str(u_id), "codigo": codigo, "hora": primera.time().strftime("%H:%M")})
 
     return {
         "range": range_name,
@@ -1086,18 +1854,13 @@ def asistencias_resumen(
         "to": (end_date - timedelta(days=1)).isoformat(),
         "scope": "sede" if sede_target_id else "global",
         "sede_id": sede_target_id,
-        "rule_late_after": f"{LATE_CUTOFF_HOUR:02d}:{LATE_CUTOFF_MINUTE:02d}",
-        "empleados": len(empleados),
-        "totales": {
-            "asistidos": totals_asistidos,
-            "tarde": totals_tarde,
-            "faltas": totals_faltas,
-        },
+        "empleados": n_empleados,
+        "totales": {k: sum(p[k] for p in serie) for k in ("asistidos", "tarde", "esperados", "faltas")},
         "serie": serie,
         "detalle": {
-            "date": detail_date,
-            "empleados": len(empleados),
-            "asistidos": max(0, len(empleados) - len(faltantes)),
+            "date": detail_date.isoformat(),
+            "empleados": n_empleados,
+            "asistidos": asistidos.get(detail_date, 0),
             "tarde_count": len(tarde_list),
             "faltas_count": len(faltantes),
             "faltantes": faltantes,
@@ -1106,11 +1869,149 @@ def asistencias_resumen(
     }
 
 
+@router.get("/asistencias/resumen")
+def asistencias_resumen(
+    range: str = "week",
+    date: str | None = None,
+    sede_id: str | None = None,
+    desglose: bool = False,
+    desde: str | None = None,
+    hasta: str | None = None,
+    db: Session = Depends(get_read_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    role = _role(user)
+    # ADMIN: solo su sede
+    if role == "ADMIN":
+        if not user.sede_id:
+            raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+        sede_target_id = str(user.sede_id)
+    else:
+        sede_target_id = sede_id
+
+    zonas = zonas_sede.de_alcance(sede_target_id)
+    if desde or hasta:
+        if not (desde and hasta):
+            raise HTTPException(status_code=400, detail="desde y hasta van juntos")
+        range_name, start_date, end_date = _rango_libre(desde, hasta)
+    else:
+        range_name, start_date, end_date = _rango_local(range, date, zonas, largos=True)
+
+    # Periodo cerrado: del caché de periodos (se invalida si una aprobación tardía cae dentro)
+    cerrado = periodo_cerrado(end_date, zonas)
+    clave = ("resumen", sede_target_id, range_name, start_date, end_date, desglose, date)
+    if cerrado:
+        guardado = periodos.obtener(clave)
+        if guardado is not None:
+            return JSONRapido(guardado)
+    generacion = periodos.generacion()
+
+    resultado = _resumen(db, range_name, start_date, end_date, date, zonas, sede_target_id, desglose)
+    if cerrado:
+        periodos.guardar(clave, sede_target_id, start_date, end_date, resultado, generacion)
+    return JSONRapido(resultado)
+
+
+# Calendario: empleados × días de un mes desde el índice de llegadas en memoria
+# (app/utils/llegadas.py); la base solo se consulta para la lista de empleados y sus turnos.
+@router.get("/asistencias/calendario")
+def asistencias_calendario(
+    month: str | None = None,
+    sede_id: str | None = None,
+    db: Session = Depends(get_read_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    """Hora de la primera entrada de cada empleado de la sede en cada día del mes."""
+    role = _role(user)
+    if role == "ADMIN":
+        if not user.sede_id:
+            raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+        sede_target_id = str(user.sede_id)
+    else:
+        if not sede_id:
+            raise HTTPException(status_code=400, detail="sede_id es requerido")
+        sede_target_id = sede_id
+
+    tz = zonas_sede.nombre(sede_target_id)
+    if month:
+        year, mon = _mes_param(month)
+    else:
+        hoy_local = hoy(tz)
+        year, mon = hoy_local.year, hoy_local.month
+
+    no_admin = Usuario.rol.notin_(["ADMIN", "SUPERADMIN"])
+    asignados = (
+        db.query(Usuario.usuario_id, Usuario.documento)
+        .filter(Usuario.sede_id == sede_target_id, no_admin)
+        .order_by(Usuario.documento)
+        .all()
+    )
+    empleados = [(str(uid), codigo, True) for uid, codigo in asignados]
+    # Visitantes: marcaron entrada en la sede ese mes sin estar asignados a ella
+    vistos = {uid for uid, _, _ in empleados}
+    visitantes = [uid for uid in llegadas.usuarios_del_mes(sede_target_id, year, mon) if uid not in vistos]
+    if visitantes:
+        filas = (
+            db.query(Usuario.usuario_id, Usuario.documento)
+            .filter(Usuario.usuario_id.in_(visitantes), no_admin)
+            .order_by(Usuario.documento)
+            .all()
+        )
+        empleados += [(str(uid), codigo, False) for uid, codigo in filas]
+
+    # Límite de tardanza de cada (empleado, día) con turno, de geo_turnos_esperados:
+    # minutos desde las 00:00 de la fecha (un turno cerca de la medianoche pasa de
+    # 1440) y si ya venció (solo entonces la ausencia es falta).
+    uids = [uid for uid, _, _ in empleados]
+    desde_mes, hasta_mes = rango_fechas("month", datetime(year, mon, 1).date())
+    esperado = turnos.esperados(desde_mes, hasta_mes)
+    limites = {}
+    if uids:
+        q = db.query(esperado.c.usuario_id, esperado.c.fecha, esperado.c.limite_tarde, esperado.c.limite_utc).filter(
+            esperado.c.usuario_id.in_(uids)
+        )
+        ahora = datetime.utcnow()
+        for uid, fecha, limite, limite_utc in q.all():
+            minutos = int((limite - datetime.combine(fecha, datetime.min.time())).total_seconds() // 60)
+            limites[(str(uid), fecha)] = (minutos, limite_utc < ahora)
+    matriz = llegadas.matriz(sede_target_id, year, mon, uids, limites)
+
+    def _hhmm(minuto):
+        return None if minuto is None else f"{minuto // 60:02d}:{minuto % 60:02d}"
+
+    items = []
+    for uid, codigo, asignado in empleados:
+        fila = matriz["filas"][uid]
+        con_turno = [(x, *limites[(uid, d)]) for x, d in zip(fila, matriz["dias"]) if (uid, d) in limites]
+        items.append(
+            {
+                "usuario_id": uid,
+                "codigo": codigo,
+                "asignado": asignado,
+                "asistidos": sum(1 for x in fila if x is not None),
+                "tarde": sum(1 for x, limite, _ in con_turno if x is not None and x > limite),
+                "faltas": sum(1 for x, _, vencido in con_turno if x is None and vencido),
+                "llegadas": [_hhmm(x) for x in fila],
+                "turnos": [(uid, d) in limites for d in matriz["dias"]],
+            }
+        )
+
+    return JSONRapido(
+        {
+            "sede_id": sede_target_id,
+            "month": f"{year:04d}-{mon:02d}",
+            "dias": [d.isoformat() for d in matriz["dias"]],
+            "totales": matriz["totales"],
+            "empleados": items,
+        }
+    )
+
+
 @router.get("/asistencias/faltantes")
 def asistencias_faltantes(
     date: str | None = None,
     sede_id: str | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
 ):
     role = _role(user)
@@ -1119,29 +2020,30 @@ def asistencias_faltantes(
     else:
         sede_target_id = sede_id
 
-    tz = _local_tz()
-    d = datetime.now(tz).date()
+    zonas = zonas_sede.de_alcance(sede_target_id)
+    d = _hoy_alcance(zonas)
     if date:
         try:
             d = datetime.fromisoformat(date).date()
         except Exception:
             raise HTTPException(status_code=400, detail="date debe ser YYYY-MM-DD")
 
-    start_local = datetime(d.year, d.month, d.day, 0, 0, 0, tzinfo=tz)
-    end_local = start_local + timedelta(days=1)
-    start_utc = start_local.astimezone(timezone.utc).replace(tzinfo=None)
-    end_utc = end_local.astimezone(timezone.utc).replace(tzinfo=None)
-
-    empleados = _employees_query(db, sede_target_id).all()
+    # Solo empleados con turno ese día (sin feriado) cuyo límite de tardanza ya pasó
+    esperado = turnos.esperados(d, d + timedelta(days=1))
+    empleados = db.query(Usuario).join(esperado, esperado.c.usuario_id == Usuario.usuario_id).filter(
+        esperado.c.limite_utc < datetime.utcnow()
+    )
+    if sede_target_id:
+        empleados = empleados.filter(esperado.c.sede_id == sede_target_id)
+    empleados = empleados.all()
     empleados_ids = {str(e.usuario_id) for e in empleados}
 
-    q = db.query(RegistroAsistencia.usuario_id).filter(
-        RegistroAsistencia.timestamp_registro >= start_utc,
-        RegistroAsistencia.timestamp_registro < end_utc,
-        (RegistroAsistencia.tipo == "entrada"),
-    )
+    q = db.query(RegistroAsistencia.usuario_id).filter(RegistroAsistencia.tipo == "entrada")
     if sede_target_id:
         q = q.filter(RegistroAsistencia.sede_id == sede_target_id)
+    q = _rango_alcance(
+        q, RegistroAsistencia.timestamp_registro, RegistroAsistencia.sede_id, d, d + timedelta(days=1), zonas
+    )
 
     present_ids = {str(x[0]) for x in q.distinct().all()}
     faltantes = [
@@ -1152,6 +2054,150 @@ def asistencias_faltantes(
     return {"date": d.isoformat(), "count": len(faltantes), "items": faltantes}
 
 
+# ----------------------
+# JORNADAS / HOJA DE HORAS (ADMIN / SUPERADMIN)
+# - Turnos entrada→salida ya emparejados en la tabla `jornada` (app/utils/jornadas.py)
+# - Solo suman horas las jornadas CERRADAS; el resto queda como pendiente de revisión
+# ----------------------
+
+
+@router.get("/jornadas")
+def jornadas_empleado(
+    usuario_id: str,
+    range: str = "week",
+    date: str | None = None,
+    db: Session = Depends(get_read_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    try:
+        uid = uuid.UUID(usuario_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="usuario_id inválido")
+    sede_empleado = db.query(Usuario.sede_id).filter(Usuario.usuario_id == uid).first()
+    if sede_empleado is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    # ADMIN: solo empleados de su sede
+    if _role(user) == "ADMIN" and str(sede_empleado[0]) != str(user.sede_id):
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    range_name, start_date, end_date = _rango_local(range, date, zonas_sede.de_alcance(sede_empleado[0]))
+    return JSONRapido({"range": range_name, **jornadas.hoja(db, uid, start_date, end_date)})
+
+
+@router.get("/jornadas/resumen")
+def jornadas_resumen(
+    range: str = "month",
+    date: str | None = None,
+    sede_id: str | None = None,
+    db: Session = Depends(get_read_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    """Horas por empleado en el rango (nómina): un GROUP BY sobre `jornada`."""
+    role = _role(user)
+    if role == "ADMIN":
+        if not user.sede_id:
+            raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+        sede_target_id = str(user.sede_id)
+    else:
+        sede_target_id = sede_id
+
+    range_name, start_date, end_date = _rango_local(range, date, zonas_sede.de_alcance(sede_target_id))
+
+    cerrada = Jornada.estado == jornadas.CERRADA
+    q = (
+        db.query(
+            Jornada.usuario_id,
+            Usuario.documento,
+            func.coalesce(func.sum(Jornada.segundos).filter(cerrada), 0),
+            func.count().filter(cerrada),
+            func.count(Jornada.fecha.distinct()).filter(cerrada),
+            func.count().filter(~cerrada),
+        )
+        .join(Usuario, Usuario.usuario_id == Jornada.usuario_id)
+        .filter(
+            Jornada.fecha >= start_date,
+            Jornada.fecha < end_date,
+            Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]),
+        )
+    )
+    if sede_target_id:
+        q = q.filter(Jornada.sede_id == sede_target_id)
+    rows = q.group_by(Jornada.usuario_id, Usuario.documento).order_by(Usuario.documento).all()
+
+    # ABIERTA/INCOMPLETA/SIN_ENTRADA cuentan como pendientes (hoy incluye el turno en curso).
+    items = [
+        {
+            "usuario_id": str(usuario_id),
+            "codigo": codigo,
+            "segundos": segundos,
+            "horas": jornadas.horas(segundos),
+            "jornadas": cerradas,
+            "dias": dias,
+            "pendientes": pendientes_revision,
+        }
+        for usuario_id, codigo, segundos, cerradas, dias, pendientes_revision in rows
+    ]
+    total = sum(i["segundos"] for i in items)
+    return JSONRapido(
+        {
+            "range": range_name,
+            "from": start_date.isoformat(),
+            "to": (end_date - timedelta(days=1)).isoformat(),
+            "scope": "sede" if sede_target_id else "global",
+            "sede_id": sede_target_id,
+            "total_segundos": total,
+            "total_horas": jornadas.horas(total),
+            "items": items,
+        }
+    )
+
+
+# ----------------------
+# ANALÍTICA DE LLEGADAS Y OCUPACIÓN (ADMIN / SUPERADMIN)
+# - Desde el agregado por franjas de 15 min (app/utils/franjas.py), no desde las filas
+# - Solo se recalculan antes los días con marcaciones nuevas
+# ----------------------
+
+
+@router.get("/analitica/franjas")
+def analitica_franjas(
+    range: str = "month",
+    date: str | None = None,
+    sede_id: str | None = None,
+    intervalo: int = 60,
+    db: Session = Depends(get_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    """Llegadas/salidas por intervalo, percentiles de primera entrada y permanencia, ocupación media y pico."""
+    if not franjas.intervalo_valido(intervalo):
+        raise HTTPException(status_code=400, detail=f"intervalo debe ser múltiplo de {franjas.GRANO} y dividir el día")
+
+    role = _role(user)
+    if role == "ADMIN":
+        if not user.sede_id:
+            raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+        sede_target_id = str(user.sede_id)
+    else:
+        sede_target_id = sede_id
+
+    range_name, start_date, end_date = _rango_local(range, date, zonas_sede.de_alcance(sede_target_id), largos=True)
+
+    # Primario (get_db): el refresco escribe el agregado de los días pendientes.
+    if franjas.refrescar(db, sede_target_id, start_date, end_date):
+        db.commit()
+
+    return JSONRapido(
+        {
+            "range": range_name,
+            "from": start_date.isoformat(),
+            "to": (end_date - timedelta(days=1)).isoformat(),
+            "scope": "sede" if sede_target_id else "global",
+            "sede_id": sede_target_id,
+            **franjas.analitica(db, sede_target_id, start_date, end_date, intervalo),
+        }
+    )
+
+
 # ----------------------
 # DASHBOARD (ADMIN / SUPERADMIN)
 # ----------------------
@@ -1161,21 +2207,25 @@ def asistencias_faltantes(
 
 @router.get("/sedes")
 def list_sedes(
+    request: Request,
     db: Session = Depends(get_db),
     _: Usuario = Depends(require_roles("SUPERADMIN")),
 ):
-    sedes = db.query(Sede).order_by(Sede.created_at.desc()).all()
-    return [
-        {
-            "sede_id": str(s.sede_id),
-            "nombre": s.nombre,
-            "latitud": s.latitud,
-            "longitud": s.longitud,
-            "radio_metros": s.radio_metros,
-            "direccion": s.direccion,
-        }
-        for s in sedes
-    ]
+    cabeceras, no_modificado = condicional(request, db, [("sede", None)])
+    if no_modificado:
+        return no_modificado
+
+    rows = (
+        db.query(
+            Sede.sede_id, Sede.nombre, Sede.latitud, Sede.longitud, Sede.radio_metros, Sede.direccion, Sede.zona_horaria,
+        )
+        .order_by(Sede.created_at.desc())
+        .all()
+    )
+    return JSONRapido(como_dicts(_CLAVES_SEDES, rows), headers=cabeceras)
+
+
+_CLAVES_SEDES = ("sede_id", "nombre", "latitud", "longitud", "radio_metros", "direccion", "zona_horaria")
 
 
 @router.post("/sedes")
@@ -1185,6 +2235,9 @@ def create_sede(
     user: Usuario = Depends(require_roles("SUPERADMIN")),
     req: Request = None,
 ):
+    if payload.zona_horaria and not zona_valida(payload.zona_horaria):
+        raise HTTPException(status_code=400, detail="zona_horaria inválida (usar nombre IANA, p. ej. America/Guayaquil)")
+
     sede = Sede(
         sede_id=uuid.uuid4(),
         nombre=payload.nombre,
@@ -1192,10 +2245,13 @@ def create_sede(
         longitud=payload.longitud,
         radio_metros=payload.radio_metros,
         direccion=payload.direccion,
+        zona_horaria=payload.zona_horaria or "America/Guayaquil",
     )
     db.add(sede)
+    publicar(db, "sede", sede.sede_id, {"sede_id": str(sede.sede_id)})
     db.commit()
     db.refresh(sede)
+    zonas_sede.invalidar()
 
     db.add(
         AuditLog(
@@ -1230,12 +2286,19 @@ def update_sede(
         "longitud": sede.longitud,
         "radio_metros": sede.radio_metros,
         "direccion": sede.direccion,
+        "zona_horaria": sede.zona_horaria,
     }
 
-    for k, v in payload.model_dump(exclude_unset=True).items():
+    updates = payload.model_dump(exclude_unset=True)
+    if "zona_horaria" in updates and not (updates["zona_horaria"] and zona_valida(updates["zona_horaria"])):
+        raise HTTPException(status_code=400, detail="zona_horaria inválida (usar nombre IANA, p. ej. America/Guayaquil)")
+
+    for k, v in updates.items():
         setattr(sede, k, v)
 
+    publicar(db, "sede", sede.sede_id, {"sede_id": str(sede.sede_id)})
     db.commit()
+    zonas_sede.invalidar()
 
     db.add(
         AuditLog(
@@ -1252,6 +2315,244 @@ def update_sede(
     return {"ok": True}
 
 
+# ----------------------
+# TURNOS Y FERIADOS (ADMIN / SUPERADMIN)
+# - Horario esperado por día de la semana: empleado > sede > global (app/utils/turnos.py)
+# - ADMIN: turnos de su sede y de sus empleados, y feriados de su sede; lo global, solo SUPERADMIN
+# - Un cambio que cae en el pasado deja pendiente el recálculo de esos días
+#   del resumen por periodo y, con el evento `turno`, invalida los periodos cerrados
+# ----------------------
+
+
+def _uuid_param(valor: str, nombre: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(str(valor))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{nombre} inválido")
+
+
+def _alcance_turno(db: Session, user: Usuario, sede_id, usuario_id) -> tuple[uuid.UUID | None, uuid.UUID | None]:
+    """(sede, sede afectada) de un turno o feriado, validando permisos.
+
+    La sede afectada es None (todas) para lo global y para los turnos de un
+    empleado: su tardanza cuenta también en las sedes que visita.
+    """
+    role = _role(user)
+    if usuario_id:
+        if sede_id:
+            raise HTTPException(status_code=400, detail="usuario_id o sede_id, no ambos")
+        fila = (
+            db.query(Usuario.sede_id, Usuario.rol)
+            .filter(Usuario.usuario_id == _uuid_param(usuario_id, "usuario_id"))
+            .first()
+        )
+        if fila is None or (fila[1] or "").upper() in ("ADMIN", "SUPERADMIN"):
+            raise HTTPException(status_code=404, detail="Empleado no encontrado")
+        if role == "ADMIN" and str(fila[0]) != str(user.sede_id):
+            raise HTTPException(status_code=403, detail="No autorizado")
+        return None, None
+    if sede_id:
+        sede = _uuid_param(sede_id, "sede_id")
+        if role == "ADMIN" and str(sede) != str(user.sede_id):
+            raise HTTPException(status_code=403, detail="No autorizado")
+        if db.query(Sede.sede_id).filter(Sede.sede_id == sede).first() is None:
+            raise HTTPException(status_code=404, detail="Sede no encontrada")
+        return sede, sede
+    if role != "SUPERADMIN":
+        raise HTTPException(status_code=403, detail="Solo SUPERADMIN define turnos y feriados globales")
+    return None, None
+
+
+def _cambio_turnos(db: Session, afectada, desde, hasta) -> None:
+    """Recalcular [desde, hasta] del resumen por periodo e invalidar periodos cerrados (sin commit)."""
+    turnos.marcar_recalculo(db, afectada, desde, hasta)
+    publicar(db, "turno", afectada, {"sede_id": str(afectada) if afectada else None})
+
+
+_CLAVES_TURNO = (
+    "turno_id", "sede_id", "usuario_id", "dia_semana", "hora_entrada", "tolerancia_min",
+    "hora_salida", "vigente_desde", "vigente_hasta",
+)
+
+
+@router.get("/turnos")
+def list_turnos(
+    sede_id: str | None = None,
+    db: Session = Depends(get_read_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    """Turnos globales, de la sede y de sus empleados (SUPERADMIN sin sede: todos)."""
+    if _role(user) == "ADMIN":
+        if not user.sede_id:
+            raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+        sede_id = str(user.sede_id)
+
+    q = db.query(*(getattr(Turno, c) for c in _CLAVES_TURNO))
+    if sede_id:
+        sede = _uuid_param(sede_id, "sede_id")
+        empleados = db.query(Usuario.usuario_id).filter(Usuario.sede_id == sede)
+        q = q.filter(
+            or_(
+                Turno.sede_id == sede,
+                Turno.usuario_id.in_(empleados),
+                and_(Turno.sede_id.is_(None), Turno.usuario_id.is_(None)),
+            )
+        )
+    filas = q.order_by(Turno.usuario_id.nullsfirst(), Turno.sede_id.nullsfirst(), Turno.dia_semana).all()
+    return JSONRapido(como_dicts(_CLAVES_TURNO, filas))
+
+
+@router.post("/turnos")
+def create_turno(
+    payload: TurnoCreate,
+    db: Session = Depends(get_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+    req: Request = None,
+):
+    sede, afectada = _alcance_turno(db, user, payload.sede_id, payload.usuario_id)
+    if payload.vigente_desde and payload.vigente_hasta and payload.vigente_hasta < payload.vigente_desde:
+        raise HTTPException(status_code=400, detail="vigente_hasta debe ser igual o posterior a vigente_desde")
+
+    turno = Turno(
+        turno_id=uuid7(),
+        sede_id=sede,
+        usuario_id=_uuid_param(payload.usuario_id, "usuario_id") if payload.usuario_id else None,
+        dia_semana=payload.dia_semana,
+        hora_entrada=payload.hora_entrada,
+        tolerancia_min=payload.tolerancia_min,
+        hora_salida=payload.hora_salida,
+        vigente_desde=payload.vigente_desde,
+        vigente_hasta=payload.vigente_hasta,
+    )
+    db.add(turno)
+    _cambio_turnos(db, afectada, payload.vigente_desde, payload.vigente_hasta)
+    db.add(
+        AuditLog(
+            actor_usuario_id=user.usuario_id,
+            entidad="turno",
+            entidad_id=turno.turno_id,
+            accion="CREATE",
+            detalle=payload.model_dump(mode="json"),
+            ip=getattr(req.client, "host", None) if req else None,
+        )
+    )
+    db.commit()
+    return {"turno_id": str(turno.turno_id)}
+
+
+@router.delete("/turnos/{turno_id}")
+def delete_turno(
+    turno_id: str,
+    db: Session = Depends(get_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+    req: Request = None,
+):
+    turno = db.query(Turno).filter(Turno.turno_id == _uuid_param(turno_id, "turno_id")).first()
+    if not turno:
+        raise HTTPException(status_code=404, detail="Turno no encontrado")
+    _, afectada = _alcance_turno(db, user, turno.sede_id, turno.usuario_id)
+
+    detalle = {
+        "sede_id": str(turno.sede_id) if turno.sede_id else None,
+        "usuario_id": str(turno.usuario_id) if turno.usuario_id else None,
+        "dia_semana": turno.dia_semana,
+        "hora_entrada": turno.hora_entrada.isoformat(),
+        "tolerancia_min": turno.tolerancia_min,
+    }
+    db.delete(turno)
+    _cambio_turnos(db, afectada, turno.vigente_desde, turno.vigente_hasta)
+    db.add(
+        AuditLog(
+            actor_usuario_id=user.usuario_id,
+            entidad="turno",
+            entidad_id=turno.turno_id,
+            accion="DELETE",
+            detalle=detalle,
+            ip=getattr(req.client, "host", None) if req else None,
+        )
+    )
+    db.commit()
+    return {"ok": True}
+
+
+_CLAVES_FERIADO = ("feriado_id", "fecha", "sede_id", "nombre")
+
+
+@router.get("/feriados")
+def list_feriados(
+    year: int | None = None,
+    sede_id: str | None = None,
+    db: Session = Depends(get_read_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    """Feriados del año (por defecto, el actual): globales y de la sede (SUPERADMIN sin sede: todos)."""
+    if _role(user) == "ADMIN":
+        if not user.sede_id:
+            raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+        sede_id = str(user.sede_id)
+    desde, hasta = rango_fechas("year", datetime(year, 1, 1).date() if year else hoy(zonas_sede.nombre(sede_id)))
+
+    q = db.query(Feriado.feriado_id, Feriado.fecha, Feriado.sede_id, Feriado.nombre).filter(
+        Feriado.fecha >= desde, Feriado.fecha < hasta
+    )
+    if sede_id:
+        q = q.filter(or_(Feriado.sede_id == _uuid_param(sede_id, "sede_id"), Feriado.sede_id.is_(None)))
+    return JSONRapido(como_dicts(_CLAVES_FERIADO, q.order_by(Feriado.fecha).all()))
+
+
+@router.post("/feriados")
+def create_feriado(
+    payload: FeriadoCreate,
+    db: Session = Depends(get_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+    req: Request = None,
+):
+    sede, afectada = _alcance_turno(db, user, payload.sede_id, None)
+    feriado = Feriado(feriado_id=uuid7(), fecha=payload.fecha, sede_id=sede, nombre=payload.nombre)
+    db.add(feriado)
+    _cambio_turnos(db, afectada, payload.fecha, payload.fecha)
+    db.add(
+        AuditLog(
+            actor_usuario_id=user.usuario_id,
+            entidad="feriado",
+            entidad_id=feriado.feriado_id,
+            accion="CREATE",
+            detalle=payload.model_dump(mode="json"),
+            ip=getattr(req.client, "host", None) if req else None,
+        )
+    )
+    db.commit()
+    return {"feriado_id": str(feriado.feriado_id)}
+
+
+@router.delete("/feriados/{feriado_id}")
+def delete_feriado(
+    feriado_id: str,
+    db: Session = Depends(get_db),
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+    req: Request = None,
+):
+    feriado = db.query(Feriado).filter(Feriado.feriado_id == _uuid_param(feriado_id, "feriado_id")).first()
+    if not feriado:
+        raise HTTPException(status_code=404, detail="Feriado no encontrado")
+    _, afectada = _alcance_turno(db, user, feriado.sede_id, None)
+
+    db.delete(feriado)
+    _cambio_turnos(db, afectada, feriado.fecha, feriado.fecha)
+    db.add(
+        AuditLog(
+            actor_usuario_id=user.usuario_id,
+            entidad="feriado",
+            entidad_id=feriado.feriado_id,
+            accion="DELETE",
+            detalle={"fecha": feriado.fecha.isoformat(), "nombre": feriado.nombre},
+            ip=getattr(req.client, "host", None) if req else None,
+        )
+    )
+    db.commit()
+    return {"ok": True}
+
+
 # ----------------------
 # USUARIOS (ADMIN / SUPERADMIN)
 # - Por defecto: respuesta sin PII (email/telefono/nombre)
@@ -1261,33 +2562,46 @@ def update_sede(
 
 @router.get("/usuarios")
 def list_usuarios(
+    request: Request,
     db: Session = Depends(get_db),
     user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
 ):
     # Regla de visibilidad:
     # - SUPERADMIN: puede ver todos los usuarios (sin PII en este listado)
     # - ADMIN: SOLO puede ver EMPLEADOS de SU sede (nunca ADMIN/SUPERADMIN)
-    q = db.query(Usuario)
-    if _role(user) == "ADMIN":
-        if not user.sede_id:
-            raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+    role = _role(user)
+    if role == "ADMIN" and not user.sede_id:
+        raise HTTPException(status_code=400, detail="Usuario sin sede asignada")
+    alcance = user.sede_id if role == "ADMIN" else None
+    cabeceras, no_modificado = condicional(request, db, [("usuario", alcance)], role, alcance)
+    if no_modificado:
+        return no_modificado
+
+    q = db.query(
+        Usuario.usuario_id,
+        Usuario.documento,
+        func.upper(func.coalesce(Usuario.rol, "")),
+        Usuario.sede_id,
+        Usuario.email,
+    )
+    if role == "ADMIN":
         q = q.filter(
             Usuario.sede_id == user.sede_id,
             Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]),
         )
 
-    usuarios = q.order_by(Usuario.created_at.desc()).all()
-    return [
+    rows = q.order_by(Usuario.created_at.desc()).all()
+    return JSONRapido([
         {
-            "usuario_id": str(u.usuario_id),
-            "codigo": u.documento,
-            "rol": _role(u),
-            "sede_id": str(u.sede_id) if u.sede_id else None,
+            "usuario_id": usuario_id,
+            "codigo": codigo,
+            "rol": rol,
+            "sede_id": sede_id,
             # por privacidad: solo máscara
-            "email_mask": _mask_email(u.email),
+            "email_mask": _mask_email(email),
         }
-        for u in usuarios
-    ]
+        for usuario_id, codigo, rol, sede_id, email in rows
+    ], headers=cabeceras)
 
 
 
@@ -1343,8 +2657,10 @@ def create_usuario(
         consentimiento_geolocalizacion=True,
     )
     db.add(u)
+    publicar(db, "usuario", sede.sede_id, {"usuario_id": str(u.usuario_id)})
     db.commit()
     db.refresh(u)
+    indice_codigos.invalidar()
 
     db.add(
         AuditLog(
@@ -1365,6 +2681,199 @@ def create_usuario(
     return {"usuario_id": str(u.usuario_id)}
 
 
+# ----------------------
+# IMPORTACIÓN MASIVA DE USUARIOS
+# - JSON (lista o {"usuarios": [...]}) o CSV (Content-Type: text/csv) con
+#   columnas: nombre_real, email, password, rol, telefono, sede_id, documento.
+# - Mismas reglas que POST /usuarios; las filas inválidas se reportan y no
+#   impiden crear las demás. ?dry_run=true solo valida.
+# ----------------------
+
+
+IMPORT_MAX_FILAS = 5000
+IMPORT_LOTE = 500
+
+
+def _leer_filas_import(body: bytes, content_type: str) -> list[dict]:
+    texto = body.decode("utf-8-sig")
+    if "csv" in (content_type or "").lower():
+        lector = csv.DictReader(io.StringIO(texto))
+        return [{k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in fila.items() if k} for fila in lector]
+    try:
+        data = json.loads(texto or "null")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="JSON inválido")
+    if isinstance(data, dict):
+        data = data.get("usuarios")
+    if not isinstance(data, list) or not all(isinstance(x, dict) for x in data):
+        raise HTTPException(status_code=400, detail="Se espera una lista de usuarios")
+    return data
+
+
+def _gen_codigos(tag: str, n: int, usados: set[str]) -> list[str]:
+    """N códigos EMP-TAG-XXXX libres contra `usados` (se actualiza), sin consultar la BD."""
+    codigos = []
+    while len(codigos) < n:
+        # 4 hex (65.536 combinaciones) mientras haya holgura; si no, 6 hex.
+        largo = 4 if len(usados) < 30_000 else 6
+        code = f"EMP-{tag}-{uuid.uuid4().hex[:largo].upper()}"
+        if code not in usados:
+            usados.add(code)
+            codigos.append(code)
+    return codigos
+
+
+@router.post("/usuarios/import")
+async def import_usuarios(
+    request: Request,
+    sede_id: str | None = None,
+    dry_run: bool = False,
+    user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
+):
+    filas = _leer_filas_import(await request.body(), request.headers.get("content-type", ""))
+    if not filas:
+        raise HTTPException(status_code=400, detail="No hay filas para importar")
+    if len(filas) > IMPORT_MAX_FILAS:
+        raise HTTPException(status_code=413, detail=f"Máximo {IMPORT_MAX_FILAS} filas por importación")
+
+    ip = getattr(request.client, "host", None)
+    # La parte pesada (BD + Argon2) no debe bloquear el event loop.
+    return await run_in_threadpool(_importar_usuarios, filas, sede_id, dry_run, user.usuario_id, ip)
+
+
+def _importar_usuarios(filas: list[dict], sede_default: str | None, dry_run: bool, actor_id, ip: str | None) -> dict:
+    db = SessionLocal()
+    db.info["usuario_id"] = str(actor_id)
+    try:
+        actor = db.query(Usuario).filter(Usuario.usuario_id == actor_id).one()
+        role_actor = _role(actor)
+
+        errores: list[dict] = []
+        validas: list[tuple[int, UsuarioCreate, str, str]] = []  # (fila, datos, rol, sede_id)
+        for i, raw in enumerate(filas, start=1):
+            try:
+                datos = UsuarioCreate(**{k: v for k, v in raw.items() if v not in ("", None)})
+            except ValidationError as e:
+                errores.append({
+                    "fila": i,
+                    "email": raw.get("email"),
+                    "errores": [f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors()],
+                })
+                continue
+            rol = (datos.rol or "").upper()
+            if role_actor == "ADMIN":
+                if rol != "EMPLEADO":
+                    errores.append({"fila": i, "email": datos.email, "errores": ["Un ADMIN solo puede crear EMPLEADOS"]})
+                    continue
+                sede_fila = str(actor.sede_id) if actor.sede_id else None
+            else:
+                sede_fila = datos.sede_id or sede_default
+            if not sede_fila:
+                errores.append({"fila": i, "email": datos.email, "errores": ["sede_id es requerido"]})
+                continue
+            validas.append((i, datos, rol, sede_fila))
+
+        # Sedes y emails existentes: una consulta cada uno.
+        sedes = {}
+        ids_sede = set()
+        for _, _, _, sid in validas:
+            try:
+                ids_sede.add(uuid.UUID(sid))
+            except ValueError:
+                pass
+        if ids_sede:
+            sedes = {str(sd.sede_id): sd for sd in db.query(Sede).filter(Sede.sede_id.in_(ids_sede)).all()}
+        emails = [d.email for _, d, _, _ in validas]
+        existentes = {e for (e,) in db.query(Usuario.email).filter(Usuario.email.in_(emails)).all()} if emails else set()
+
+        vistos: set[str] = set()
+        aceptadas = []
+        for i, datos, rol, sid in validas:
+            sede = sedes.get(sid)
+            if sede is None:
+                errores.append({"fila": i, "email": datos.email, "errores": ["Sede no encontrada"]})
+            elif datos.email in existentes:
+                errores.append({"fila": i, "email": datos.email, "errores": ["Email ya existe"]})
+            elif datos.email in vistos:
+                errores.append({"fila": i, "email": datos.email, "errores": ["Email repetido en el archivo"]})
+            else:
+                vistos.add(datos.email)
+                aceptadas.append((i, datos, rol, sede))
+
+        # Códigos EMP-TAG-XXXX: se precargan los usados de cada etiqueta y se
+        # generan todos en memoria (antes: hasta 20 SELECT por usuario).
+        por_tag: dict[str, list[int]] = {}
+        for idx, (_, _, rol, sede) in enumerate(aceptadas):
+            if rol == "EMPLEADO":
+                por_tag.setdefault(_sede_tag(sede), []).append(idx)
+        codigos: dict[int, str] = {}
+        for tag, idxs in por_tag.items():
+            usados = {c for (c,) in db.query(Usuario.documento).filter(Usuario.documento.like(f"EMP-{tag}-%")).all()}
+            for idx, code in zip(idxs, _gen_codigos(tag, len(idxs), usados)):
+                codigos[idx] = code
+        for idx, (_, datos, rol, _) in enumerate(aceptadas):
+            if idx not in codigos:
+                pref = "ADM" if rol == "ADMIN" else "SUP" if rol == "SUPERADMIN" else "USR"
+                codigos[idx] = datos.documento or f"{pref}-{uuid.uuid4().hex[:6].upper()}"
+
+        errores.sort(key=lambda e: e["fila"])
+        resumen = {"total": len(filas), "validas": len(aceptadas), "errores": errores, "dry_run": dry_run}
+        if dry_run or not aceptadas:
+            return {**resumen, "creados": 0, "usuarios": []}
+
+        hashes = hash_passwords([datos.password for _, datos, _, _ in aceptadas])
+        ahora = datetime.utcnow()
+        usuarios = []
+        auditoria = []
+        for idx, ((_, datos, rol, sede), pw_hash) in enumerate(zip(aceptadas, hashes)):
+            uid = uuid.uuid4()
+            usuarios.append({
+                "usuario_id": uid,
+                "documento": codigos[idx],
+                "nombre_real": datos.nombre_real,
+                "email": datos.email,
+                "telefono": datos.telefono,
+                "password_hash": pw_hash,
+                "sede_id": sede.sede_id,
+                "rol": rol,
+                "consentimiento_geolocalizacion": True,
+                "created_at": ahora,
+                "updated_at": ahora,
+            })
+            auditoria.append({
+                "actor_usuario_id": actor.usuario_id,
+                "entidad": "usuario",
+                "entidad_id": uid,
+                "accion": "CREATE",
+                "detalle": {"codigo": codigos[idx], "rol": rol, "sede_id": str(sede.sede_id), "import": True},
+                "ip": ip,
+            })
+
+        try:
+            for n in range(0, len(usuarios), IMPORT_LOTE):
+                db.execute(insert(Usuario), usuarios[n:n + IMPORT_LOTE])
+            for n in range(0, len(auditoria), IMPORT_LOTE):
+                db.execute(insert(AuditLog), auditoria[n:n + IMPORT_LOTE])
+            publicar(db, "usuario", sede_default, {"creados": len(usuarios)})
+            db.commit()
+        except IntegrityError:
+            # Alta concurrente con el mismo email: no se crea nada, reintentar.
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Conflicto al insertar (email duplicado); reintenta la importación")
+        indice_codigos.invalidar()
+
+        return {
+            **resumen,
+            "creados": len(usuarios),
+            "usuarios": [
+                {"fila": fila, "usuario_id": str(u["usuario_id"]), "codigo": u["documento"], "email": u["email"]}
+                for (fila, _, _, _), u in zip(aceptadas, usuarios)
+            ],
+        }
+    finally:
+        db.close()
+
+
 @router.put("/usuarios/{usuario_id}")
 def update_usuario(
     usuario_id: str,
@@ -1415,7 +2924,9 @@ def update_usuario(
         else:
             setattr(target, k, v)
 
+    publicar(db, "usuario", target.sede_id, {"usuario_id": str(target.usuario_id)})
     db.commit()
+    indice_codigos.invalidar()
 
     db.add(
         AuditLog(
@@ -1539,7 +3050,7 @@ def get_pii_usuario(usuario_id: str, request: Request, db: Session = Depends(get
 
 @router.get("/audit")
 def list_audit(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: Usuario = Depends(require_roles("ADMIN", "SUPERADMIN")),
     limit: int = 100,
 ):
@@ -1,5 +1,5 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
 from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
@@ -8,10 +8,15 @@ from app.models.sede import Sede
 from app.models.registro_asistencia import RegistroAsistencia
 from app.models.solicitud_asistencia_manual import SolicitudAsistenciaManual
 from app.utils.geo import distancia_metros
+from app.utils import derivados, jornadas
+from app.utils.marcas_agua import condicional
+from app.utils.eventos import datos_registro, publicar
+from app.utils.pendientes import pendientes
+from app.utils.respuestas import JSONRapido
+from app.utils.tiempo import RANGOS, a_local, a_utc_naive, hoy, limites_utc, rango_fechas, zonas_sede
 from app.schemas.asistencia_schema import RegistroAsistenciaRequest
 from app.security.jwt import decode_token
 from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo
 
 router = APIRouter()
 
@@ -36,37 +41,10 @@ def _get_current_user_id(authorization: str) -> str:
     return sub
 
 
-def _local_tz():
-    return ZoneInfo("America/Guayaquil")
-
-
-def _to_utc_naive(dt: datetime) -> datetime:
-    """Normaliza un datetime a UTC *naive* (sin tzinfo).
-
-    El frontend normalmente envía fechas sin offset (naive). En ese caso,
-    asumimos hora local (America/Guayaquil) y convertimos a UTC.
-    """
-
-    if dt is None:
-        return None
-
-    tz = _local_tz()
-    if dt.tzinfo is None:
-        # Interpretar como hora local del sistema (Ecuador)
-        dt = dt.replace(tzinfo=tz)
-    # Convertir a UTC y quitar tzinfo para almacenar como "timestamp without time zone"
-    return dt.astimezone(timezone.utc).replace(tzinfo=None)
-
-
-def _utc_bounds_for_local_day(days_ago: int = 0):
-    tz = _local_tz()
-    now_local = datetime.now(tz)
-    d = (now_local.date() - timedelta(days=days_ago))
-    start_local = datetime(d.year, d.month, d.day, 0, 0, 0, tzinfo=tz)
-    end_local = start_local + timedelta(days=1)
-    start_utc = start_local.astimezone(timezone.utc).replace(tzinfo=None)
-    end_utc = end_local.astimezone(timezone.utc).replace(tzinfo=None)
-    return start_utc, end_utc
+def _utc_bounds_for_local_day(tz_nombre: str, days_ago: int = 0):
+    # Límites cacheados por (zona, fecha) en app/utils/tiempo.py
+    d = hoy(tz_nombre) - timedelta(days=days_ago)
+    return limites_utc(tz_nombre, d, d + timedelta(days=1))
 
 @router.post("/registro")
 def registrar_asistencia(
@@ -95,8 +73,9 @@ def registrar_asistencia(
         if (payload.tipo or "").lower() not in {"entrada", "salida"}:
             raise HTTPException(status_code=400, detail="En modo manual, tipo debe ser entrada o salida")
         # Permitir que el empleado indique el momento del evento.
-        # Guardamos SIEMPRE en UTC (naive) para evitar desfases (-5h) al renderizar.
-        ts_evento = _to_utc_naive(payload.timestamp_registro) if payload.timestamp_registro else datetime.now(timezone.utc).replace(tzinfo=None)
+        # Guardamos SIEMPRE en UTC (naive) para evitar desfases al renderizar;
+        # una fecha sin offset se interpreta en la hora local de su sede.
+        ts_evento = a_utc_naive(payload.timestamp_registro, sede.zona_horaria) if payload.timestamp_registro else datetime.now(timezone.utc).replace(tzinfo=None)
         detalle = (payload.detalle or payload.evidence or "").strip()
         if len(detalle) < 15:
             raise HTTPException(status_code=400, detail="Detalle requerido (mínimo 15 caracteres)")
@@ -114,7 +93,17 @@ def registrar_asistencia(
             estado="PENDIENTE",
         )
         db.add(sol)
+        db.flush()
+        empleado = (usuario.rol or "").upper() not in {"ADMIN", "SUPERADMIN"}
+        publicar(db, "solicitud", sede.sede_id, {
+            "solicitud_id": str(sol.solicitud_id),
+            "estado": "PENDIENTE",
+            "usuario_codigo": usuario.documento,
+            "delta_pendientes": 1 if empleado else 0,
+        })
         db.commit()
+        if empleado:
+            pendientes.ajustar(sede.sede_id, +1)
         return {
             "ok": True,
             "status": "PENDIENTE",
@@ -127,11 +116,8 @@ def registrar_asistencia(
     if payload.latitud is None or payload.longitud is None:
         raise HTTPException(status_code=422, detail="Latitud/longitud son obligatorias para marcación con geolocalización")
 
-    dist = distancia_metros(
-        float(payload.latitud), float(payload.longitud),
-        float(sede.latitud), float(sede.longitud)
-    )
-    dentro = dist <= float(sede.radio_metros)
+    dist = distancia_metros(payload.latitud, payload.longitud, sede.latitud, sede.longitud)
+    dentro = dist <= sede.radio_metros
 
     # ---
     # ---
@@ -159,6 +145,11 @@ def registrar_asistencia(
     )
 
     db.add(registro)
+    db.flush()
+    derivados.actualizar(db, [registro])
+    local_date = a_local(registro.timestamp_registro, sede.zona_horaria).date().isoformat()
+    empleado = (usuario.rol or "").upper() not in {"ADMIN", "SUPERADMIN"}
+    publicar(db, "registro", sede.sede_id, datos_registro(registro, usuario.documento, empleado, local_date))
     db.commit()
 
     return {"ok": True, "dentro_geocerca": dentro}
@@ -166,6 +157,7 @@ def registrar_asistencia(
 
 @router.get("/mis-registros")
 def mis_registros(
+    request: Request,
     usuario_id: str,
     limit: int = 10,
     db: Session = Depends(get_db),
@@ -178,6 +170,10 @@ def mis_registros(
     if current_user_id != str(usuario_id):
         raise HTTPException(status_code=403, detail="Usuario no autorizado")
 
+    cabeceras, no_modificado = condicional(request, db, [("registro_usuario", usuario_id)])
+    if no_modificado:
+        return no_modificado
+
     limit = max(1, min(int(limit), 50))
     regs = (
         db.query(RegistroAsistencia)
@@ -187,27 +183,65 @@ def mis_registros(
         .all()
     )
 
-    return [
-        {
-            "registro_id": str(r.registro_id),
-            "tipo": r.tipo,
-            "timestamp_registro": r.timestamp_registro.isoformat(),
-            "dentro_geocerca": bool(r.dentro_geocerca),
-            "modo": r.modo,
-        }
-        for r in regs
-    ]
+    return JSONRapido(
+        [
+            {
+                "registro_id": str(r.registro_id),
+                "tipo": r.tipo,
+                "timestamp_registro": r.timestamp_registro.isoformat(),
+                "dentro_geocerca": bool(r.dentro_geocerca),
+                "modo": r.modo,
+            }
+            for r in regs
+        ],
+        headers=cabeceras,
+    )
+
+
+@router.get("/mis-jornadas")
+def mis_jornadas(
+    range: str = "week",
+    date: str | None = None,
+    db: Session = Depends(get_db),
+    authorization: str = Header(default=""),
+):
+    """Hoja de horas del empleado autenticado (jornadas entrada→salida por día local)."""
+    current_user_id = _get_current_user_id(authorization)
+
+    sede_id = db.query(Usuario.sede_id).filter(Usuario.usuario_id == current_user_id).scalar()
+    base = hoy(zonas_sede.nombre(sede_id))
+    if date:
+        try:
+            base = datetime.fromisoformat(date).date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="date debe ser YYYY-MM-DD")
+    range_name = (range or "week").lower()
+    if range_name not in RANGOS:
+        raise HTTPException(status_code=400, detail="range debe ser day|week|month")
+
+    desde, hasta = rango_fechas(range_name, base)
+    return JSONRapido({"range": range_name, **jornadas.hoja(db, current_user_id, desde, hasta)})
 
 
 @router.get("/dashboard")
 def dashboard_empleado(
+    request: Request,
     db: Session = Depends(get_db),
     authorization: str = Header(default=""),
 ):
     """Resumen del empleado autenticado (para dashboard web)."""
     current_user_id = _get_current_user_id(authorization)
 
-    start_utc, end_utc = _utc_bounds_for_local_day(0)
+    sede_id = db.query(Usuario.sede_id).filter(Usuario.usuario_id == current_user_id).scalar()
+    tz_nombre = zonas_sede.nombre(sede_id)
+
+    cabeceras, no_modificado = condicional(
+        request, db, [("registro_usuario", current_user_id)], current_user_id, hoy(tz_nombre), tz_nombre
+    )
+    if no_modificado:
+        return no_modificado
+
+    start_utc, end_utc = _utc_bounds_for_local_day(tz_nombre, 0)
     regs_today = (
         db.query(RegistroAsistencia)
         .filter(
@@ -223,7 +257,7 @@ def dashboard_empleado(
 
     serie = []
     for i in range(6, -1, -1):
-        s_utc, e_utc = _utc_bounds_for_local_day(i)
+        s_utc, e_utc = _utc_bounds_for_local_day(tz_nombre, i)
         regs = (
             db.query(RegistroAsistencia)
             .filter(
@@ -236,13 +270,16 @@ def dashboard_empleado(
         entradas = sum(1 for r in regs if (r.tipo or "").lower() == "entrada")
         salidas = sum(1 for r in regs if (r.tipo or "").lower() == "salida")
         fuera = sum(1 for r in regs if r.dentro_geocerca is False)
-        date_local = (datetime.now(_local_tz()).date() - timedelta(days=i)).isoformat()
+        date_local = (hoy(tz_nombre) - timedelta(days=i)).isoformat()
         serie.append({"date": date_local, "entradas": entradas, "salidas": salidas, "fuera": fuera})
 
-    return {
-        "usuario_id": str(current_user_id),
-        "entradas_hoy": entradas_hoy,
-        "salidas_hoy": salidas_hoy,
-        "fuera_geocerca_hoy": fuera_hoy,
-        "serie_7d": serie,
-    }
+    return JSONRapido(
+        {
+            "usuario_id": str(current_user_id),
+            "entradas_hoy": entradas_hoy,
+            "salidas_hoy": salidas_hoy,
+            "fuera_geocerca_hoy": fuera_hoy,
+            "serie_7d": serie,
+        },
+        headers=cabeceras,
+    )
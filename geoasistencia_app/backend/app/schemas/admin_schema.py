@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import date, time
+
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 
@@ -11,18 +13,21 @@ class AdminLoginRequest(BaseModel):
 
 class SedeCreate(BaseModel):
     nombre: str
-    latitud: str
-    longitud: str
+    latitud: float = Field(..., ge=-90, le=90)
+    longitud: float = Field(..., ge=-180, le=180)
     radio_metros: int
     direccion: Optional[str] = None
+    # IANA (p. ej. America/Guayaquil); por defecto TZ_DEFECTO
+    zona_horaria: Optional[str] = None
 
 
 class SedeUpdate(BaseModel):
     nombre: Optional[str] = None
-    latitud: Optional[str] = None
-    longitud: Optional[str] = None
+    latitud: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitud: Optional[float] = Field(default=None, ge=-180, le=180)
     radio_metros: Optional[int] = None
     direccion: Optional[str] = None
+    zona_horaria: Optional[str] = None
 
 
 class UsuarioCreate(BaseModel):
@@ -47,6 +52,25 @@ class UsuarioUpdate(BaseModel):
     rol: Optional[str] = None
 
 
+class TurnoCreate(BaseModel):
+    # Nivel: usuario_id (empleado) > sede_id > global (ninguno; solo SUPERADMIN)
+    sede_id: Optional[str] = None
+    usuario_id: Optional[str] = None
+    dia_semana: int = Field(..., ge=1, le=7)  # ISO: 1 = lunes … 7 = domingo
+    hora_entrada: time
+    tolerancia_min: int = Field(default=0, ge=0, le=240)
+    hora_salida: Optional[time] = None
+    vigente_desde: Optional[date] = None
+    vigente_hasta: Optional[date] = None
+
+
+class FeriadoCreate(BaseModel):
+    fecha: date
+    nombre: str = Field(..., min_length=3)
+    # Sin sede: feriado de todas las sedes (solo SUPERADMIN)
+    sede_id: Optional[str] = None
+
+
 class RevealPIIRequest(BaseModel):
     target_usuario_id: str
     motivo: str = Field(..., min_length=15)
@@ -6,8 +6,8 @@ from datetime import datetime
 class RegistroAsistenciaRequest(BaseModel):
     usuario_id: UUID
     tipo: str = Field(..., pattern="^(entrada|salida|manual)$")
-    latitud: Optional[float] = Field(default=None)
-    longitud: Optional[float] = Field(default=None)
+    latitud: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitud: Optional[float] = Field(default=None, ge=-180, le=180)
     modo: str = Field(..., pattern="^(app|manual|sync_offline)$")
 
     # Para marcación manual: permitir ingresar fecha/hora del evento.
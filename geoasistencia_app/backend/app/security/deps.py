@@ -4,7 +4,7 @@ from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.database import ReadSessionLocal, SessionLocal, escribio_hace_poco, replica_disponible
 from app.models.usuario import Usuario
 from app.security.jwt import decode_token
 
@@ -42,9 +42,38 @@ def get_current_user(
 
     # Adjuntamos payload por conveniencia (solo lectura)
     user._jwt_payload = payload  # type: ignore[attr-defined]
+    # Para read-your-writes: si esta sesión escribe, el usuario lee del primario un rato.
+    db.info["usuario_id"] = str(user.usuario_id)
     return user
 
 
+def get_read_db(
+    db: Session = Depends(get_db),
+    user: Usuario = Depends(get_current_user),
+):
+    """Sesión para endpoints de solo lectura (dashboards, listados, reportes).
+
+    Va a la réplica (DB_READ_HOST) salvo que:
+    - no haya réplica configurada,
+    - su lag supere DB_READ_MAX_LAG_S (o no responda),
+    - el usuario haya escrito en los últimos DB_READ_STICKY_S segundos.
+    En esos casos reutiliza la sesión del primario de la petición.
+    """
+    if (
+        ReadSessionLocal is None
+        or escribio_hace_poco(user.usuario_id)
+        or not replica_disponible()
+    ):
+        yield db
+        return
+
+    read_db = ReadSessionLocal()
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+
 def require_roles(*roles: str):
     roles_set = {r.upper() for r in roles}
 
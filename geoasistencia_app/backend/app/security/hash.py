@@ -1,9 +1,46 @@
-from passlib.context import CryptContext
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Procesos para hashear en lote (importación masiva). Argon2 es CPU: con hilos
+# no escala por el GIL. Cada worker tiene su propio pool, así que por defecto
+# las CPUs se reparten entre los WEB_WORKERS (gunicorn.conf.py lo exporta).
+_WORKERS = max(1, int(os.getenv("WEB_WORKERS", "1")))
+HASH_PROCESOS = int(os.getenv("HASH_PROCESOS", str(max(1, (os.cpu_count() or 2) // _WORKERS))))
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    # passlib + argon2 se cargan en el primer login/alta, no al importar la app.
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["argon2"], deprecated="auto")
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    return get_pwd_context().verify(password, hashed)
+
+
+def _hash_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: el worker tiene hilos (LISTEN, reconciliación) y hacer fork
+            # de un proceso con hilos puede heredar locks tomados.
+            _pool = ProcessPoolExecutor(max_workers=HASH_PROCESOS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hashea en paralelo (pool de procesos). Mismo orden que la entrada."""
+    if len(passwords) < 2 or HASH_PROCESOS <= 1:
+        return [hash_password(p) for p in passwords]
+    chunk = max(1, len(passwords) // (HASH_PROCESOS * 4))
+    return list(_hash_pool().map(hash_password, passwords, chunksize=chunk))
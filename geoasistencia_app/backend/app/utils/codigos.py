@@ -0,0 +1,114 @@
+"""Índice en memoria código de empleado -> usuario.
+
+Los listados filtran por código (`?documento=LOJ-4F`) como subcadena sin
+distinguir mayúsculas. En vez de `Usuario.documento ILIKE '%...%'` sobre el join,
+se resuelven aquí los usuario_id y la consulta filtra por `usuario_id IN (...)`.
+
+- Se carga entera con una consulta (documento, usuario_id, sede_id, rol).
+- Se invalida al crear/editar/importar usuarios (en este worker directamente y
+  en los demás vía el evento `usuario` de app.utils.eventos) y caduca cada
+  CODIGOS_TTL_S como red de seguridad.
+- `buscar` devuelve None si no conviene usar el índice (no cargado o demasiados
+  resultados); el llamador vuelve entonces al ILIKE (índice trigram, v0006).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import uuid
+
+from app.database import SessionLocal
+from app.models.usuario import Usuario
+
+TTL_S = float(os.getenv("CODIGOS_TTL_S", "300"))
+# Con más coincidencias, un IN enorme rinde peor que el join + trigram.
+MAX_IDS = 2000
+
+ROLES_PANEL = {"ADMIN", "SUPERADMIN"}
+
+log = logging.getLogger(__name__)
+
+
+def _trigramas(codigo: str) -> set[str]:
+    return {codigo[i:i + 3] for i in range(len(codigo) - 2)}
+
+
+class IndiceCodigos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._carga_lock = threading.Lock()
+        self._filas: list[tuple[str, uuid.UUID, str | None, bool]] = []  # (CODIGO, usuario_id, sede_id, empleado)
+        # trigrama -> posiciones en _filas (mismo principio que pg_trgm, en memoria)
+        self._posting: dict[str, list[int]] = {}
+        self._cargado = 0.0
+        self._vigente = False
+
+    def invalidar(self) -> None:
+        self._vigente = False
+
+    def _cargar(self) -> None:
+        db = SessionLocal()
+        try:
+            rows = db.query(Usuario.documento, Usuario.usuario_id, Usuario.sede_id, Usuario.rol).all()
+        finally:
+            db.close()
+        filas = [
+            ((doc or "").upper(), uid, str(sede) if sede else None, (rol or "").upper() not in ROLES_PANEL)
+            for doc, uid, sede, rol in rows
+        ]
+        posting: dict[str, list[int]] = {}
+        for pos, fila in enumerate(filas):
+            for tri in _trigramas(fila[0]):
+                posting.setdefault(tri, []).append(pos)
+        with self._lock:
+            self._filas, self._posting = filas, posting
+            self._cargado = time.monotonic()
+            self._vigente = True
+
+    def _asegurar(self) -> bool:
+        if self._vigente and time.monotonic() - self._cargado < TTL_S:
+            return True
+        try:
+            with self._carga_lock:
+                # Otro hilo pudo recargar mientras esperábamos.
+                if not (self._vigente and time.monotonic() - self._cargado < TTL_S):
+                    self._cargar()
+            return True
+        except Exception:
+            log.warning("No se pudo cargar el índice de códigos", exc_info=True)
+            return False
+
+    def buscar(self, texto: str, sede_id: str | None = None, solo_empleados: bool = True) -> list[uuid.UUID] | None:
+        """usuario_id cuyo código contiene `texto` (sin distinguir mayúsculas).
+
+        Cubre prefijo y subcadena: con 3+ caracteres solo se revisan los códigos
+        que comparten todos los trigramas del texto; con menos, se recorre todo.
+        """
+        if not self._asegurar():
+            return None
+        q = texto.strip().upper()
+        with self._lock:
+            filas, posting = self._filas, self._posting
+
+        if len(q) >= 3:
+            listas = sorted((posting.get(t, []) for t in _trigramas(q)), key=len)
+            candidatas = set(listas[0]).intersection(*listas[1:]) if listas else set()
+            filas_candidatas = (filas[i] for i in sorted(candidatas))
+        else:
+            filas_candidatas = iter(filas)
+
+        out = []
+        sede = str(sede_id) if sede_id else None
+        for codigo, uid, sede_fila, empleado in filas_candidatas:
+            if q not in codigo or (sede and sede_fila != sede) or (solo_empleados and not empleado):
+                continue
+            out.append(uid)
+            if len(out) > MAX_IDS:
+                return None
+        return out
+
+
+codigos = IndiceCodigos()
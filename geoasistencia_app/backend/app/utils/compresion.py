@@ -0,0 +1,125 @@
+"""Compresión de respuestas de la API según Accept-Encoding (brotli o gzip).
+
+- Solo tipos de texto (JSON, text/*) de al menos COMPRESION_MIN_BYTES: por
+  debajo, las cabeceras y la CPU cuestan más de lo que se ahorra.
+- Solo respuestas de un único bloque (JSONResponse, JSONRapido…). Las que se
+  emiten por partes (SSE, CSV en streaming, archivos) pasan tal cual.
+- Respuestas ya codificadas (estáticos precomprimidos, ver app/utils/estaticos.py)
+  no se tocan.
+- brotli es opcional: si el paquete no está instalado se ofrece solo gzip.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # sin brotli: solo gzip
+    brotli = None
+
+MIN_BYTES = int(os.getenv("COMPRESION_MIN_BYTES", "1024"))
+# Cuerpos más grandes se comprimen en un hilo para no bloquear el event loop.
+HILO_BYTES = 256 * 1024
+
+GZIP_NIVEL = 6
+BROTLI_CALIDAD = 5  # dinámico: las calidades altas son para build (estáticos)
+
+TIPOS = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def disponibles() -> tuple[str, ...]:
+    """Codificaciones soportadas, en orden de preferencia del servidor."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def elegir_codificacion(accept_encoding: str, opciones: tuple[str, ...] | None = None) -> str | None:
+    """La mejor de `opciones` que el cliente acepta (respeta q=0 y `*`)."""
+    opciones = disponibles() if opciones is None else opciones
+    pesos = {}
+    for parte in (accept_encoding or "").lower().split(","):
+        nombre, _, params = parte.strip().partition(";")
+        if not nombre:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        pesos[nombre.strip()] = q
+
+    mejor, mejor_q = None, 0.0
+    for cod in opciones:
+        q = pesos.get(cod, pesos.get("*", 0.0))
+        if q > mejor_q:
+            mejor, mejor_q = cod, q
+    return mejor
+
+
+def comprimir(datos: bytes, cod: str) -> bytes:
+    if cod == "br":
+        return brotli.compress(datos, quality=BROTLI_CALIDAD)
+    return gzip.compress(datos, compresslevel=GZIP_NIVEL, mtime=0)
+
+
+def es_comprimible(content_type: str) -> bool:
+    ct = (content_type or "").lower()
+    return ct.startswith(TIPOS) and not ct.startswith("text/event-stream")
+
+
+class CompresionMiddleware:
+    def __init__(self, app, minimo: int = MIN_BYTES):
+        self.app = app
+        self.minimo = minimo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cod = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if cod is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        decidido = False
+
+        async def enviar(msg):
+            nonlocal inicio, decidido
+            if decidido:
+                await send(msg)
+                return
+            if msg["type"] == "http.response.start":
+                inicio = msg
+                return
+
+            decidido = True
+            headers = MutableHeaders(raw=inicio["headers"])
+            cuerpo = msg.get("body", b"")
+            comprimible = es_comprimible(headers.get("content-type", "")) and "content-encoding" not in headers
+            if comprimible:
+                headers.add_vary_header("Accept-Encoding")
+            if not comprimible or msg.get("more_body", False) or len(cuerpo) < self.minimo:
+                await send(inicio)
+                await send(msg)
+                return
+
+            if len(cuerpo) >= HILO_BYTES:
+                comprimido = await anyio.to_thread.run_sync(comprimir, cuerpo, cod)
+            else:
+                comprimido = comprimir(cuerpo, cod)
+            headers["content-encoding"] = cod
+            headers["content-length"] = str(len(comprimido))
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                # Otra representación: el ETag fuerte ya no identifica estos bytes.
+                headers["etag"] = "W/" + headers["etag"]
+            await send(inicio)
+            await send({"type": "http.response.body", "body": comprimido, "more_body": False})
+
+        await self.app(scope, receive, enviar)
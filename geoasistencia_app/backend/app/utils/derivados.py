@@ -0,0 +1,33 @@
+"""Estructuras derivadas de registro_asistencia, al día en la transacción de la marcación.
+
+`actualizar(db, registros)` se llama tras insertar (y hacer flush de) marcaciones
+nuevas, antes del commit: registro directo, aprobación manual individual y en lote.
+- jornadas: re-emparejado de cada empleado desde su marcación más antigua.
+- presencia: última marcación por usuario (ocupación en vivo).
+- franjas: días (sede, fecha) a recalcular en la analítica; incluye los días de
+  las jornadas que cambiaron (un turno nocturno toca el día anterior).
+"""
+
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from app.utils import franjas, jornadas
+from app.utils.presencia import presencia
+from app.utils.tiempo import a_local, zonas_sede
+
+
+def actualizar(db: Session, registros) -> None:
+    registros = list(registros)
+    primera = {}
+    for r in registros:
+        primera[r.usuario_id] = min(r.timestamp_registro, primera.get(r.usuario_id, r.timestamp_registro))
+
+    tocadas = set()
+    # En orden de id: los advisory locks de jornadas se toman siempre en el mismo orden.
+    for uid in sorted(primera, key=str):
+        tocadas |= jornadas.recalcular(db, uid, primera[uid])[1]
+    presencia.guardar(db, registros)
+    for r in registros:
+        tocadas.add((r.sede_id, a_local(r.timestamp_registro, zonas_sede.nombre(r.sede_id)).date()))
+    franjas.marcar(db, tocadas)
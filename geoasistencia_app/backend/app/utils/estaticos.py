@@ -0,0 +1,116 @@
+"""Estáticos del panel y de la SPA: precomprimidos y con política de caché.
+
+- En el build (`python manage.py estaticos comprimir`, lo llama
+  build_frontend.sh) se generan `archivo.br` / `archivo.gz` junto a cada
+  archivo de texto. `StaticPrecomprimido` sirve la variante que el cliente
+  acepte, sin comprimir en cada petición.
+- Archivos con huella en el nombre (Vite: `assets/index-5f3a9c1e.js`) cambian de
+  nombre en cada build: `Cache-Control: immutable` por un año.
+- El resto (index.html, panel) usa `no-cache`: el navegador revalida con
+  ETag / Last-Modified y recibe un 304 sin cuerpo si no cambió.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import re
+from mimetypes import guess_type
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+from app.utils.compresion import brotli, elegir_codificacion
+
+EXTENSIONES = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".map", ".xml", ".webmanifest"}
+VARIANTES = (("br", ".br"), ("gzip", ".gz"))
+MIN_BYTES = 1024
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+# nombre-<hash de 8+ caracteres>.ext (formato de Vite/Rollup)
+_HUELLA = re.compile(r"[.-][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+
+
+def politica_cache(ruta: str) -> str:
+    return CACHE_INMUTABLE if _HUELLA.search(os.path.basename(ruta)) else CACHE_REVALIDAR
+
+
+def comprimir_directorio(directorio: Path) -> list[tuple[Path, int, dict[str, int]]]:
+    """Genera .br (si hay brotli) y .gz de los archivos de texto de `directorio`.
+
+    Idempotente: no rehace variantes más nuevas que el original, y descarta las
+    que no ahorran nada. Devuelve (archivo, bytes, {codificación: bytes}).
+    """
+    hechos = []
+    for ruta in sorted(Path(directorio).rglob("*")):
+        if not ruta.is_file() or ruta.suffix not in EXTENSIONES:
+            continue
+        original = ruta.stat()
+        if original.st_size < MIN_BYTES:
+            continue
+        datos = None
+        tamanos = {}
+        for cod, ext in VARIANTES:
+            if cod == "br" and brotli is None:
+                continue
+            destino = ruta.with_name(ruta.name + ext)
+            if destino.exists() and destino.stat().st_mtime >= original.st_mtime:
+                tamanos[cod] = destino.stat().st_size
+                continue
+            datos = ruta.read_bytes() if datos is None else datos
+            comprimido = (
+                brotli.compress(datos, quality=11) if cod == "br" else gzip.compress(datos, compresslevel=9, mtime=0)
+            )
+            if len(comprimido) >= len(datos):
+                destino.unlink(missing_ok=True)
+                continue
+            destino.write_bytes(comprimido)
+            tamanos[cod] = len(comprimido)
+        hechos.append((ruta, original.st_size, tamanos))
+    return hechos
+
+
+class StaticPrecomprimido(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        ruta = str(full_path)
+        headers = {"cache-control": politica_cache(ruta)}
+
+        variante = None
+        if os.path.splitext(ruta)[1] in EXTENSIONES:
+            # Solo variantes al día (un build sin `estaticos comprimir` las deja viejas).
+            presentes = {}
+            for cod, ext in VARIANTES:
+                try:
+                    st = os.stat(ruta + ext)
+                except OSError:
+                    continue
+                if st.st_mtime >= stat_result.st_mtime:
+                    presentes[cod] = st
+            if presentes:
+                headers["vary"] = "Accept-Encoding"
+                cod = elegir_codificacion(request_headers.get("accept-encoding", ""), tuple(presentes))
+                if cod:
+                    variante = (cod, presentes[cod])
+
+        if variante:
+            cod, st = variante
+            headers["content-encoding"] = cod
+            response = FileResponse(
+                ruta + dict(VARIANTES)[cod],
+                status_code=status_code,
+                stat_result=st,
+                media_type=guess_type(ruta)[0] or "text/plain",
+                headers=headers,
+            )
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,208 @@
+"""Eventos en vivo para el panel (SSE en /admin/eventos).
+
+- `publicar(db, ...)` encola un `pg_notify` dentro de la transacción de la
+  escritura: Postgres solo lo entrega si se hace commit, y lo entrega a todos
+  los workers (cada uno tiene un LISTEN en un hilo propio).
+- El hilo `Escucha` recibe las notificaciones y las reparte al `Hub` en memoria,
+  que las encola en cada conexión SSE suscrita a esa sede (o global).
+- Los eventos de solicitudes llevan `delta_pendientes`: los workers que no
+  originaron el cambio ajustan con él su contador de app.utils.pendientes.
+- Los eventos `registro` actualizan la presencia en memoria (app.utils.presencia)
+  y el índice de llegadas (app.utils.llegadas), e invalidan el caché de
+  periodos cerrados que contienen su fecha (app.utils.periodos).
+
+Tipos: `registro` (nueva marcación) y `solicitud` (creada/aprobada/rechazada).
+`usuario` (alta/edición) y `sede` son internos: invalidan los cachés de
+app.utils.codigos, app.utils.tiempo y app.utils.periodos en cada worker.
+`turno` (turnos y feriados, app.utils.turnos) también: invalida los periodos
+cerrados de la sede (sin sede: todos).
+LISTEN necesita conexión directa a Postgres (no PgBouncer en modo transacción).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+from datetime import date
+
+from sqlalchemy import String, bindparam, func, select as sa_select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.utils.codigos import codigos
+from app.utils.llegadas import llegadas
+from app.utils.pendientes import pendientes
+from app.utils.periodos import periodos
+from app.utils.presencia import presencia
+from app.utils.tiempo import zonas_sede
+
+CANAL = "geo_eventos"
+# Eventos sin consumir por conexión; un cliente lento pierde los más nuevos
+# (el panel se resincroniza al reconectar).
+COLA_MAX = 200
+
+log = logging.getLogger(__name__)
+
+
+def _payload(tipo: str, sede_id, datos: dict) -> str:
+    return json.dumps(
+        {"tipo": tipo, "sede_id": str(sede_id) if sede_id else None, "pid": os.getpid(), "datos": datos},
+        default=str,
+        separators=(",", ":"),
+    )
+
+
+def publicar(db: Session, tipo: str, sede_id, datos: dict) -> None:
+    """Encola el evento en la transacción actual de `db` (se emite al hacer commit)."""
+    db.execute(sa_select(func.pg_notify(CANAL, _payload(tipo, sede_id, datos))))
+
+
+def publicar_muchos(db: Session, eventos: list[tuple[str, object, dict]]) -> None:
+    """Como `publicar`, con un solo round-trip para N eventos (decisiones en lote)."""
+    if not eventos:
+        return
+    payloads = [_payload(tipo, sede_id, datos) for tipo, sede_id, datos in eventos]
+    x = func.unnest(bindparam("payloads", payloads, type_=ARRAY(String))).table_valued("x")
+    db.execute(sa_select(func.pg_notify(CANAL, x.c.x)).select_from(x))
+
+
+def datos_registro(reg, usuario_codigo: str | None, empleado: bool, local_date: str | None) -> dict:
+    """Payload del evento `registro` (mismos campos que /admin/asistencias)."""
+    return {
+        "registro_id": str(reg.registro_id),
+        "usuario_id": str(reg.usuario_id),
+        "timestamp_registro": reg.timestamp_registro.isoformat() if reg.timestamp_registro else None,
+        "local_date": local_date,
+        "tipo": (reg.tipo or "").lower(),
+        "dentro_geocerca": reg.dentro_geocerca,
+        "modo": reg.modo,
+        "usuario_codigo": usuario_codigo,
+        "empleado": empleado,
+    }
+
+
+class Hub:
+    """Fan-out en proceso: sede_id -> colas asyncio de las conexiones SSE."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # clave None = suscriptores globales (SUPERADMIN sin filtro de sede)
+        self._subs: dict[str | None, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def suscribir(self, sede_id: str | None) -> asyncio.Queue:
+        cola: asyncio.Queue = asyncio.Queue(maxsize=COLA_MAX)
+        with self._lock:
+            self._subs.setdefault(sede_id, set()).add((asyncio.get_running_loop(), cola))
+        return cola
+
+    def desuscribir(self, sede_id: str | None, cola: asyncio.Queue) -> None:
+        with self._lock:
+            subs = self._subs.get(sede_id, set())
+            for item in [i for i in subs if i[1] is cola]:
+                subs.discard(item)
+            if not subs:
+                self._subs.pop(sede_id, None)
+
+    def conexiones(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+    def entregar(self, evento: dict) -> None:
+        """Thread-safe: se llama desde el hilo de LISTEN."""
+        with self._lock:
+            destinos = list(self._subs.get(evento.get("sede_id"), ())) + list(self._subs.get(None, ()))
+        for loop, cola in destinos:
+            loop.call_soon_threadsafe(_encolar, cola, evento)
+
+
+def _encolar(cola: asyncio.Queue, evento: dict) -> None:
+    try:
+        cola.put_nowait(evento)
+    except asyncio.QueueFull:
+        pass
+
+
+hub = Hub()
+
+
+class Escucha:
+    """Hilo con LISTEN geo_eventos; se reconecta si la conexión cae."""
+
+    def __init__(self):
+        self._parar = threading.Event()
+        self._hilo: threading.Thread | None = None
+
+    def _procesar(self, payload: str) -> None:
+        try:
+            evento = json.loads(payload)
+        except ValueError:
+            return
+        if evento.get("tipo") == "usuario":
+            codigos.invalidar()
+            # Un cambio de sede del empleado afecta también a la sede anterior: todo.
+            periodos.invalidar()
+            llegadas.invalidar()
+            return
+        if evento.get("tipo") == "sede":
+            zonas_sede.invalidar()
+            periodos.invalidar(evento.get("sede_id"))
+            llegadas.invalidar(evento.get("sede_id"))
+            return
+        if evento.get("tipo") == "turno":
+            periodos.invalidar(evento.get("sede_id"))
+            return
+        if evento.get("tipo") == "registro":
+            datos = evento.get("datos") or {}
+            presencia.aplicar(evento.get("sede_id"), datos)
+            llegadas.aplicar(evento.get("sede_id"), datos)
+            if datos.get("local_date"):
+                periodos.invalidar(evento.get("sede_id"), date.fromisoformat(datos["local_date"]))
+        delta = (evento.get("datos") or {}).get("delta_pendientes")
+        if delta and evento.get("pid") != os.getpid() and evento.get("sede_id"):
+            pendientes.ajustar(evento["sede_id"], int(delta))
+        hub.entregar(evento)
+
+    def _escuchar(self) -> None:
+        raw = engine.raw_connection()
+        raw.detach()  # conexión propia, fuera del pool
+        conn = raw.dbapi_connection
+        try:
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {CANAL}")
+            # Sin LISTEN pudo perderse un evento: se descartan el caché de periodos y el índice de llegadas.
+            periodos.invalidar()
+            llegadas.invalidar()
+            while not self._parar.is_set():
+                if select.select([conn], [], [], 5.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self._procesar(conn.notifies.pop(0).payload)
+        finally:
+            raw.close()
+
+    def _bucle(self) -> None:
+        while not self._parar.is_set():
+            try:
+                self._escuchar()
+            except Exception:
+                log.warning("LISTEN %s interrumpido; reintento en 5 s", CANAL, exc_info=True)
+                self._parar.wait(5.0)
+
+    def iniciar(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="eventos-listen", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._parar.set()
+
+
+escucha = Escucha()
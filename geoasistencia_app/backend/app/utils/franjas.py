@@ -0,0 +1,327 @@
+"""Franjas: agregado por sede, fecha local y franja de 15 minutos (analítica de llegadas).
+
+- `franja_sede` (v0011) guarda por franja: entradas, salidas, primeras entradas
+  del día por empleado y los cambios de ocupación (jornadas CERRADAS que
+  empiezan / terminan). Un trimestre de una sede son unas pocas miles de filas.
+- Cada marcación (o aprobación) marca su (sede, fecha) en `franja_pendiente`
+  dentro de la misma transacción (app.utils.derivados). Antes de leer un rango,
+  `refrescar()` recalcula solo los días pendientes de ese rango: los días
+  cerrados no se vuelven a calcular salvo que llegue una marcación tardía.
+- La marca toma el lock de la fila pendiente (UPSERT) hasta el commit de la
+  marcación: un refresco concurrente espera y ve la marcación, o la marcación
+  espera y deja el día pendiente otra vez. Nunca queda una marcación fuera.
+- El mismo refresco rehace el resumen por día/semana/mes de esos días
+  (app.utils.resumenes), con el que se sirven los rangos largos.
+- Los intervalos de la analítica (30, 60, 120 min…) se arman sumando franjas en
+  SQL; la ocupación es la suma acumulada de cada día sobre una malla densa.
+- `reconstruir()` (manage.py franjas reconstruir) llena el histórico; requiere
+  las jornadas ya reconstruidas.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, bindparam, func, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, array, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.franja_sede import FranjaPendiente
+from app.models.jornada import Jornada
+from app.models.usuario import Usuario
+from app.utils import resumenes
+from app.utils.tiempo import limites_utc, zonas_sede
+
+GRANO = 15  # minutos por franja guardada
+LOTE_DIAS = 31  # días por consulta de refresco
+PERCENTILES = (10, 25, 50, 75, 90)
+
+_RECALCULAR = text(
+    f"""
+    WITH r AS (
+        SELECT r.usuario_id, r.tipo::text AS tipo,
+               timezone(:tz, timezone('UTC', r.timestamp_registro)) AS l
+        FROM registro_asistencia r
+        JOIN usuario u ON u.usuario_id = r.usuario_id
+        WHERE r.sede_id = :sede AND r.timestamp_registro >= :ini AND r.timestamp_registro < :fin
+          AND r.tipo IN ('entrada', 'salida')
+          AND upper(coalesce(u.rol, '')) NOT IN ('ADMIN', 'SUPERADMIN')
+    ), j AS (
+        SELECT timezone(:tz, timezone('UTC', j.entrada_at)) AS le,
+               timezone(:tz, timezone('UTC', j.salida_at)) AS ls
+        FROM jornada j
+        JOIN usuario u ON u.usuario_id = j.usuario_id
+        WHERE j.sede_id = :sede AND j.estado = 'CERRADA' AND j.fecha >= :jdesde AND j.fecha <= :jhasta
+          AND upper(coalesce(u.rol, '')) NOT IN ('ADMIN', 'SUPERADMIN')
+    ), ev AS (
+        SELECT l, (tipo = 'entrada')::int AS e, (tipo = 'salida')::int AS s,
+               (tipo = 'entrada' AND row_number() OVER (PARTITION BY usuario_id, l::date, tipo ORDER BY l) = 1)::int AS p,
+               0 AS su, 0 AS ba
+        FROM r
+        UNION ALL
+        SELECT x.l, 0, 0, 0, x.su, x.ba
+        FROM j, LATERAL (VALUES
+            (j.le, 1, 0),
+            (j.ls, 0, 1),
+            (CASE WHEN j.ls::date > j.le::date THEN date_trunc('day', j.ls) END, 1, 0)
+        ) AS x(l, su, ba)
+        WHERE x.l IS NOT NULL
+    )
+    INSERT INTO franja_sede (sede_id, fecha, minuto, entradas, salidas, primeras, suben, bajan)
+    SELECT :sede, l::date,
+           (extract(hour FROM l) * 60 + extract(minute FROM l))::int / {GRANO} * {GRANO},
+           sum(e), sum(s), sum(p), sum(su), sum(ba)
+    FROM ev
+    WHERE l::date = ANY(:fechas)
+    GROUP BY 2, 3
+    """
+).bindparams(bindparam("fechas", type_=ARRAY(Date)), bindparam("sede", type_=UUID(as_uuid=False)))
+
+_BORRAR = text("DELETE FROM franja_sede WHERE sede_id = :sede AND fecha = ANY(:fechas)").bindparams(
+    bindparam("fechas", type_=ARRAY(Date)), bindparam("sede", type_=UUID(as_uuid=False))
+)
+_BORRAR_PENDIENTES = text("DELETE FROM franja_pendiente WHERE sede_id = :sede AND fecha = ANY(:fechas)").bindparams(
+    bindparam("fechas", type_=ARRAY(Date)), bindparam("sede", type_=UUID(as_uuid=False))
+)
+
+
+def intervalo_valido(minutos: int) -> bool:
+    return minutos >= GRANO and minutos % GRANO == 0 and 1440 % minutos == 0
+
+
+def marcar(db: Session, pares) -> None:
+    """Deja (sede_id, fecha local) pendientes de recálculo (no hace commit)."""
+    filas = [{"sede_id": s, "fecha": f} for s, f in {(s, f) for s, f in pares if s}]
+    if not filas:
+        return
+    stmt = pg_insert(FranjaPendiente).values(filas)
+    # DO UPDATE (no DO NOTHING): toma el lock de la fila hasta el commit, ver arriba.
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[FranjaPendiente.sede_id, FranjaPendiente.fecha],
+            set_={"fecha": stmt.excluded.fecha},
+        )
+    )
+
+
+def _tramos(fechas: list[date]):
+    """Fechas ordenadas -> tramos contiguos de hasta LOTE_DIAS (acota el rango de cada consulta)."""
+    tramo = []
+    for f in sorted(fechas):
+        if tramo and (f - tramo[-1] > timedelta(days=1) or len(tramo) >= LOTE_DIAS):
+            yield tramo
+            tramo = []
+        tramo.append(f)
+    if tramo:
+        yield tramo
+
+
+def refrescar(db: Session, sede_id=None, desde: date | None = None, hasta: date | None = None) -> int:
+    """Recalcula los días pendientes del alcance, [desde, hasta). No hace commit.
+
+    Devuelve cuántos (sede, fecha) se recalcularon.
+    """
+    q = db.query(FranjaPendiente.sede_id, FranjaPendiente.fecha)
+    if sede_id:
+        q = q.filter(FranjaPendiente.sede_id == sede_id)
+    if desde is not None:
+        q = q.filter(FranjaPendiente.fecha >= desde)
+    if hasta is not None:
+        q = q.filter(FranjaPendiente.fecha < hasta)
+    por_sede = defaultdict(list)
+    for s, f in q.order_by(FranjaPendiente.sede_id, FranjaPendiente.fecha).with_for_update().all():
+        por_sede[str(s)].append(f)
+
+    total = 0
+    for s, fechas in por_sede.items():
+        tz = zonas_sede.nombre(s)
+        for tramo in _tramos(fechas):
+            ini, fin = limites_utc(tz, tramo[0], tramo[-1] + timedelta(days=1))
+            params = {"sede": s, "fechas": tramo}
+            db.execute(_BORRAR, params)
+            db.execute(
+                _RECALCULAR,
+                {
+                    **params,
+                    "tz": tz,
+                    "ini": ini,
+                    "fin": fin,
+                    "jdesde": tramo[0] - timedelta(days=1),
+                    "jhasta": tramo[-1],
+                },
+            )
+            resumenes.recalcular(db, s, tz, tramo, ini, fin)
+            db.execute(_BORRAR_PENDIENTES, params)
+            total += len(tramo)
+    return total
+
+
+def refrescar_aparte(sede_id, desde: date, hasta: date) -> None:
+    """`refrescar` en su propia sesión del primario (endpoints que leen de la réplica)."""
+    db = SessionLocal()
+    try:
+        if refrescar(db, sede_id, desde, hasta):
+            db.commit()
+    finally:
+        db.close()
+
+
+def reconstruir(desde: date | None = None, log=print) -> int:
+    """Marca como pendientes todos los días con marcaciones (desde `desde`) y los recalcula por sede."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            text(
+                """
+                INSERT INTO franja_pendiente (sede_id, fecha)
+                SELECT DISTINCT r.sede_id, timezone(s.zona_horaria, timezone('UTC', r.timestamp_registro))::date
+                FROM registro_asistencia r
+                JOIN sede s ON s.sede_id = r.sede_id
+                WHERE r.timestamp_registro >= :desde
+                ON CONFLICT DO NOTHING
+                """
+            ),
+            {"desde": datetime.combine(desde or date(1970, 1, 1), datetime.min.time()) - timedelta(days=1)},
+        )
+        db.commit()
+        sedes = [s for (s,) in db.query(FranjaPendiente.sede_id).distinct().all()]
+    finally:
+        db.close()
+
+    total = 0
+    for s in sedes:
+        db = SessionLocal()
+        try:
+            n = refrescar(db, s)
+            db.commit()
+        finally:
+            db.close()
+        total += n
+        log(f"{s}: {n} días")
+    return total
+
+
+def _hhmm(minuto: float) -> str:
+    m = int(round(minuto))
+    return f"{m // 60:02d}:{m % 60:02d}"
+
+
+def _percentiles(hist: list[tuple[int, int]]) -> dict:
+    """Percentiles de la primera entrada desde el histograma por franja (interpolando dentro de la franja)."""
+    n = sum(c for _, c in hist)
+    if not n:
+        return {"n": 0}
+    out = {"n": n}
+    for p in PERCENTILES:
+        objetivo = n * p / 100
+        acumulado = 0
+        for minuto, c in hist:
+            if c and acumulado + c >= objetivo:
+                out[f"p{p}"] = _hhmm(minuto + GRANO * (objetivo - acumulado) / c)
+                break
+            acumulado += c
+    return out
+
+
+def analitica(db: Session, sede_id, desde: date, hasta: date, intervalo: int) -> dict:
+    """Histograma de llegadas/salidas, percentiles de primera entrada y de permanencia, ocupación. [desde, hasta)."""
+    params = {"desde": desde, "hasta": hasta, "intervalo": intervalo, "sede": str(sede_id) if sede_id else None}
+    filtro_sede = "AND sede_id = CAST(:sede AS uuid)" if sede_id else ""
+
+    franjas = db.execute(
+        text(
+            f"""
+            SELECT minuto, sum(entradas), sum(salidas), sum(primeras)
+            FROM franja_sede
+            WHERE fecha >= :desde AND fecha < :hasta {filtro_sede}
+            GROUP BY minuto ORDER BY minuto
+            """
+        ),
+        params,
+    ).all()
+
+    ocupacion = db.execute(
+        text(
+            f"""
+            WITH g AS (
+                SELECT fecha, minuto, sum(suben - bajan) AS d
+                FROM franja_sede
+                WHERE fecha >= :desde AND fecha < :hasta {filtro_sede}
+                GROUP BY fecha, minuto
+            ), malla AS (
+                SELECT d::date AS fecha, m AS minuto
+                FROM generate_series(CAST(:desde AS date), CAST(:hasta AS date) - 1, interval '1 day') AS d,
+                     generate_series(0, {1440 - GRANO}, {GRANO}) AS m
+            ), o AS (
+                SELECT malla.fecha, malla.minuto,
+                       sum(coalesce(g.d, 0)) OVER (PARTITION BY malla.fecha ORDER BY malla.minuto) AS ocupacion
+                FROM malla LEFT JOIN g USING (fecha, minuto)
+            ), b AS (
+                SELECT fecha, minuto / :intervalo * :intervalo AS bloque, max(ocupacion) AS ocupacion
+                FROM o GROUP BY fecha, bloque
+            )
+            SELECT bloque, avg(ocupacion), max(ocupacion), (array_agg(fecha ORDER BY ocupacion DESC, fecha))[1]
+            FROM b GROUP BY bloque ORDER BY bloque
+            """
+        ),
+        params,
+    ).all()
+
+    bloques = {}
+    for minuto, e, s, p in franjas:
+        b = bloques.setdefault(minuto // intervalo * intervalo, [0, 0, 0])
+        b[0] += e
+        b[1] += s
+        b[2] += p
+    ocup = {bloque: (media, maximo, fecha) for bloque, media, maximo, fecha in ocupacion}
+
+    items = []
+    for bloque in range(0, 1440, intervalo):
+        e, s, p = bloques.get(bloque, (0, 0, 0))
+        media, maximo, _ = ocup.get(bloque, (0, 0, None))
+        items.append(
+            {
+                "desde": _hhmm(bloque),
+                "entradas": int(e),
+                "salidas": int(s),
+                "primeras_entradas": int(p),
+                "ocupacion_media": round(float(media or 0), 1),
+                "ocupacion_max": int(maximo or 0),
+            }
+        )
+
+    # Permanencia: percentiles de la duración de las jornadas CERRADAS (tabla jornada, por índice sede/fecha)
+    q = (
+        db.query(
+            func.percentile_cont(array([p / 100 for p in PERCENTILES])).within_group(Jornada.segundos),
+            func.count(),
+        )
+        .join(Usuario, Usuario.usuario_id == Jornada.usuario_id)
+        .filter(
+            Jornada.estado == "CERRADA",
+            Jornada.fecha >= desde,
+            Jornada.fecha < hasta,
+            Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]),
+        )
+    )
+    if sede_id:
+        q = q.filter(Jornada.sede_id == sede_id)
+    cortes, n_jornadas = q.one()
+    permanencia = {"n": n_jornadas}
+    if n_jornadas:
+        permanencia.update({f"p{p}_horas": round(c / 3600, 2) for p, c in zip(PERCENTILES, cortes)})
+
+    pico = max(ocup.items(), key=lambda kv: (kv[1][1] or 0, -kv[0]), default=None)
+    return {
+        "intervalo_min": intervalo,
+        "franjas": items,
+        "primera_entrada": _percentiles([(m, int(p)) for m, _, _, p in franjas]),
+        "permanencia": permanencia,
+        "pico": (
+            {"presentes": int(pico[1][1]), "date": pico[1][2].isoformat(), "desde": _hhmm(pico[0])}
+            if pico and pico[1][1]
+            else None
+        ),
+    }
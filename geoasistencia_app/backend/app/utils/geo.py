@@ -1,5 +1,7 @@
 from math import radians, sin, cos, sqrt, atan2
 
+from sqlalchemy import Float, func
+
 def distancia_metros(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     R = 6371000.0
     dlat = radians(lat2 - lat1)
@@ -7,3 +9,19 @@ def distancia_metros(lat1: float, lon1: float, lat2: float, lon2: float) -> floa
     a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
     c = 2 * atan2(sqrt(a), sqrt(1-a))
     return R * c
+
+
+def distancia_metros_sql(lat1, lon1, lat2, lon2):
+    """Misma fórmula (haversine) como expresión SQL, para evaluar geocercas en lote.
+
+    Recibe columnas/expresiones double precision, p. ej.:
+    distancia_metros_sql(Solicitud.latitud, Solicitud.longitud, Sede.latitud, Sede.longitud)
+    """
+    dlat = func.radians(lat2 - lat1, type_=Float)
+    dlon = func.radians(lon2 - lon1, type_=Float)
+    a = (
+        func.power(func.sin(dlat * 0.5, type_=Float), 2)
+        + func.cos(func.radians(lat1)) * func.cos(func.radians(lat2))
+        * func.power(func.sin(dlon * 0.5, type_=Float), 2)
+    )
+    return 6371000.0 * 2 * func.atan2(func.sqrt(a), func.sqrt(1 - a))
@@ -0,0 +1,188 @@
+"""Prueba de humo contra un Postgres real: GET de las rutas de lectura del panel.
+
+Hay errores que solo aparecen cuando Postgres ejecuta la consulta (funciones
+sobre el ENUM tipo_asistencia, casts, funciones SQL de las migraciones):
+compilar el SQL no alcanza. `python manage.py humo` arma la app con
+create_app(), firma un token para un SUPERADMIN y un ADMIN de la base y pide
+cada ruta directo sobre ASGI (sin servidor ni httpx). Falla si alguna responde
+5xx; los 4xx (parámetros que faltan, permisos) no cuentan.
+
+Además, casos que no tocan datos (`CASOS`): p. ej. decidir en lote ids
+inexistentes repetidos con distinta capitalización, o `/metrics` sin credenciales.
+`/metrics` se pide con METRICS_TOKEN (si está definido) en lugar del token del rol.
+
+Las lecturas pueden escribir como en producción (refresco de los agregados
+pendientes): usar contra la base de desarrollo o staging, ya migrada.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from urllib.parse import urlsplit
+
+from app.database import SessionLocal
+from app.models.sede import Sede
+from app.models.usuario import Usuario
+from app.security.jwt import create_token
+from app.utils import metricas
+from app.utils.tiempo import hoy
+
+# {sede}: sede del ADMIN (o la primera); {mes}: mes actual; {token}: token del rol
+RUTAS = (
+    "/health",
+    "/metrics",
+    "/admin/me",
+    "/admin/mi-sede",
+    "/admin/dashboard",
+    "/admin/dashboard?desglose=true",
+    "/admin/eventos?token={token}",
+    "/admin/ocupacion",
+    "/admin/ocupacion/{sede}/presentes",
+    "/admin/asistencias",
+    "/admin/asistencias/list?range=week",
+    "/admin/asistencias/reporte?month={mes}",
+    "/admin/asistencias/resumen?range=week",
+    "/admin/asistencias/resumen?range=month&desglose=true",
+    "/admin/asistencias/resumen?range=year",
+    "/admin/asistencias/resumen?range=year&desglose=true",
+    "/admin/asistencias/calendario?sede_id={sede}",
+    "/admin/asistencias/faltantes",
+    "/admin/manual-asistencias",
+    "/admin/manual-asistencias/count",
+    "/admin/jornadas/resumen",
+    "/admin/analitica/franjas?range=month",
+    "/admin/sedes",
+    "/admin/usuarios",
+    "/admin/turnos",
+    "/admin/feriados",
+    "/admin/audit",
+)
+
+# Tope por ruta: el stream SSE no termina solo (se corta tras la primera respuesta).
+TIMEOUT_S = 30.0
+
+
+async def _pedir(
+    app, ruta: str, token: str, metodo: str = "GET", cuerpo: dict | None = None, cabeceras: dict | None = None
+) -> tuple[int, str | None, bytes]:
+    partes = urlsplit(ruta)
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else b""
+    headers = [(b"host", b"localhost"), (b"authorization", f"Bearer {token}".encode())]
+    if cuerpo is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(datos)).encode())]
+    headers += [(k.lower().encode(), v.encode()) for k, v in (cabeceras or {}).items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": metodo, "scheme": "http", "path": partes.path, "raw_path": partes.path.encode(),
+        "query_string": partes.query.encode(), "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000),
+    }
+    estado = {}
+    respuesta = []
+    respondio = asyncio.Event()
+    pedido = False
+
+    async def receive():
+        nonlocal pedido
+        if not pedido:
+            pedido = True
+            return {"type": "http.request", "body": datos, "more_body": False}
+        # Después del cuerpo: desconexión en cuanto llega la respuesta (corta el SSE).
+        await respondio.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(msg):
+        if msg["type"] == "http.response.start":
+            estado["status"] = msg["status"]
+            respondio.set()
+        elif msg["type"] == "http.response.body":
+            respuesta.append(msg.get("body", b""))
+
+    try:
+        await asyncio.wait_for(app(scope, receive, send), TIMEOUT_S)
+    except asyncio.TimeoutError:
+        if "status" not in estado:
+            return 0, "sin respuesta", b""
+    except Exception as exc:  # el ServerErrorMiddleware ya respondió 500 y la relanza
+        return estado.get("status", 500), f"{type(exc).__name__}: {exc}".splitlines()[0][:300], b""
+    return estado.get("status", 0), None, b"".join(respuesta)
+
+
+def _decidir_duplicados(app, token: str, u: Usuario) -> tuple[int, str | None]:
+    """Decisión en lote de un id inexistente en mayúsculas y minúsculas: un resultado por texto, sin 5xx."""
+    accion = create_token(
+        {"sub": str(u.usuario_id), "role": u.rol, "scope": "action", "action": "MANUAL_REVIEW"},
+        expires_in_seconds=60,
+    )
+    sid = str(uuid.uuid4())
+    ids = [sid.upper(), sid]
+    status, error, cuerpo = asyncio.run(
+        _pedir(
+            app, "/admin/manual-asistencias/decide", token, "POST",
+            {"ids": ids, "decision": "reject"}, {"X-Action-Token": accion},
+        )
+    )
+    if status == 200:
+        items = json.loads(cuerpo).get("items", [])
+        if [i["solicitud_id"] for i in items] != ids or any(i["status"] != 404 for i in items):
+            return 500, f"items inesperados: {items}"
+    return status, error
+
+
+def _metricas_sin_credenciales(app, token: str, u: Usuario) -> tuple[int, str | None]:
+    """`/metrics` con el token de un admin (no el de métricas) no debe responder 200."""
+    status, error, _ = asyncio.run(_pedir(app, "/metrics", token))
+    if status == 200 and not metricas.METRICS_IPS:
+        return 500, "/metrics respondió sin METRICS_TOKEN"
+    return status, error
+
+
+# (descripción, función(app, token, usuario) -> (status, error))
+CASOS = (
+    ("POST /admin/manual-asistencias/decide (ids repetidos con distinta capitalización)", _decidir_duplicados),
+    ("GET /metrics sin credenciales de métricas", _metricas_sin_credenciales),
+)
+
+
+def _usuarios() -> tuple[list[tuple[str, Usuario]], str | None]:
+    db = SessionLocal()
+    try:
+        roles = []
+        for rol in ("SUPERADMIN", "ADMIN"):
+            q = db.query(Usuario).filter(Usuario.rol == rol)
+            if rol == "ADMIN":
+                q = q.filter(Usuario.sede_id.isnot(None))
+            u = q.first()
+            if u is not None:
+                roles.append((rol, u))
+        admin = next((u for rol, u in roles if rol == "ADMIN"), None)
+        sede = admin.sede_id if admin else db.query(Sede.sede_id).limit(1).scalar()
+        return roles, str(sede) if sede else None
+    finally:
+        db.close()
+
+
+def verificar() -> list[dict]:
+    """{rol, ruta, status, error} por rol y ruta. Sin SUPERADMIN ni ADMIN en la base, lista vacía."""
+    from app.main import create_app
+
+    app = create_app()
+    roles, sede = _usuarios()
+    mes = hoy().strftime("%Y-%m")
+    resultados = []
+    for rol, u in roles:
+        token = create_token({"sub": str(u.usuario_id), "role": rol, "scope": "admin"})
+        for ruta in RUTAS:
+            if "{sede}" in ruta and not sede:
+                continue
+            url = ruta.format(sede=sede, mes=mes, token=token)
+            auth = metricas.METRICS_TOKEN if ruta == "/metrics" and metricas.METRICS_TOKEN else token
+            status, error, _ = asyncio.run(_pedir(app, url, auth))
+            resultados.append({"rol": rol, "ruta": ruta, "status": status, "error": error})
+        for descripcion, caso in CASOS:
+            status, error = caso(app, token, u)
+            resultados.append({"rol": rol, "ruta": descripcion, "status": status, "error": error})
+    return resultados
@@ -0,0 +1,62 @@
+"""Identificadores UUIDv7 (RFC 9562) ordenados por tiempo.
+
+En tablas append-heavy (registro_asistencia, audit_log, offline_sync,
+solicitud_asistencia_manual) un uuid4 aleatorio inserta en cualquier hoja del
+B-tree de la PK: más páginas sucias, splits y un índice inflado. Con UUIDv7 los
+48 bits altos son el timestamp en ms, así que las inserciones van siempre al
+extremo derecho del índice, como un serial.
+
+Layout: unix_ts_ms (48) | ver=7 (4) | rand_a (12) | var=0b10 (2) | rand_b (62).
+Dentro del mismo milisegundo `rand_a` se usa como contador (monótono por proceso).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+
+_lock = threading.Lock()
+_ultimo_ms = 0
+_contador = 0
+
+
+def uuid7() -> uuid.UUID:
+    global _ultimo_ms, _contador
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _ultimo_ms:
+            _ultimo_ms = ms
+            # arranque aleatorio en la mitad baja: deja margen para el contador
+            _contador = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _contador += 1
+            if _contador > 0xFFF:
+                # >4096 ids en el mismo ms (o reloj hacia atrás): avanzamos 1 ms
+                _ultimo_ms += 1
+                _contador = 0
+        ms = _ultimo_ms
+        rand_a = _contador
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+    valor = (ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | rand_a << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=valor)
+
+
+def uuid7_min(dt: datetime) -> uuid.UUID:
+    """Menor UUIDv7 posible para el instante `dt` (naive = UTC).
+
+    Sirve como cota para filtrar/paginar por id en lugar de por timestamp.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    ms = int(dt.timestamp() * 1000)
+    return uuid.UUID(int=(ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | 0b10 << 62)
+
+
+def timestamp_uuid7(u: uuid.UUID) -> datetime:
+    """Instante (UTC naive) codificado en un UUIDv7."""
+    return datetime.fromtimestamp((u.int >> 80) / 1000, tz=timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,244 @@
+"""Jornadas: emparejado incremental de entradas y salidas (hoja de horas).
+
+- Cada entrada abre una jornada; la siguiente salida del mismo empleado la cierra
+  si llega dentro de JORNADA_MAX_HORAS (turnos nocturnos incluidos: la jornada
+  cuenta en la fecha local de la entrada).
+- Entrada sin salida: ABIERTA mientras pueda cerrarse; INCOMPLETA si llega otra
+  entrada o una salida fuera de plazo. Salida sin entrada: SIN_ENTRADA.
+  Ninguna de las dos suma horas: quedan a la vista para revisión.
+- Una entrada repetida a menos de DUPLICADO de la anterior (doble toque) se
+  ignora.
+- `recalcular(db, usuario_id, desde)` se llama en la misma transacción que
+  inserta la marcación (registro directo y aprobación manual). Solo rehace la
+  ventana que el evento puede afectar: las jornadas que terminan a partir de
+  `desde - JORNADA_MAX_HORAS`. Una marcación tardía (offline, manual con fecha
+  pasada) reacomoda los turnos de alrededor sin tocar el resto del historial.
+- Un advisory lock por empleado serializa dos marcaciones simultáneas.
+- `reconstruir()` (manage.py jornadas reconstruir) rehace el histórico.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.jornada import Jornada
+from app.models.registro_asistencia import RegistroAsistencia
+from app.models.usuario import Usuario
+from app.utils.tiempo import a_local, zonas_sede
+
+MAX_HORAS = float(os.getenv("JORNADA_MAX_HORAS", "16"))
+DUPLICADO = timedelta(minutes=5)
+
+CERRADA, ABIERTA, INCOMPLETA, SIN_ENTRADA = "CERRADA", "ABIERTA", "INCOMPLETA", "SIN_ENTRADA"
+
+_LOCK_ID = 727_401_228  # clave 1 de pg_advisory_xact_lock(int, int); la 2 es hashtext(usuario_id)
+
+
+def _max() -> timedelta:
+    return timedelta(hours=MAX_HORAS)
+
+
+def emparejar(eventos, tz_de) -> list[dict]:
+    """Jornadas de una secuencia (registro_id, tipo, ts, sede_id) ordenada por ts.
+
+    `tz_de(sede_id)` da la zona de la sede (fecha local de cada jornada).
+    """
+    jornadas = []
+    abierta = None
+    for registro_id, tipo, ts, sede_id in eventos:
+        tipo = (tipo or "").lower()
+        if tipo == "entrada":
+            if abierta is not None:
+                if ts - abierta["entrada_at"] < DUPLICADO:
+                    continue
+                abierta["estado"] = INCOMPLETA
+            abierta = {
+                "sede_id": sede_id,
+                "fecha": a_local(ts, tz_de(sede_id)).date(),
+                "entrada_id": registro_id,
+                "entrada_at": ts,
+                "salida_id": None,
+                "salida_at": None,
+                "estado": ABIERTA,
+                "segundos": 0,
+            }
+            jornadas.append(abierta)
+        elif tipo == "salida":
+            if abierta is not None and ts - abierta["entrada_at"] <= _max():
+                abierta.update(
+                    salida_id=registro_id,
+                    salida_at=ts,
+                    estado=CERRADA,
+                    segundos=int((ts - abierta["entrada_at"]).total_seconds()),
+                )
+            else:
+                if abierta is not None:
+                    abierta["estado"] = INCOMPLETA
+                jornadas.append(
+                    {
+                        "sede_id": sede_id,
+                        "fecha": a_local(ts, tz_de(sede_id)).date(),
+                        "entrada_id": None,
+                        "entrada_at": None,
+                        "salida_id": registro_id,
+                        "salida_at": ts,
+                        "estado": SIN_ENTRADA,
+                        "segundos": 0,
+                    }
+                )
+            abierta = None
+    return jornadas
+
+
+def recalcular(db: Session, usuario_id, desde: datetime | None = None) -> tuple[int, set]:
+    """Rehace las jornadas del empleado afectadas por una marcación en `desde`.
+
+    Sin `desde`, todo su historial. No hace commit. Devuelve (jornadas escritas,
+    {(sede_id, fecha)} de las jornadas borradas o escritas).
+    """
+    uid = str(usuario_id)
+    db.execute(select(func.pg_advisory_xact_lock(_LOCK_ID, func.hashtext(uid))))
+
+    inicio = func.coalesce(Jornada.entrada_at, Jornada.salida_at)
+    fin = func.coalesce(Jornada.salida_at, Jornada.entrada_at)
+    ancla = None
+    if desde is not None:
+        # Las jornadas que terminan antes de desde - MAX no pueden emparejarse con
+        # este evento; se rehace desde el inicio de la primera que sí podría.
+        ancla = db.query(func.min(inicio)).filter(Jornada.usuario_id == uid, fin >= desde - _max()).scalar()
+        ancla = min(ancla, desde) if ancla else desde
+        db.execute(
+            update(Jornada)
+            .where(Jornada.usuario_id == uid, Jornada.estado == ABIERTA, Jornada.entrada_at < ancla)
+            .values(estado=INCOMPLETA, updated_at=datetime.utcnow())
+        )
+
+    borrar = delete(Jornada).where(Jornada.usuario_id == uid)
+    q = db.query(
+        RegistroAsistencia.registro_id,
+        RegistroAsistencia.tipo,
+        RegistroAsistencia.timestamp_registro,
+        RegistroAsistencia.sede_id,
+    ).filter(RegistroAsistencia.usuario_id == uid, RegistroAsistencia.tipo.in_(("entrada", "salida")))
+    if ancla is not None:
+        borrar = borrar.where(inicio >= ancla)
+        q = q.filter(RegistroAsistencia.timestamp_registro >= ancla)
+    tocadas = {(sede_id, fecha) for sede_id, fecha in db.execute(borrar.returning(Jornada.sede_id, Jornada.fecha))}
+
+    nuevas = emparejar(
+        q.order_by(RegistroAsistencia.timestamp_registro, RegistroAsistencia.registro_id).yield_per(5000),
+        zonas_sede.nombre,
+    )
+    for j in nuevas:
+        j["usuario_id"] = uid
+        tocadas.add((j["sede_id"], j["fecha"]))
+    if nuevas:
+        db.execute(insert(Jornada), nuevas)
+    return len(nuevas), tocadas
+
+
+def reconstruir(usuario_id=None, desde: datetime | None = None, log=print) -> tuple[int, int]:
+    """Recalcula las jornadas de uno o de todos los empleados (una transacción por empleado).
+
+    Devuelve (empleados, jornadas).
+    """
+    db = SessionLocal()
+    try:
+        if usuario_id:
+            ids = [usuario_id]
+        else:
+            ids = [u for (u,) in db.query(Usuario.usuario_id).order_by(Usuario.usuario_id).all()]
+    finally:
+        db.close()
+
+    total = 0
+    for i, uid in enumerate(ids, 1):
+        db = SessionLocal()
+        try:
+            total += recalcular(db, uid, desde)[0]
+            db.commit()
+        finally:
+            db.close()
+        if i % 500 == 0:
+            log(f"… {i}/{len(ids)} empleados, {total} jornadas")
+    return len(ids), total
+
+
+def vigente(estado: str, entrada_at: datetime | None, ahora: datetime | None = None) -> str:
+    """Estado a mostrar: una ABIERTA que ya no puede cerrarse es INCOMPLETA."""
+    ahora = ahora or datetime.utcnow()
+    if estado == ABIERTA and entrada_at is not None and ahora - entrada_at > _max():
+        return INCOMPLETA
+    return estado
+
+
+def horas(segundos: int) -> float:
+    return round((segundos or 0) / 3600, 2)
+
+
+def hoja(db: Session, usuario_id, desde: date, hasta: date) -> dict:
+    """Hoja de horas de un empleado por fecha local, [desde, hasta). Una consulta por índice."""
+    filas = (
+        db.query(
+            Jornada.jornada_id,
+            Jornada.fecha,
+            Jornada.sede_id,
+            Jornada.entrada_at,
+            Jornada.salida_at,
+            Jornada.estado,
+            Jornada.segundos,
+        )
+        .filter(Jornada.usuario_id == usuario_id, Jornada.fecha >= desde, Jornada.fecha < hasta)
+        .order_by(Jornada.fecha, func.coalesce(Jornada.entrada_at, Jornada.salida_at))
+        .all()
+    )
+
+    ahora = datetime.utcnow()
+    por_dia = defaultdict(list)
+    for jornada_id, fecha, sede_id, entrada_at, salida_at, estado, segundos in filas:
+        tz = zonas_sede.nombre(sede_id)
+        entrada_local = a_local(entrada_at, tz)
+        salida_local = a_local(salida_at, tz)
+        por_dia[fecha].append(
+            {
+                "jornada_id": str(jornada_id),
+                "estado": vigente(estado, entrada_at, ahora),
+                "entrada": entrada_local.isoformat(timespec="seconds") if entrada_local else None,
+                "salida": salida_local.isoformat(timespec="seconds") if salida_local else None,
+                "segundos": segundos,
+                "horas": horas(segundos),
+            }
+        )
+
+    dias = []
+    total = 0
+    d = desde
+    while d < hasta:
+        items = por_dia.get(d, [])
+        segundos = sum(j["segundos"] for j in items)
+        total += segundos
+        dias.append(
+            {
+                "date": d.isoformat(),
+                "segundos": segundos,
+                "horas": horas(segundos),
+                "pendientes": sum(1 for j in items if j["estado"] != CERRADA),
+                "jornadas": items,
+            }
+        )
+        d += timedelta(days=1)
+
+    return {
+        "usuario_id": str(usuario_id),
+        "desde": desde.isoformat(),
+        "hasta": (hasta - timedelta(days=1)).isoformat(),
+        "total_segundos": total,
+        "total_horas": horas(total),
+        "dias": dias,
+    }
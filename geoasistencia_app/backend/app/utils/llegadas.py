@@ -0,0 +1,211 @@
+"""Índice en memoria de llegadas: ¿el empleado E tuvo entrada el día D, y a qué hora?
+
+- Por (sede, mes local): cada empleado que marcó ocupa una posición; por día,
+  un bitmap (int de Python) con las posiciones que tuvieron entrada y un
+  array('H') con el minuto local de la primera (0xFFFF = sin entrada). Un mes
+  de 500 empleados ocupa ~35 KB.
+- Se arma bajo demanda desde `jornada` (entrada de cada turno, ya en fecha local
+  de la sede; índice sede/fecha) en el primario, y queda en memoria por worker
+  con tope INDICE_LLEGADAS_MESES (LRU).
+- Se mantiene con los eventos `registro` (marcación directa y aprobación
+  manual, app.utils.eventos). Marcar es idempotente (bit + mínimo), así que los
+  eventos que llegan mientras se carga un mes se reaplican al terminar.
+  `sede` (cambio de zona), `usuario` (rol) y la reconexión del LISTEN lo vacían.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models.jornada import Jornada
+from app.models.usuario import Usuario
+from app.utils.tiempo import a_local, local_sql, rango_fechas, zonas_sede
+
+MAX_MESES = int(os.getenv("INDICE_LLEGADAS_MESES", "600"))
+SIN_ENTRADA = 0xFFFF
+
+
+class _Mes:
+    __slots__ = ("posiciones", "usuarios", "bits", "minutos")
+
+    def __init__(self):
+        self.posiciones: dict[str, int] = {}
+        self.usuarios: list[str] = []
+        self.bits: dict[date, int] = {}
+        self.minutos: dict[date, array] = {}
+
+    def marcar(self, usuario_id: str, fecha: date, minuto: int) -> None:
+        i = self.posiciones.get(usuario_id)
+        if i is None:
+            i = self.posiciones[usuario_id] = len(self.usuarios)
+            self.usuarios.append(usuario_id)
+        mins = self.minutos.setdefault(fecha, array("H"))
+        if len(mins) <= i:
+            mins.extend([SIN_ENTRADA] * (i + 1 - len(mins)))
+        self.bits[fecha] = self.bits.get(fecha, 0) | (1 << i)
+        if minuto < mins[i]:
+            mins[i] = minuto
+
+
+class IndiceLlegadas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (sede_id, año, mes) -> _Mes
+        self._meses: OrderedDict[tuple, _Mes] = OrderedDict()
+        # Meses cargándose: eventos recibidos mientras tanto, para reaplicar
+        self._cargando: dict[tuple, list] = {}
+        self._cargas: dict[tuple, threading.Lock] = {}
+
+    def _cargar(self, sede_id: str, anio: int, mes: int) -> _Mes:
+        desde, hasta = rango_fechas("month", date(anio, mes, 1))
+        local = local_sql(func.min(Jornada.entrada_at), zonas_sede.nombre(sede_id))
+        db = SessionLocal()
+        try:
+            filas = (
+                db.query(
+                    Jornada.usuario_id,
+                    Jornada.fecha,
+                    func.extract("hour", local) * 60 + func.extract("minute", local),
+                )
+                .join(Usuario, Usuario.usuario_id == Jornada.usuario_id)
+                .filter(
+                    Jornada.sede_id == sede_id,
+                    Jornada.fecha >= desde,
+                    Jornada.fecha < hasta,
+                    Jornada.entrada_at.isnot(None),
+                    func.upper(func.coalesce(Usuario.rol, "")).notin_(["ADMIN", "SUPERADMIN"]),
+                )
+                .group_by(Jornada.usuario_id, Jornada.fecha)
+                .all()
+            )
+        finally:
+            db.close()
+        m = _Mes()
+        for uid, fecha, minuto in filas:
+            m.marcar(str(uid), fecha, int(minuto))
+        return m
+
+    def mes(self, sede_id, anio: int, mes: int) -> _Mes:
+        clave = (str(sede_id), anio, mes)
+        with self._lock:
+            m = self._meses.get(clave)
+            if m is not None:
+                self._meses.move_to_end(clave)
+                return m
+            carga = self._cargas.setdefault(clave, threading.Lock())
+
+        with carga:
+            with self._lock:
+                m = self._meses.get(clave)
+                if m is not None:
+                    return m
+                self._cargando[clave] = []
+            try:
+                m = self._cargar(clave[0], anio, mes)
+            finally:
+                with self._lock:
+                    pendientes = self._cargando.pop(clave, [])
+            with self._lock:
+                self._cargas.pop(clave, None)
+                if pendientes is None:
+                    # Invalidado durante la carga: se responde, pero no se guarda.
+                    return m
+                for uid, fecha, minuto in pendientes:
+                    m.marcar(uid, fecha, minuto)
+                self._meses[clave] = m
+                while len(self._meses) > MAX_MESES:
+                    self._meses.popitem(last=False)
+            return m
+
+    def aplicar(self, sede_id, datos: dict) -> None:
+        """Evento `registro` (app.utils.eventos): solo entradas de empleados."""
+        if not sede_id or (datos.get("tipo") or "").lower() != "entrada" or not datos.get("empleado", True):
+            return
+        uid, ts = datos.get("usuario_id"), datos.get("timestamp_registro")
+        if not uid or not ts:
+            return
+        local = a_local(datetime.fromisoformat(ts), zonas_sede.nombre(sede_id))
+        fecha = local.date()
+        clave = (str(sede_id), fecha.year, fecha.month)
+        minuto = local.hour * 60 + local.minute
+        with self._lock:
+            m = self._meses.get(clave)
+            if m is not None:
+                m.marcar(uid, fecha, minuto)
+            elif self._cargando.get(clave) is not None:
+                self._cargando[clave].append((uid, fecha, minuto))
+
+    def invalidar(self, sede_id=None) -> None:
+        with self._lock:
+            if sede_id is None:
+                self._meses.clear()
+            else:
+                for clave in [c for c in self._meses if c[0] == str(sede_id)]:
+                    del self._meses[clave]
+            # Cargas en curso: pueden haber leído la zona anterior, no se guardan.
+            for clave in self._cargando:
+                if sede_id is None or clave[0] == str(sede_id):
+                    self._cargando[clave] = None
+
+    def matriz(
+        self, sede_id, anio: int, mes: int, usuarios: list[str], limites: dict[tuple[str, date], tuple[int, bool]]
+    ) -> dict:
+        """Empleados × días del mes: minuto de la primera entrada (None si no hubo) y conteos.
+
+        `limites`: (usuario, fecha) -> (minuto límite de tardanza desde las 00:00
+        de esa fecha, puede pasar de 1440; si ya venció) de su turno esperado
+        (app.utils.turnos). Sin turno ese día no hay tardanza ni falta, y un
+        turno no vencido todavía no es falta.
+        """
+        m = self.mes(sede_id, anio, mes)
+        desde, hasta = rango_fechas("month", date(anio, mes, 1))
+        dias = [desde + timedelta(days=i) for i in range((hasta - desde).days)]
+        with self._lock:
+            por_dia = [(m.bits.get(d, 0), m.minutos.get(d)) for d in dias]
+            posiciones = {uid: m.posiciones.get(uid) for uid in usuarios}
+        # Solo los empleados pedidos (asignados a la sede + visitantes del mes)
+        filtro = 0
+        for i in posiciones.values():
+            if i is not None:
+                filtro |= 1 << i
+
+        filas = {}
+        for uid, i in posiciones.items():
+            fila = []
+            for bits, mins in por_dia:
+                fila.append(mins[i] if i is not None and (bits >> i) & 1 else None)
+            filas[uid] = fila
+        totales = []
+        for j, d in enumerate(dias):
+            presentes = por_dia[j][0] & filtro
+            tarde = esperados = faltas = 0
+            for uid in usuarios:
+                turno = limites.get((uid, d))
+                if turno is None:
+                    continue
+                limite, vencido = turno
+                esperados += 1
+                minuto = filas[uid][j]
+                if minuto is None:
+                    faltas += vencido
+                elif minuto > limite:
+                    tarde += 1
+            totales.append(
+                {"asistidos": presentes.bit_count(), "tarde": tarde, "esperados": esperados, "faltas": faltas}
+            )
+        return {"dias": dias, "filas": filas, "totales": totales}
+
+    def usuarios_del_mes(self, sede_id, anio: int, mes: int) -> list[str]:
+        m = self.mes(sede_id, anio, mes)
+        with self._lock:
+            return list(m.usuarios)
+
+
+llegadas = IndiceLlegadas()
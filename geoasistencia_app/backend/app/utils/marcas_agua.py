@@ -0,0 +1,72 @@
+"""GET condicional con ETags derivados de marcas de agua de los datos.
+
+- La tabla `marca_agua` (v0008) lleva un contador por (tipo, clave) que suben
+  los triggers en cada escritura: sede, usuarios por sede, registros por sede y
+  por usuario.
+- `condicional(request, db, ambitos, *extra)` suma los contadores del ámbito
+  (lectura por PK) y arma el ETag con esa suma + ruta/query + `extra` (lo demás
+  que cambia la respuesta: usuario, rol, la fecha local de hoy en los dashboards). Si coincide con
+  If-None-Match responde 304 sin ejecutar la consulta principal.
+- La marca se lee ANTES que los datos y en la misma sesión (réplica incluida):
+  si una escritura entra entre ambas lecturas el ETag queda viejo y el siguiente
+  GET descarga de nuevo; nunca se confirma con 304 un contenido desactualizado.
+
+Ámbitos: lista de (tipo, clave); clave None = todas las claves de ese tipo
+(SUPERADMIN sin filtro de sede).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+
+from fastapi import Request, Response
+from sqlalchemy import String, and_, column, func, or_, select, table
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.orm import Session
+
+# private: la respuesta depende del token. no-cache: guardar, pero revalidar siempre.
+CACHE_CONTROL = "private, no-cache"
+
+_marca = table("marca_agua", column("tipo", String), column("clave", UUID(as_uuid=False)), column("version"))
+
+log = logging.getLogger(__name__)
+
+
+def version(db: Session, ambitos: list[tuple[str, object]]) -> int | None:
+    """Suma de los contadores del ámbito (None si la tabla aún no existe)."""
+    condiciones = [
+        _marca.c.tipo == tipo if clave is None else and_(_marca.c.tipo == tipo, _marca.c.clave == str(clave))
+        for tipo, clave in ambitos
+    ]
+    try:
+        return db.execute(select(func.coalesce(func.sum(_marca.c.version), 0)).where(or_(*condiciones))).scalar()
+    except ProgrammingError:
+        # Sin `db migrar`: se responde siempre completo.
+        db.rollback()
+        log.warning("marca_agua no disponible; ETags desactivados", exc_info=True)
+        return None
+
+
+def _coincide(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # El middleware de compresión puede haberlo convertido en débil (W/).
+    return etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+
+
+def condicional(request: Request, db: Session, ambitos: list[tuple[str, object]], *extra) -> tuple[dict, Response | None]:
+    """(cabeceras para la respuesta, 304 listo si el cliente ya tiene esta versión)."""
+    v = version(db, ambitos)
+    if v is None:
+        return {}, None
+
+    base = "|".join([request.url.path, str(sorted(request.query_params.multi_items())), str(v), *map(str, extra)])
+    etag = '"' + hashlib.blake2b(base.encode(), digest_size=12).hexdigest() + '"'
+    cabeceras = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _coincide(request.headers.get("if-none-match"), etag):
+        return cabeceras, Response(status_code=304, headers=cabeceras)
+    return cabeceras, None
@@ -0,0 +1,106 @@
+"""Métricas en formato de texto Prometheus (sin dependencias extra).
+
+`/metrics` (app.main) publica aquí el estado del pool de conexiones para poder
+dimensionarlo: si `geo_db_pool_checked_out` roza size + overflow y crece
+`geo_db_pool_wait_seconds`, faltan conexiones (o sobran workers).
+
+Acceso (`autorizar`): `METRICS_TOKEN` (Prometheus `authorization: credentials`,
+cabecera `Authorization: Bearer <token>`) y/o `METRICS_IPS` (IPs o redes CIDR
+separadas por comas, contra la IP del socket). Basta con cumplir una. Sin
+ninguna de las dos, `/metrics` responde 404. Detrás de un proxy en el mismo
+host todas las peticiones llegan desde 127.0.0.1: usar el token.
+"""
+
+from __future__ import annotations
+
+import hmac
+import ipaddress
+import os
+
+from fastapi import HTTPException, Request
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "").strip()
+METRICS_IPS = tuple(
+    ipaddress.ip_network(red.strip(), strict=False)
+    for red in os.getenv("METRICS_IPS", "").split(",")
+    if red.strip()
+)
+
+# (métrica, clave en pool_stats, tipo, ayuda)
+_POOL = (
+    ("geo_db_pool_size", "size", "gauge", "Conexiones persistentes configuradas en el pool."),
+    ("geo_db_pool_max_overflow", "max_overflow", "gauge", "Conexiones extra permitidas sobre pool_size."),
+    ("geo_db_pool_checked_out", "checked_out", "gauge", "Conexiones en uso."),
+    ("geo_db_pool_checked_in", "checked_in", "gauge", "Conexiones libres en el pool."),
+    ("geo_db_pool_overflow", "overflow", "gauge", "Conexiones de overflow abiertas (negativo: aún sin abrir)."),
+    ("geo_db_pool_timeouts_total", "timeouts_total", "counter", "Checkouts que agotaron pool_timeout."),
+    ("geo_db_pool_wait_seconds_max", "wait_seconds_max", "gauge", "Mayor espera observada desde el arranque."),
+)
+
+
+def autorizar(request: Request) -> None:
+    """HTTPException salvo que la petición traiga el token o venga de una IP permitida."""
+    if not METRICS_TOKEN and not METRICS_IPS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if METRICS_TOKEN:
+        esquema, _, token = request.headers.get("authorization", "").partition(" ")
+        if esquema.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), METRICS_TOKEN.encode()):
+            return
+    if METRICS_IPS and request.client is not None:
+        try:
+            ip = ipaddress.ip_address(request.client.host)
+        except ValueError:
+            ip = None
+        if ip is not None and any(ip in red for red in METRICS_IPS):
+            return
+    raise HTTPException(status_code=403, detail="No autorizado")
+
+
+def _linea(nombre: str, valor, etiquetas: dict | None = None) -> str:
+    if etiquetas:
+        lbl = ",".join(f'{k}="{v}"' for k, v in etiquetas.items())
+        return f"{nombre}{{{lbl}}} {valor}"
+    return f"{nombre} {valor}"
+
+
+def metricas_pool(pools: dict[str, dict]) -> list[str]:
+    """`pools`: {nombre_engine: pool_stats(engine)}. Cada familia va agrupada."""
+    pid = os.getpid()
+    out = []
+    for metrica, clave, tipo, ayuda in _POOL:
+        out += [f"# HELP {metrica} {ayuda}", f"# TYPE {metrica} {tipo}"]
+        for nombre, stats in pools.items():
+            out.append(_linea(metrica, stats[clave], {"pid": pid, "engine": nombre}))
+
+    out += [
+        "# HELP geo_db_pool_wait_seconds Espera para obtener una conexión del pool.",
+        "# TYPE geo_db_pool_wait_seconds histogram",
+    ]
+    for nombre, stats in pools.items():
+        lbl = {"pid": pid, "engine": nombre}
+        for limite, n in stats["wait_buckets"]:
+            out.append(_linea("geo_db_pool_wait_seconds_bucket", n, {**lbl, "le": limite}))
+        out.append(_linea("geo_db_pool_wait_seconds_bucket", stats["checkouts_total"], {**lbl, "le": "+Inf"}))
+        out.append(_linea("geo_db_pool_wait_seconds_sum", round(stats["wait_seconds_sum"], 6), lbl))
+        out.append(_linea("geo_db_pool_wait_seconds_count", stats["checkouts_total"], lbl))
+    return out
+
+
+def metricas_periodos(estado: dict) -> list[str]:
+    """Caché de periodos cerrados (app.utils.periodos): aciertos, fallos y entradas."""
+    lbl = {"pid": os.getpid()}
+    return [
+        "# HELP geo_cache_periodos_hits_total Consultas de periodos cerrados servidas desde memoria.",
+        "# TYPE geo_cache_periodos_hits_total counter",
+        _linea("geo_cache_periodos_hits_total", estado["aciertos"], lbl),
+        "# HELP geo_cache_periodos_misses_total Consultas de periodos cerrados que fueron a la base.",
+        "# TYPE geo_cache_periodos_misses_total counter",
+        _linea("geo_cache_periodos_misses_total", estado["fallos"], lbl),
+        "# HELP geo_cache_periodos_entries Periodos guardados.",
+        "# TYPE geo_cache_periodos_entries gauge",
+        _linea("geo_cache_periodos_entries", estado["entradas"], lbl),
+    ]
+
+
+def render(*bloques: list[str]) -> str:
+    return "\n".join(linea for bloque in bloques for linea in bloque) + "\n"
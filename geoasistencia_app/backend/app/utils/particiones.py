@@ -0,0 +1,343 @@
+"""Particionado mensual de `registro_asistencia`.
+
+- La tabla se particiona por RANGE sobre `timestamp_registro` (UTC naive),
+  una partición por mes + una partición DEFAULT de seguridad.
+- `crear_particiones` pre-crea meses futuros (idempotente). Si la DEFAULT ya
+  tiene filas de ese mes, se mueven a la nueva partición antes de adjuntarla.
+- `migrar_a_particionada` convierte una BD existente sin bloquear las marcaciones:
+  tabla sombra particionada + trigger espejo + backfill por lotes (keyset por PK)
+  + intercambio de nombres en una transacción corta.
+- `verificar_pruning` ejecuta EXPLAIN sobre las consultas reales de admin.py y
+  comprueba que solo se lean las particiones del rango pedido.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection, Engine
+
+
+TABLA = "registro_asistencia"
+SOMBRA = "registro_asistencia_nueva"
+LEGACY = "registro_asistencia_legacy"
+DEFAULT = "registro_asistencia_pdefault"
+
+# Filas antiguas sin timestamp (no debería haber) van a la partición DEFAULT.
+_TS_NULO = "'epoch'::timestamp"
+
+
+def _sumar_meses(d: date, meses: int) -> date:
+    idx = d.year * 12 + (d.month - 1) + meses
+    return date(idx // 12, idx % 12 + 1, 1)
+
+
+def nombre_particion(mes: date) -> str:
+    return f"{TABLA}_p{mes.year:04d}_{mes.month:02d}"
+
+
+def _relkind(conn: Connection, tabla: str) -> str | None:
+    return conn.execute(
+        text(
+            "SELECT c.relkind FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema() AND c.relname = :t"
+        ),
+        {"t": tabla},
+    ).scalar()
+
+
+def es_particionada(conn: Connection) -> bool:
+    return _relkind(conn, TABLA) == "p"
+
+
+def crear_particion_mes(conn: Connection, mes: date, padre: str = TABLA) -> str:
+    """Crea (si no existe) la partición del mes `mes` bajo `padre`."""
+    ini = mes.replace(day=1)
+    fin = _sumar_meses(ini, 1)
+    nombre = nombre_particion(ini)
+    if _relkind(conn, nombre) is not None:
+        return nombre
+
+    rango = {"ini": datetime(ini.year, ini.month, 1), "fin": datetime(fin.year, fin.month, 1)}
+    hay_en_default = _relkind(conn, DEFAULT) is not None and conn.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT} "
+            "WHERE timestamp_registro >= :ini AND timestamp_registro < :fin)"
+        ),
+        rango,
+    ).scalar()
+
+    if not hay_en_default:
+        conn.execute(
+            text(
+                f"CREATE TABLE {nombre} PARTITION OF {padre} "
+                f"FOR VALUES FROM ('{ini.isoformat()}') TO ('{fin.isoformat()}')"
+            )
+        )
+        return nombre
+
+    # La DEFAULT tiene filas de ese mes: se mueven a una tabla suelta y luego
+    # se adjunta (ATTACH falla si la DEFAULT conserva filas del rango).
+    conn.execute(text(f"CREATE TABLE {nombre} (LIKE {padre} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(
+        text(
+            f"WITH movidas AS (DELETE FROM {DEFAULT} "
+            "WHERE timestamp_registro >= :ini AND timestamp_registro < :fin RETURNING *) "
+            f"INSERT INTO {nombre} SELECT * FROM movidas"
+        ),
+        rango,
+    )
+    conn.execute(
+        text(
+            f"ALTER TABLE {padre} ATTACH PARTITION {nombre} "
+            f"FOR VALUES FROM ('{ini.isoformat()}') TO ('{fin.isoformat()}')"
+        )
+    )
+    return nombre
+
+
+def crear_particiones(conn: Connection, desde: date, meses: int, padre: str = TABLA) -> list[str]:
+    """Crea `meses` particiones consecutivas a partir del mes de `desde`."""
+    ini = desde.replace(day=1)
+    return [crear_particion_mes(conn, _sumar_meses(ini, i), padre) for i in range(max(0, meses))]
+
+
+def asegurar_particiones_futuras(engine: Engine, meses_adelante: int = 3) -> list[str]:
+    """Pre-crea las particiones del mes actual y de los próximos `meses_adelante`.
+
+    Pensado para ejecutarse periódicamente (cron / `python manage.py particiones crear`).
+    """
+    with engine.begin() as conn:
+        if not es_particionada(conn):
+            return []
+        return crear_particiones(conn, datetime.utcnow().date(), meses_adelante + 1)
+
+
+# ----------------------
+# MIGRACIÓN ONLINE (tabla existente sin particionar)
+# ----------------------
+
+
+def _columnas(conn: Connection, tabla: str) -> list[str]:
+    rows = conn.execute(
+        text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :t "
+            "ORDER BY ordinal_position"
+        ),
+        {"t": tabla},
+    ).all()
+    return [r[0] for r in rows]
+
+
+def preparar_sombra(conn: Connection) -> None:
+    """Crea la tabla sombra particionada y el trigger que le replica las escrituras."""
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {SOMBRA} (LIKE {TABLA} INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (timestamp_registro)"
+        )
+    )
+    conn.execute(text(f"ALTER TABLE {SOMBRA} ALTER COLUMN timestamp_registro SET NOT NULL"))
+    existe_pk = conn.execute(
+        text("SELECT 1 FROM pg_constraint WHERE conname = :n"), {"n": f"{SOMBRA}_pkey"}
+    ).first()
+    if not existe_pk:
+        conn.execute(text(f"ALTER TABLE {SOMBRA} ADD CONSTRAINT {SOMBRA}_pkey PRIMARY KEY (registro_id, timestamp_registro)"))
+        conn.execute(
+            text(
+                f"ALTER TABLE {SOMBRA} ADD CONSTRAINT registro_asistencia_usuario_id_fkey "
+                "FOREIGN KEY (usuario_id) REFERENCES usuario (usuario_id)"
+            )
+        )
+        conn.execute(
+            text(
+                f"ALTER TABLE {SOMBRA} ADD CONSTRAINT registro_asistencia_sede_id_fkey "
+                "FOREIGN KEY (sede_id) REFERENCES sede (sede_id)"
+            )
+        )
+
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT} PARTITION OF {SOMBRA} DEFAULT"))
+    min_ts = conn.execute(text(f"SELECT min(timestamp_registro) FROM {TABLA}")).scalar()
+    desde = (min_ts or datetime.utcnow()).date().replace(day=1)
+    hoy = datetime.utcnow().date().replace(day=1)
+    meses = (hoy.year - desde.year) * 12 + (hoy.month - desde.month) + 4
+    crear_particiones(conn, desde, meses, padre=SOMBRA)
+
+    # Trigger espejo: todo lo que se escriba en la tabla vieja durante el
+    # backfill llega también a la sombra. (registro_asistencia es append-only;
+    # UPDATE se trata como DELETE + INSERT.)
+    conn.execute(
+        text(
+            f"""
+            CREATE OR REPLACE FUNCTION {TABLA}_espejo() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM {SOMBRA} WHERE registro_id = OLD.registro_id;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    NEW.timestamp_registro := COALESCE(NEW.timestamp_registro, {_TS_NULO});
+                    INSERT INTO {SOMBRA} SELECT NEW.* ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+    )
+    conn.execute(text(f"DROP TRIGGER IF EXISTS {TABLA}_espejo_trg ON {TABLA}"))
+    conn.execute(
+        text(
+            f"CREATE TRIGGER {TABLA}_espejo_trg AFTER INSERT OR UPDATE OR DELETE ON {TABLA} "
+            f"FOR EACH ROW EXECUTE FUNCTION {TABLA}_espejo()"
+        )
+    )
+
+
+def backfill(engine: Engine, lote: int = 5000, log=print) -> int:
+    """Copia la tabla vieja a la sombra en lotes cortos (una transacción por lote)."""
+    with engine.connect() as conn:
+        cols = _columnas(conn, TABLA)
+    cols_sql = ", ".join(cols)
+    sel_sql = ", ".join(
+        f"COALESCE(timestamp_registro, {_TS_NULO}) AS timestamp_registro" if c == "timestamp_registro" else c
+        for c in cols
+    )
+    sql = text(
+        f"""
+        WITH lote AS (
+            SELECT {sel_sql} FROM {TABLA}
+            WHERE registro_id > :ultimo
+            ORDER BY registro_id
+            LIMIT :n
+        ), ins AS (
+            INSERT INTO {SOMBRA} ({cols_sql}) SELECT {cols_sql} FROM lote
+            ON CONFLICT DO NOTHING
+        )
+        SELECT count(*), (SELECT registro_id FROM lote ORDER BY registro_id DESC LIMIT 1) FROM lote
+        """
+    )
+
+    ultimo = "00000000-0000-0000-0000-000000000000"
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            n, ultimo_lote = conn.execute(sql, {"ultimo": ultimo, "n": int(lote)}).one()
+        if not n:
+            break
+        total += n
+        ultimo = str(ultimo_lote)
+        log(f"  backfill: {total} filas copiadas")
+    return total
+
+
+def intercambiar(engine: Engine, lock_timeout: str = "5s") -> None:
+    """Swap de nombres en una transacción corta. La tabla vieja queda como *_legacy."""
+    with engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}'"))
+        conn.execute(text(f"LOCK TABLE {TABLA} IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {TABLA}_espejo_trg ON {TABLA}"))
+        conn.execute(text(f"ALTER TABLE {TABLA} RENAME TO {LEGACY}"))
+        conn.execute(text(f"ALTER INDEX IF EXISTS {TABLA}_pkey RENAME TO {LEGACY}_pkey"))
+        conn.execute(text(f"ALTER TABLE {SOMBRA} RENAME TO {TABLA}"))
+        conn.execute(text(f"ALTER INDEX {SOMBRA}_pkey RENAME TO {TABLA}_pkey"))
+        conn.execute(text(f"DROP FUNCTION IF EXISTS {TABLA}_espejo()"))
+
+
+def migrar_a_particionada(engine: Engine, lote: int = 5000, log=print) -> bool:
+    """Convierte `registro_asistencia` en tabla particionada. Idempotente.
+
+    Devuelve False si la tabla ya estaba particionada.
+    """
+    with engine.begin() as conn:
+        if es_particionada(conn):
+            return False
+        log("1/3 preparando tabla sombra particionada + trigger espejo")
+        preparar_sombra(conn)
+
+    log("2/3 copiando datos existentes")
+    backfill(engine, lote=lote, log=log)
+
+    log("3/3 intercambiando tablas")
+    intercambiar(engine)
+    log(f"OK. La tabla anterior queda como {LEGACY} (bórrala cuando verifiques los datos).")
+    return True
+
+
+# ----------------------
+# VERIFICACIÓN DE PARTITION PRUNING
+# ----------------------
+
+
+def _relaciones_plan(nodo: dict) -> set[str]:
+    rels = set()
+    if nodo.get("Relation Name"):
+        rels.add(nodo["Relation Name"])
+    for hijo in nodo.get("Plans", []) or []:
+        rels |= _relaciones_plan(hijo)
+    return rels
+
+
+def _particiones_esperadas(start_utc: datetime, end_utc: datetime) -> set[str]:
+    esperadas = set()
+    mes = start_utc.date().replace(day=1)
+    while datetime(mes.year, mes.month, 1) < end_utc:
+        esperadas.add(nombre_particion(mes))
+        mes = _sumar_meses(mes, 1)
+    return esperadas
+
+
+def _explain(db, query) -> set[str]:
+    compiled = query.statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}
+    )
+    raw = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    plan = raw if isinstance(raw, list) else json.loads(raw)
+    return {r for r in _relaciones_plan(plan[0]["Plan"]) if r.startswith(f"{TABLA}_p")}
+
+
+def verificar_pruning(db, sede_id: str | None = None) -> list[dict]:
+    """EXPLAIN de las consultas de admin.py que filtran por rango de fechas.
+
+    Cada resultado indica qué particiones lee el plan; `ok` es False si aparece
+    alguna partición fuera del rango (o la DEFAULT, que siempre debería podarse
+    mientras existan las particiones de los meses consultados).
+    """
+    from app.routes.admin import (
+        _asistencias_rango_query,
+        _entradas_rango_query,
+        _registros_dia_query,
+        _utc_bounds_for_local_day,
+        _utc_bounds_for_local_range,
+    )
+
+    hoy = datetime.utcnow().date()
+    hace_un_anio = (hoy.replace(day=1) - timedelta(days=365)).isoformat()
+    casos = []
+
+    s, e = _utc_bounds_for_local_day(0)
+    casos.append(("dashboard (hoy)", _registros_dia_query(db, s, e, sede_id), s, e))
+    for rango, fecha in (("week", None), ("month", None), ("month", hace_un_anio)):
+        _, _, _, s, e = _utc_bounds_for_local_range(rango, fecha)
+        etiqueta = f"{rango} {fecha or 'actual'}"
+        casos.append((f"asistencias/list + reporte ({etiqueta})", _asistencias_rango_query(db, s, e, sede_id), s, e))
+        casos.append((f"asistencias/resumen ({etiqueta})", _entradas_rango_query(db, s, e, sede_id), s, e))
+
+    resultados = []
+    for nombre, query, s, e in casos:
+        leidas = _explain(db, query)
+        esperadas = _particiones_esperadas(s, e)
+        resultados.append(
+            {
+                "consulta": nombre,
+                "desde": s.isoformat(),
+                "hasta": e.isoformat(),
+                "particiones": sorted(leidas),
+                "ok": leidas <= esperadas,
+            }
+        )
+    return resultados
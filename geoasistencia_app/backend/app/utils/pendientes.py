@@ -0,0 +1,95 @@
+"""Contadores en memoria de solicitudes manuales PENDIENTES por sede.
+
+El panel consulta `/admin/manual-asistencias/count` para el badge de
+notificaciones; con estos contadores responde sin tocar la BD.
+
+- Se ajustan tras el commit al crear (`/asistencia/registro` modo manual) y al
+  decidir (individual o en lote).
+- Un hilo por proceso los reconcilia contra la BD cada
+  PENDIENTES_RECONCILIAR_S segundos (un solo GROUP BY): corrige lo que hayan
+  escrito otros workers o cualquier desfase.
+- Mientras no haya una reconciliación reciente (arranque, BD caída), `listo()`
+  es False y el endpoint vuelve al COUNT en la BD.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models.solicitud_asistencia_manual import SolicitudAsistenciaManual
+from app.models.usuario import Usuario
+
+RECONCILIAR_S = float(os.getenv("PENDIENTES_RECONCILIAR_S", "30"))
+
+log = logging.getLogger(__name__)
+
+
+class ContadorPendientes:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_sede: dict[str, int] = {}
+        self._reconciliado = 0.0
+        self._hilo: threading.Thread | None = None
+        self._parar = threading.Event()
+
+    def listo(self) -> bool:
+        # 3 periodos sin reconciliar: preferimos el COUNT a un valor dudoso.
+        return self._reconciliado > 0 and time.monotonic() - self._reconciliado < 3 * RECONCILIAR_S
+
+    def total(self, sede_id: str | None = None) -> int:
+        with self._lock:
+            if sede_id:
+                return self._por_sede.get(str(sede_id), 0)
+            return sum(self._por_sede.values())
+
+    def ajustar(self, sede_id, delta: int) -> None:
+        with self._lock:
+            clave = str(sede_id)
+            self._por_sede[clave] = max(0, self._por_sede.get(clave, 0) + delta)
+
+    def reconciliar(self) -> None:
+        db = SessionLocal()
+        try:
+            filas = (
+                db.query(SolicitudAsistenciaManual.sede_id, func.count())
+                .join(Usuario, Usuario.usuario_id == SolicitudAsistenciaManual.usuario_id)
+                .filter(
+                    SolicitudAsistenciaManual.estado == "PENDIENTE",
+                    Usuario.rol.notin_(["ADMIN", "SUPERADMIN"]),
+                )
+                .group_by(SolicitudAsistenciaManual.sede_id)
+                .all()
+            )
+        finally:
+            db.close()
+        with self._lock:
+            self._por_sede = {str(sede_id): n for sede_id, n in filas}
+            self._reconciliado = time.monotonic()
+
+    def _bucle(self) -> None:
+        while not self._parar.is_set():
+            try:
+                self.reconciliar()
+            except Exception:
+                log.warning("No se pudo reconciliar contadores de pendientes", exc_info=True)
+            self._parar.wait(RECONCILIAR_S)
+
+    def iniciar(self) -> None:
+        """Arranca el hilo de reconciliación (una vez por worker, tras el fork)."""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="pendientes-reconciliar", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._parar.set()
+
+
+pendientes = ContadorPendientes()
@@ -0,0 +1,96 @@
+"""Caché permanente de periodos cerrados (resumen, reporte mensual, días pasados del dashboard).
+
+- Un periodo local [desde, hasta) está cerrado cuando `hasta` ya pasó en todas
+  las zonas del alcance. Su resultado solo cambia con una marcación que cae
+  dentro (aprobación manual tardía, lote) o con cambios de sede/usuarios, así
+  que se guarda en memoria sin TTL, por worker, con tope CACHE_PERIODOS_MAX
+  (LRU).
+- Clave: (endpoint, sede o None, …parámetros que cambian la respuesta). Cada
+  entrada recuerda su sede y su rango para invalidar solo lo afectado.
+- Invalida app.utils.eventos, en todos los workers:
+  `registro` -> entradas de esa sede (y globales) que contienen su fecha local;
+  `sede` (geocerca, zona, nombre) -> todo lo de la sede; `usuario` (altas,
+  documentos, cambios de sede) y al (re)conectar el LISTEN -> todo; `turno`
+  (turnos y feriados) -> lo de la sede, o todo si el cambio es global.
+- Lecturas en curso durante una invalidación no se guardan: `generacion()` se
+  toma antes de consultar y `guardar()` descarta si cambió o si la invalidación
+  es más reciente que el lag tolerado de la réplica.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from app.database import DB_READ_MAX_LAG_S
+from app.utils.tiempo import hoy, zonas_sede
+
+MAX_ENTRADAS = int(os.getenv("CACHE_PERIODOS_MAX", "2000"))
+# Tras invalidar, la réplica puede seguir sin la escritura hasta DB_READ_MAX_LAG_S.
+GRACIA_S = DB_READ_MAX_LAG_S + 5
+
+
+def cerrado(hasta: date, zonas: tuple[str, ...]) -> bool:
+    """True si el periodo que termina (exclusivo) en `hasta` ya terminó en todas las zonas."""
+    return hasta <= min(hoy(z) for z in zonas)
+
+
+class CachePeriodos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # clave -> (sede_id | None, desde, hasta, valor)
+        self._entradas: OrderedDict[tuple, tuple] = OrderedDict()
+        self._generacion = 0
+        self._invalidado = 0.0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def generacion(self) -> int:
+        return self._generacion
+
+    def obtener(self, clave: tuple):
+        with self._lock:
+            e = self._entradas.get(clave)
+            if e is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return e[3]
+
+    def guardar(self, clave: tuple, sede_id, desde: date, hasta: date, valor, generacion: int) -> None:
+        with self._lock:
+            if generacion != self._generacion or time.monotonic() - self._invalidado < GRACIA_S:
+                return
+            self._entradas[clave] = (str(sede_id) if sede_id else None, desde, hasta, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > MAX_ENTRADAS:
+                self._entradas.popitem(last=False)
+
+    def estado(self) -> dict:
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": len(self._entradas)}
+
+    def invalidar(self, sede_id=None, fecha: date | None = None) -> None:
+        """Sin argumentos, todo. Con sede, sus entradas y las globales; con fecha, solo las que la contienen."""
+        # Una marcación de hoy (el caso normal) no cae en ningún periodo cerrado.
+        if fecha is not None and fecha >= hoy(zonas_sede.nombre(sede_id)):
+            return
+        with self._lock:
+            sede = str(sede_id) if sede_id else None
+            if sede is None and fecha is None:
+                self._entradas.clear()
+            else:
+                for clave, (s, desde, hasta, _) in list(self._entradas.items()):
+                    if s is not None and sede is not None and s != sede:
+                        continue
+                    if fecha is not None and not desde <= fecha < hasta:
+                        continue
+                    del self._entradas[clave]
+            self._generacion += 1
+            self._invalidado = time.monotonic()
+
+
+periodos = CachePeriodos()
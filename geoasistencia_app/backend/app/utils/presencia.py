@@ -0,0 +1,222 @@
+"""Presencia en vivo: quién está ahora en cada sede (seguridad, evacuación).
+
+- Tabla `presencia` (v0010): última marcación de cada usuario. `guardar(db, regs)`
+  la actualiza en la misma transacción que la marcación, solo si el evento es
+  más nuevo que el guardado.
+- En memoria, por worker: usuario -> última marcación, y por sede los usuarios
+  cuya última marcación es una entrada. `ocupacion(sede)` es O(1).
+- Se mantiene con los eventos `registro` que ya reparte app.utils.eventos
+  (después del commit, a todos los workers) y un hilo que cada
+  PRESENCIA_RECONCILIAR_S recarga la tabla (también al arrancar) y combina por
+  marca de tiempo: gana siempre el evento más reciente.
+- Una entrada sin salida deja de contar a las JORNADA_MAX_HORAS (quien olvidó
+  marcar la salida no aparece días después en la lista de evacuación).
+- Mientras no haya una recarga reciente, `listo()` es False y los endpoints
+  consultan la tabla.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.presencia import Presencia
+from app.models.usuario import Usuario
+from app.utils.jornadas import MAX_HORAS
+
+RECONCILIAR_S = float(os.getenv("PRESENCIA_RECONCILIAR_S", "60"))
+
+log = logging.getLogger(__name__)
+
+
+def vigencia() -> datetime:
+    """Entradas anteriores a esto ya no cuentan como presentes."""
+    return datetime.utcnow() - timedelta(hours=MAX_HORAS)
+
+
+class EstadoPresencia:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # usuario_id -> {"sede_id", "tipo", "ts", "codigo", "dentro_geocerca", "empleado"}
+        self._ultimo: dict[str, dict] = {}
+        # sede_id -> {usuario_id: marcación}, en orden de llegada (ts creciente)
+        self._dentro: dict[str, dict[str, dict]] = {}
+        self._reconciliado = 0.0
+        self._hilo: threading.Thread | None = None
+        self._parar = threading.Event()
+
+    def listo(self) -> bool:
+        return self._reconciliado > 0 and time.monotonic() - self._reconciliado < 3 * RECONCILIAR_S
+
+    # --- tabla ---
+
+    def guardar(self, db: Session, registros) -> None:
+        """UPSERT de la última marcación de cada usuario (no hace commit)."""
+        filas = {}
+        for r in registros:
+            tipo = (r.tipo or "").lower()
+            if r.usuario_id is None or tipo not in {"entrada", "salida"}:
+                continue
+            previa = filas.get(r.usuario_id)
+            if previa is None or r.timestamp_registro >= previa["timestamp_registro"]:
+                filas[r.usuario_id] = {
+                    "usuario_id": r.usuario_id,
+                    "sede_id": r.sede_id,
+                    "registro_id": r.registro_id,
+                    "tipo": tipo,
+                    "timestamp_registro": r.timestamp_registro,
+                    "dentro_geocerca": r.dentro_geocerca,
+                    "updated_at": datetime.utcnow(),
+                }
+        if not filas:
+            return
+        stmt = pg_insert(Presencia).values(list(filas.values()))
+        nuevo = stmt.excluded
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Presencia.usuario_id],
+                set_={
+                    "sede_id": nuevo.sede_id,
+                    "registro_id": nuevo.registro_id,
+                    "tipo": nuevo.tipo,
+                    "timestamp_registro": nuevo.timestamp_registro,
+                    "dentro_geocerca": nuevo.dentro_geocerca,
+                    "updated_at": nuevo.updated_at,
+                },
+                where=Presencia.timestamp_registro <= nuevo.timestamp_registro,
+            )
+        )
+
+    # --- lectura ---
+
+    def _purgar(self, sede_id: str) -> dict[str, dict]:
+        # Las más antiguas van primero: se cortan hasta la primera vigente.
+        dentro = self._dentro.get(sede_id, {})
+        limite = vigencia()
+        while dentro:
+            uid, m = next(iter(dentro.items()))
+            if m["ts"] >= limite:
+                break
+            del dentro[uid]
+        return dentro
+
+    def ocupacion(self, sede_id) -> int:
+        with self._lock:
+            return len(self._purgar(str(sede_id)))
+
+    def ocupacion_total(self) -> dict[str, int]:
+        with self._lock:
+            return {sede: len(self._purgar(sede)) for sede in list(self._dentro)}
+
+    def presentes(self, sede_id) -> list[tuple[str, dict]]:
+        with self._lock:
+            return list(self._purgar(str(sede_id)).items())
+
+    # --- escritura ---
+
+    def _colocar(self, uid: str, m: dict) -> None:
+        previa = self._ultimo.get(uid)
+        if previa is not None:
+            if previa["ts"] > m["ts"]:
+                return
+            self._dentro.get(previa["sede_id"], {}).pop(uid, None)
+        self._ultimo[uid] = m
+        if m["tipo"] != "entrada" or not m["sede_id"]:
+            return
+        dentro = self._dentro.setdefault(m["sede_id"], {})
+        ultimo_ts = next(reversed(dentro.values()))["ts"] if dentro else None
+        dentro[uid] = m
+        if ultimo_ts is not None and m["ts"] < ultimo_ts:
+            # Llegó fuera de orden (sync offline): se reordena esa sede.
+            self._dentro[m["sede_id"]] = dict(sorted(dentro.items(), key=lambda kv: kv[1]["ts"]))
+
+    def aplicar(self, sede_id, datos: dict) -> None:
+        """Evento `registro` (app.utils.eventos)."""
+        uid = datos.get("usuario_id")
+        tipo = (datos.get("tipo") or "").lower()
+        ts = datos.get("timestamp_registro")
+        if not uid or not ts or tipo not in {"entrada", "salida"}:
+            return
+        m = {
+            "sede_id": str(sede_id) if sede_id else None,
+            "tipo": tipo,
+            "ts": datetime.fromisoformat(ts),
+            "codigo": datos.get("usuario_codigo"),
+            "dentro_geocerca": datos.get("dentro_geocerca"),
+            "empleado": datos.get("empleado", True),
+        }
+        with self._lock:
+            self._colocar(uid, m)
+
+    def reconciliar(self) -> None:
+        limite = vigencia()
+        db = SessionLocal()
+        try:
+            filas = (
+                db.query(
+                    Presencia.usuario_id,
+                    Presencia.sede_id,
+                    Presencia.tipo,
+                    Presencia.timestamp_registro,
+                    Presencia.dentro_geocerca,
+                    Usuario.documento,
+                    func.upper(func.coalesce(Usuario.rol, "")).notin_(["ADMIN", "SUPERADMIN"]),
+                )
+                .join(Usuario, Usuario.usuario_id == Presencia.usuario_id)
+                .filter(Presencia.timestamp_registro >= limite)
+                .all()
+            )
+        finally:
+            db.close()
+
+        cargado = {
+            str(uid): {
+                "sede_id": str(sede_id) if sede_id else None,
+                "tipo": tipo,
+                "ts": ts,
+                "codigo": codigo,
+                "dentro_geocerca": dentro,
+                "empleado": empleado,
+            }
+            for uid, sede_id, tipo, ts, dentro, codigo, empleado in filas
+        }
+        with self._lock:
+            # Eventos aplicados mientras corría la consulta: gana el más reciente.
+            for uid, m in self._ultimo.items():
+                if m["ts"] >= limite and (uid not in cargado or m["ts"] > cargado[uid]["ts"]):
+                    cargado[uid] = m
+            self._ultimo = {}
+            self._dentro = {}
+            for uid, m in sorted(cargado.items(), key=lambda kv: kv[1]["ts"]):
+                self._colocar(uid, m)
+            self._reconciliado = time.monotonic()
+
+    def _bucle(self) -> None:
+        while not self._parar.is_set():
+            try:
+                self.reconciliar()
+            except Exception:
+                log.warning("No se pudo recargar la presencia", exc_info=True)
+            self._parar.wait(RECONCILIAR_S)
+
+    def iniciar(self) -> None:
+        """Arranca el hilo de recarga (una vez por worker, tras el fork)."""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="presencia-recargar", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._parar.set()
+
+
+presencia = EstadoPresencia()
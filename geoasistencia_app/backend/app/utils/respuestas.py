@@ -0,0 +1,26 @@
+"""Respuestas de listados: filas de columnas -> dicts -> orjson.
+
+- Los listados seleccionan solo las columnas que devuelven (sin hidratar
+  entidades ORM ni leer JSONB como device_info/evidence).
+- `como_dicts(CLAVES, rows)` empareja cada fila (tupla de SQLAlchemy) con sus claves.
+- `JSONRapido` serializa con orjson, que entiende UUID y datetime: sin
+  str()/isoformat() por fila y sin el jsonable_encoder de FastAPI.
+
+bench/list_rows.py mide el coste por fila de ambos caminos.
+"""
+
+from __future__ import annotations
+
+import orjson
+from fastapi.responses import Response
+
+
+class JSONRapido(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+def como_dicts(claves: tuple[str, ...], rows) -> list[dict]:
+    return [dict(zip(claves, r)) for r in rows]
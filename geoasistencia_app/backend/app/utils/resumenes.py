@@ -0,0 +1,261 @@
+"""Resumen de asistencia por periodo largo (trimestre, año, rango libre) desde agregados.
+
+- `resumen_periodo` (v0012) guarda por sede totales de cada día, semana (lunes)
+  y mes locales. Las filas `day` se recalculan desde registro_asistencia y
+  jornada en el mismo refresco que las franjas de ese día (app.utils.franjas:
+  mismos días pendientes, mismo lock); las `week` y `month` que contienen esos
+  días se vuelven a sumar desde las `day`.
+- `elegir_grano(desde, hasta)`: día, semana o mes, el más fino con el que la
+  serie no pasa de MAX_PUNTOS cubetas. Un año sale en semanas, cinco en meses.
+- `tarde` se evalúa contra el turno esperado de cada empleado ese día y las
+  faltas (turnos esperados y vencidos sin entrada) salen de
+  `geo_turnos_esperados` contra `jornada`, en SQL (app.utils.turnos).
+- `serie()` lee las cubetas completas de su grano y completa las de los bordes
+  (rango libre que no empieza/termina en lunes o día 1) con filas `day`: como
+  mucho MAX_PUNTOS + 62 filas por sede, sin importar cuánta historia haya.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Session
+
+from app.utils.tiempo import sumar_meses
+
+GRANOS = ("day", "week", "month")
+MAX_PUNTOS = 62
+CAMPOS = ("entradas", "salidas", "fuera_geocerca", "asistidos", "tarde", "jornadas", "segundos")
+
+_SUMAS = ", ".join(f"sum({c})" for c in CAMPOS)
+
+_RECALCULAR_DIAS = text(
+    f"""
+    WITH r AS (
+        SELECT r.usuario_id, r.tipo::text AS tipo, r.dentro_geocerca,
+               timezone(:tz, timezone('UTC', r.timestamp_registro)) AS l
+        FROM registro_asistencia r
+        JOIN usuario u ON u.usuario_id = r.usuario_id
+        WHERE r.sede_id = :sede AND r.timestamp_registro >= :ini AND r.timestamp_registro < :fin
+          AND r.tipo IN ('entrada', 'salida')
+          AND upper(coalesce(u.rol, '')) NOT IN ('ADMIN', 'SUPERADMIN')
+    ), por_empleado AS (
+        SELECT usuario_id, l::date AS fecha,
+               count(*) FILTER (WHERE tipo = 'entrada') AS e,
+               count(*) FILTER (WHERE tipo = 'salida') AS s,
+               count(*) FILTER (WHERE dentro_geocerca IS FALSE) AS f,
+               min(l) FILTER (WHERE tipo = 'entrada') AS primera
+        FROM r GROUP BY usuario_id, l::date
+    ), d AS (
+        -- tarde: después del límite de su turno esperado ese día (app.utils.turnos)
+        SELECT p.fecha, sum(p.e) AS e, sum(p.s) AS s, sum(p.f) AS f,
+               count(p.primera) AS a, count(*) FILTER (WHERE p.primera > t.limite_tarde) AS t
+        FROM por_empleado p
+        LEFT JOIN geo_turnos_esperados(:desde_f, :hasta_f) t
+               ON t.usuario_id = p.usuario_id AND t.fecha = p.fecha
+        GROUP BY p.fecha
+    ), j AS (
+        SELECT j.fecha, count(*) AS n, sum(j.segundos) AS seg
+        FROM jornada j
+        JOIN usuario u ON u.usuario_id = j.usuario_id
+        WHERE j.sede_id = :sede AND j.estado = 'CERRADA' AND j.fecha = ANY(:fechas)
+          AND upper(coalesce(u.rol, '')) NOT IN ('ADMIN', 'SUPERADMIN')
+        GROUP BY j.fecha
+    )
+    INSERT INTO resumen_periodo (sede_id, grano, inicio, {", ".join(CAMPOS)})
+    SELECT :sede, 'day', fecha, coalesce(d.e, 0), coalesce(d.s, 0), coalesce(d.f, 0),
+           coalesce(d.a, 0), coalesce(d.t, 0), coalesce(j.n, 0), coalesce(j.seg, 0)
+    FROM d FULL JOIN j USING (fecha)
+    WHERE fecha = ANY(:fechas)
+    """
+).bindparams(bindparam("fechas", type_=ARRAY(Date)), bindparam("sede", type_=UUID(as_uuid=False)))
+
+_BORRAR = text(
+    """
+    DELETE FROM resumen_periodo
+    WHERE sede_id = :sede AND (
+        (grano = 'day' AND inicio = ANY(:fechas))
+        OR (grano = 'week' AND inicio = ANY(:semanas))
+        OR (grano = 'month' AND inicio = ANY(:meses))
+    )
+    """
+).bindparams(
+    bindparam("fechas", type_=ARRAY(Date)),
+    bindparam("semanas", type_=ARRAY(Date)),
+    bindparam("meses", type_=ARRAY(Date)),
+    bindparam("sede", type_=UUID(as_uuid=False)),
+)
+
+# Semanas y meses: suma de sus filas `day` (ya recalculadas)
+_SUBIR = text(
+    f"""
+    INSERT INTO resumen_periodo (sede_id, grano, inicio, {", ".join(CAMPOS)})
+    SELECT :sede, p.grano, p.inicio, {_SUMAS}
+    FROM unnest(CAST(:granos AS text[]), :inicios, :fines) AS p(grano, inicio, fin)
+    JOIN resumen_periodo d
+      ON d.sede_id = :sede AND d.grano = 'day' AND d.inicio >= p.inicio AND d.inicio < p.fin
+    GROUP BY p.grano, p.inicio
+    """
+).bindparams(
+    bindparam("inicios", type_=ARRAY(Date)),
+    bindparam("fines", type_=ARRAY(Date)),
+    bindparam("sede", type_=UUID(as_uuid=False)),
+)
+
+
+def inicio_cubeta(grano: str, d: date) -> date:
+    if grano == "week":
+        return d - timedelta(days=d.weekday())
+    if grano == "month":
+        return d.replace(day=1)
+    return d
+
+
+def fin_cubeta(grano: str, inicio: date) -> date:
+    if grano == "week":
+        return inicio + timedelta(days=7)
+    if grano == "month":
+        return sumar_meses(inicio, 1)
+    return inicio + timedelta(days=1)
+
+
+def _cubetas(grano: str, desde: date, hasta: date) -> list[date]:
+    out = []
+    c = inicio_cubeta(grano, desde)
+    while c < hasta:
+        out.append(c)
+        c = fin_cubeta(grano, c)
+    return out
+
+
+def elegir_grano(desde: date, hasta: date) -> str | None:
+    """Grano más fino con el que [desde, hasta) cabe en MAX_PUNTOS cubetas (None: rango demasiado largo)."""
+    for grano in GRANOS:
+        if len(_cubetas(grano, desde, hasta)) <= MAX_PUNTOS:
+            return grano
+    return None
+
+
+def recalcular(db: Session, sede_id: str, tz: str, fechas: list[date], ini, fin) -> None:
+    """Rehace las filas `day` de `fechas` (contiguas, ordenadas) y las semanas/meses que las contienen.
+
+    `ini`/`fin`: límites UTC de las fechas en la zona de la sede. No hace commit.
+    """
+    semanas = sorted({inicio_cubeta("week", f) for f in fechas})
+    meses = sorted({inicio_cubeta("month", f) for f in fechas})
+    params = {"sede": sede_id, "fechas": fechas}
+    db.execute(_BORRAR, {**params, "semanas": semanas, "meses": meses})
+    db.execute(
+        _RECALCULAR_DIAS,
+        {**params, "tz": tz, "ini": ini, "fin": fin, "desde_f": fechas[0], "hasta_f": fechas[-1] + timedelta(days=1)},
+    )
+    periodos = [("week", s) for s in semanas] + [("month", m) for m in meses]
+    db.execute(
+        _SUBIR,
+        {
+            "sede": sede_id,
+            "granos": [g for g, _ in periodos],
+            "inicios": [i for _, i in periodos],
+            "fines": [fin_cubeta(g, i) for g, i in periodos],
+        },
+    )
+
+
+def _leer(db: Session, sede_id, desde: date, hasta: date, grano: str, clave: str) -> list:
+    """Sumas de [desde, hasta) agrupadas por `clave` (inicio | sede_id).
+
+    Las cubetas de `grano` enteras dentro del rango se leen en su grano; los
+    bordes, desde las filas `day`.
+    """
+    completas = [c for c in _cubetas(grano, desde, hasta) if c >= desde and fin_cubeta(grano, c) <= hasta]
+    ini_c = completas[0] if completas else hasta
+    fin_c = fin_cubeta(grano, completas[-1]) if completas else hasta
+
+    filtro_sede = "AND sede_id = CAST(:sede AS uuid)" if sede_id else ""
+    return db.execute(
+        text(
+            f"""
+            SELECT {clave}, {_SUMAS}
+            FROM resumen_periodo
+            WHERE grano = :grano AND inicio >= :ini_c AND inicio < :fin_c {filtro_sede}
+            GROUP BY {clave}
+            UNION ALL
+            SELECT {clave}, {_SUMAS}
+            FROM resumen_periodo
+            WHERE grano = 'day' {filtro_sede}
+              AND ((inicio >= :desde AND inicio < :ini_c) OR (inicio >= :fin_c AND inicio < :hasta))
+            GROUP BY {clave}
+            """
+        ),
+        {
+            "grano": grano,
+            "ini_c": ini_c,
+            "fin_c": fin_c,
+            "desde": desde,
+            "hasta": hasta,
+            "sede": str(sede_id) if sede_id else None,
+        },
+    ).all()
+
+
+def _faltas(db: Session, sede_id, desde: date, hasta: date, clave: str) -> dict:
+    """{fecha | sede_id: (esperados, faltas)} en [desde, hasta): turnos esperados sin jornada con entrada.
+
+    Por sede asignada del empleado; la entrada cuenta en cualquier sede. Un
+    turno cuyo límite de tardanza todavía no pasó es esperado, no falta.
+    """
+    filtro_sede = "WHERE e.sede_id = CAST(:sede AS uuid)" if sede_id else ""
+    filas = db.execute(
+        text(
+            f"""
+            SELECT e.{clave}, count(*),
+                   count(*) FILTER (WHERE e.limite_utc < :ahora AND NOT EXISTS (
+                       SELECT 1 FROM jornada j
+                       WHERE j.usuario_id = e.usuario_id AND j.fecha = e.fecha AND j.entrada_at IS NOT NULL
+                   ))
+            FROM geo_turnos_esperados(:desde, :hasta) e
+            {filtro_sede}
+            GROUP BY e.{clave}
+            """
+        ),
+        {"desde": desde, "hasta": hasta, "ahora": datetime.utcnow(), "sede": str(sede_id) if sede_id else None},
+    ).all()
+    return {k: (int(n), int(f)) for k, n, f in filas}
+
+
+def serie(db: Session, sede_id, desde: date, hasta: date, grano: str) -> list[dict]:
+    """Totales por cubeta de `grano` en [desde, hasta); las cubetas de los bordes se recortan al rango."""
+    cubetas = _cubetas(grano, desde, hasta)
+    totales = {c: dict.fromkeys(CAMPOS + ("esperados", "faltas"), 0) for c in cubetas}
+    for inicio, *valores in _leer(db, sede_id, desde, hasta, grano, "inicio"):
+        t = totales[inicio_cubeta(grano, inicio)]
+        for campo, v in zip(CAMPOS, valores):
+            t[campo] += int(v or 0)
+    for fecha, (n, f) in _faltas(db, sede_id, desde, hasta, "fecha").items():
+        t = totales[inicio_cubeta(grano, fecha)]
+        t["esperados"] += n
+        t["faltas"] += f
+
+    out = []
+    for c in cubetas:
+        ini = max(c, desde)
+        fin = min(fin_cubeta(grano, c), hasta)
+        out.append({"desde": ini.isoformat(), "hasta": (fin - timedelta(days=1)).isoformat(), "dias": (fin - ini).days, **totales[c]})
+    return out
+
+
+def por_sede(db: Session, sede_id, desde: date, hasta: date) -> dict[str, dict]:
+    """Totales de [desde, hasta) por sede (sede de la marcación), desde las filas mensuales + bordes."""
+    vacio = dict.fromkeys(CAMPOS + ("esperados", "faltas"), 0)
+    out = {}
+    for s, *valores in _leer(db, sede_id, desde, hasta, "month", "sede_id"):
+        t = out.setdefault(str(s), dict(vacio))
+        for campo, v in zip(CAMPOS, valores):
+            t[campo] += int(v or 0)
+    for s, (n, f) in _faltas(db, sede_id, desde, hasta, "sede_id").items():
+        t = out.setdefault(str(s), dict(vacio))
+        t["esperados"] += n
+        t["faltas"] += f
+    return out
@@ -0,0 +1,173 @@
+"""Hora local por sede y límites UTC de días/semanas/meses locales.
+
+- Cada sede tiene `zona_horaria` (IANA, p. ej. America/Guayaquil; v0007).
+- Los límites UTC de un rango local se calculan una vez por (zona, desde, hasta)
+  y quedan cacheados. Se pasan como constantes para que Postgres pode las
+  particiones mensuales.
+- Las filas se pasan a hora local en SQL (`local_sql`, AT TIME ZONE) y no con
+  un astimezone() por fila en Python.
+- Un alcance con varias zonas (SUPERADMIN sin sede) filtra por la unión de los
+  límites y además por la fecha local de cada fila (`fecha_local_sql`).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import Date, cast, func, literal_column
+
+from app.database import SessionLocal
+from app.models.sede import Sede
+
+TZ_DEFECTO = os.getenv("TZ_DEFECTO", "America/Guayaquil")
+TTL_S = float(os.getenv("ZONAS_SEDE_TTL_S", "300"))
+
+RANGOS = ("day", "week", "month")
+RANGOS_LARGOS = ("quarter", "year")  # solo endpoints servidos desde agregados
+
+log = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def zona(nombre: str | None = None) -> ZoneInfo:
+    try:
+        return ZoneInfo(nombre or TZ_DEFECTO)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(TZ_DEFECTO)
+
+
+def zona_valida(nombre: str) -> bool:
+    try:
+        ZoneInfo(nombre)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def hoy(tz_nombre: str | None = None) -> date:
+    return datetime.now(zona(tz_nombre)).date()
+
+
+@lru_cache(maxsize=4096)
+def limites_utc(tz_nombre: str | None, desde: date, hasta: date) -> tuple[datetime, datetime]:
+    """[desde 00:00, hasta 00:00) local -> UTC naive (como se guarda en la BD)."""
+    tz = zona(tz_nombre)
+    ini = datetime(desde.year, desde.month, desde.day, tzinfo=tz)
+    fin = datetime(hasta.year, hasta.month, hasta.day, tzinfo=tz)
+    return (
+        ini.astimezone(timezone.utc).replace(tzinfo=None),
+        fin.astimezone(timezone.utc).replace(tzinfo=None),
+    )
+
+
+def limites_alcance(zonas: tuple[str, ...], desde: date, hasta: date) -> tuple[datetime, datetime]:
+    """Límites que cubren el rango en todas las zonas del alcance."""
+    pares = [limites_utc(z, desde, hasta) for z in zonas]
+    return min(p[0] for p in pares), max(p[1] for p in pares)
+
+
+def sumar_meses(d: date, meses: int) -> date:
+    """Primer día del mes `meses` después del de `d`."""
+    n = d.year * 12 + d.month - 1 + meses
+    return date(n // 12, n % 12 + 1, 1)
+
+
+def rango_fechas(range_name: str, base: date) -> tuple[date, date]:
+    """(inicio, fin exclusivo) del día, semana (lunes a domingo), mes, trimestre o año de `base`."""
+    if range_name == "day":
+        return base, base + timedelta(days=1)
+    if range_name == "week":
+        inicio = base - timedelta(days=base.weekday())
+        return inicio, inicio + timedelta(days=7)
+    if range_name == "month":
+        inicio = base.replace(day=1)
+        return inicio, sumar_meses(inicio, 1)
+    if range_name == "quarter":
+        inicio = date(base.year, (base.month - 1) // 3 * 3 + 1, 1)
+        return inicio, sumar_meses(inicio, 3)
+    if range_name == "year":
+        return date(base.year, 1, 1), date(base.year + 1, 1, 1)
+    raise ValueError(range_name)
+
+
+def a_local(dt_value: datetime | None, tz_nombre: str | None = None) -> datetime | None:
+    """Una sola fecha a hora local (naive = UTC). Para listados, usar local_sql."""
+    if dt_value is None:
+        return None
+    if dt_value.tzinfo is None:
+        dt_value = dt_value.replace(tzinfo=timezone.utc)
+    return dt_value.astimezone(zona(tz_nombre))
+
+
+def a_utc_naive(dt_value: datetime | None, tz_nombre: str | None = None) -> datetime | None:
+    """Normaliza a UTC naive; un valor naive se interpreta como hora local de la zona."""
+    if dt_value is None:
+        return None
+    if dt_value.tzinfo is None:
+        dt_value = dt_value.replace(tzinfo=zona(tz_nombre))
+    return dt_value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def local_sql(col, tz_col):
+    """`col` (timestamp UTC sin zona) como timestamp local de `tz_col`, en SQL.
+
+    'UTC' va como literal (no parámetro) para que la expresión sea idéntica en
+    SELECT y GROUP BY.
+    """
+    return func.timezone(tz_col, func.timezone(literal_column("'UTC'"), col))
+
+
+def fecha_local_sql(col, tz_col):
+    return cast(local_sql(col, tz_col), Date)
+
+
+class ZonasSede:
+    """sede_id -> zona_horaria en memoria (se recarga al editar sedes o tras TTL_S)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._zonas: dict[str, str] = {}
+        self._cargado = 0.0
+        self._vigente = False
+
+    def invalidar(self) -> None:
+        self._vigente = False
+
+    def _mapa(self) -> dict[str, str]:
+        if self._vigente and time.monotonic() - self._cargado < TTL_S:
+            return self._zonas
+        with self._lock:
+            if not (self._vigente and time.monotonic() - self._cargado < TTL_S):
+                db = SessionLocal()
+                try:
+                    filas = db.query(Sede.sede_id, Sede.zona_horaria).all()
+                except Exception:
+                    # Sin BD (o sin v0007) se sigue con lo último conocido.
+                    log.warning("No se pudieron cargar las zonas horarias de sedes", exc_info=True)
+                    return self._zonas
+                finally:
+                    db.close()
+                self._zonas = {str(s): (z or TZ_DEFECTO) for s, z in filas}
+                self._cargado = time.monotonic()
+                self._vigente = True
+        return self._zonas
+
+    def nombre(self, sede_id) -> str:
+        if not sede_id:
+            return TZ_DEFECTO
+        return self._mapa().get(str(sede_id), TZ_DEFECTO)
+
+    def de_alcance(self, sede_id=None) -> tuple[str, ...]:
+        """Zonas que abarca una consulta: la de la sede o todas (sin filtro de sede)."""
+        if sede_id:
+            return (self.nombre(sede_id),)
+        return tuple(sorted(set(self._mapa().values()))) or (TZ_DEFECTO,)
+
+
+zonas_sede = ZonasSede()
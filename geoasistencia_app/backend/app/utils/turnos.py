@@ -0,0 +1,64 @@
+"""Turnos y feriados: qué días y a qué hora se espera a cada empleado.
+
+- Tablas `turno` y `feriado` (v0013). La función SQL `geo_turnos_esperados`
+  (v0014) devuelve una fila por (empleado, fecha laborable) con la hora de
+  entrada y el límite de tardanza como timestamp (local y UTC: un turno cerca
+  de la medianoche vence al día siguiente); resuelve la precedencia
+  empleado > sede > global, la vigencia y los feriados.
+- Falta: turno esperado sin entrada cuyo límite (`limite_utc`) ya pasó; hoy,
+  antes de la hora de entrada, todavía no lo es.
+- Tardanzas y faltas se calculan en la base con un JOIN contra esa serie
+  (`esperados()`); no se traen filas a Python para aplicar reglas.
+- Un cambio de turnos o feriados que cae en el pasado deja pendientes los días
+  afectados del resumen por periodo (se recalculan al leerlos) y, por el evento
+  `turno`, invalida el caché de periodos cerrados de los workers.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import Date, DateTime, Time, bindparam, column, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+
+def esperados(desde: date, hasta: date):
+    """FROM con los turnos esperados de [desde, hasta).
+
+    Columnas: usuario_id, sede_id (asignada al empleado), fecha, hora_entrada,
+    limite_tarde (timestamp local, se compara con la hora local de la entrada) y
+    limite_utc (el mismo en UTC naive, como `datetime.utcnow()`).
+    """
+    return func.geo_turnos_esperados(desde, hasta).table_valued(
+        column("usuario_id", UUID(as_uuid=True)),
+        column("sede_id", UUID(as_uuid=True)),
+        column("fecha", Date),
+        column("hora_entrada", Time),
+        column("limite_tarde", DateTime),
+        column("limite_utc", DateTime),
+    ).render_derived(name="esperado", with_types=False)
+
+
+_PENDIENTES = text(
+    """
+    INSERT INTO franja_pendiente (sede_id, fecha)
+    SELECT sede_id, inicio
+    FROM resumen_periodo
+    WHERE grano = 'day' AND inicio >= :desde AND inicio <= :hasta
+      AND (CAST(:sede AS uuid) IS NULL OR sede_id = CAST(:sede AS uuid))
+    ON CONFLICT DO NOTHING
+    """
+).bindparams(bindparam("sede", type_=UUID(as_uuid=False)))
+
+
+def marcar_recalculo(db: Session, sede_id, desde: date | None, hasta: date | None = None) -> None:
+    """Deja pendientes los días ya resumidos de [desde, hasta] de la sede (None: todas). No hace commit."""
+    db.execute(
+        _PENDIENTES,
+        {
+            "sede": str(sede_id) if sede_id else None,
+            "desde": desde or date(1970, 1, 1),
+            "hasta": hasta or date(9999, 12, 31),
+        },
+    )
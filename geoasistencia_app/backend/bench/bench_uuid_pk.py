@@ -0,0 +1,149 @@
+"""Benchmark: PK uuid4 (aleatoria) vs UUIDv7 (ordenada por tiempo).
+
+Crea dos tablas sintéticas con la forma de registro_asistencia en un esquema
+temporal, inserta N filas en lotes con COPY usando los mismos generadores que
+la app y reporta:
+- throughput de inserción (filas/s), total y del último 10% (cuando el índice ya
+  no cabe en shared_buffers es donde uuid4 se degrada),
+- tamaño final de la tabla y del índice de la PK,
+- densidad media de las hojas del índice (pgstattuple, si la extensión está disponible).
+
+Uso (desde backend/, con la BD de docker-compose levantada):
+  python bench/bench_uuid_pk.py                 # 10M filas
+  python bench/bench_uuid_pk.py --filas 1000000 --lote 50000
+"""
+
+import argparse
+import io
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.database import engine  # noqa: E402
+from app.utils.ids import uuid7  # noqa: E402
+
+ESQUEMA = "bench_uuid"
+
+
+def _ddl(cur, tabla: str) -> None:
+    cur.execute(f"DROP TABLE IF EXISTS {ESQUEMA}.{tabla}")
+    cur.execute(
+        f"""
+        CREATE TABLE {ESQUEMA}.{tabla} (
+            registro_id uuid PRIMARY KEY,
+            usuario_id uuid NOT NULL,
+            sede_id uuid NOT NULL,
+            tipo varchar NOT NULL,
+            timestamp_registro timestamp without time zone NOT NULL,
+            latitud double precision,
+            longitud double precision,
+            dentro_geocerca boolean
+        )
+        """
+    )
+
+
+def _lote(gen, n: int, t0: datetime, usuarios: list, sede: uuid.UUID) -> io.StringIO:
+    buf = io.StringIO()
+    for i in range(n):
+        ts = t0 + timedelta(milliseconds=i)
+        u = usuarios[i % len(usuarios)]
+        buf.write(f"{gen()}\t{u}\t{sede}\tentrada\t{ts.isoformat()}\t-3.99313\t-79.20422\tt\n")
+    buf.seek(0)
+    return buf
+
+
+def correr(nombre: str, gen, filas: int, lote: int) -> dict:
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        _ddl(cur, nombre)
+        raw.commit()
+
+        usuarios = [uuid.uuid4() for _ in range(1500)]
+        sede = uuid.uuid4()
+        t0 = datetime(2024, 1, 1)
+        cols = "(registro_id, usuario_id, sede_id, tipo, timestamp_registro, latitud, longitud, dentro_geocerca)"
+
+        inicio = time.perf_counter()
+        inicio_cola = None
+        hechas = 0
+        while hechas < filas:
+            n = min(lote, filas - hechas)
+            if inicio_cola is None and hechas >= filas * 0.9:
+                inicio_cola, filas_cola = time.perf_counter(), filas - hechas
+            buf = _lote(gen, n, t0 + timedelta(milliseconds=hechas), usuarios, sede)
+            cur.copy_expert(f"COPY {ESQUEMA}.{nombre} {cols} FROM STDIN", buf)
+            raw.commit()
+            hechas += n
+            print(f"\r  {nombre}: {hechas:,}/{filas:,}", end="", flush=True)
+        fin = time.perf_counter()
+        print()
+
+        cur.execute("SELECT pg_relation_size(%s), pg_relation_size(%s)", (f"{ESQUEMA}.{nombre}", f"{ESQUEMA}.{nombre}_pkey"))
+        tam_tabla, tam_idx = cur.fetchone()
+        densidad = None
+        try:
+            cur.execute("SELECT avg_leaf_density FROM pgstatindex(%s)", (f"{ESQUEMA}.{nombre}_pkey",))
+            densidad = cur.fetchone()[0]
+        except Exception:
+            raw.rollback()
+        return {
+            "nombre": nombre,
+            "filas_s": filas / (fin - inicio),
+            "filas_s_cola": (filas_cola / (fin - inicio_cola)) if inicio_cola else None,
+            "tabla_mb": tam_tabla / 2**20,
+            "indice_mb": tam_idx / 2**20,
+            "densidad_hojas": densidad,
+        }
+    finally:
+        raw.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--lote", type=int, default=100_000)
+    parser.add_argument("--conservar", action="store_true", help="No borrar el esquema al terminar")
+    args = parser.parse_args()
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ESQUEMA}")
+        try:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pgstattuple")
+        except Exception:
+            raw.rollback()
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ESQUEMA}")
+        raw.commit()
+    finally:
+        raw.close()
+
+    resultados = [
+        correr("pk_uuid4", uuid.uuid4, args.filas, args.lote),
+        correr("pk_uuid7", uuid7, args.filas, args.lote),
+    ]
+
+    print(f"\n{'tabla':<10} {'filas/s':>12} {'filas/s 10% final':>18} {'tabla MB':>10} {'índice PK MB':>13} {'densidad hojas':>15}")
+    for r in resultados:
+        cola = f"{r['filas_s_cola']:,.0f}" if r["filas_s_cola"] else "-"
+        dens = f"{r['densidad_hojas']:.1f}%" if r["densidad_hojas"] is not None else "n/d"
+        print(f"{r['nombre']:<10} {r['filas_s']:>12,.0f} {cola:>18} {r['tabla_mb']:>10.1f} {r['indice_mb']:>13.1f} {dens:>15}")
+
+    if not args.conservar:
+        raw = engine.raw_connection()
+        try:
+            raw.cursor().execute(f"DROP SCHEMA {ESQUEMA} CASCADE")
+            raw.commit()
+        finally:
+            raw.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""Coste por fila de una página de listado (500 filas): entidades ORM vs columnas.
+
+- antes: entidades RegistroAsistencia + Usuario + Sede (con device_info JSONB),
+  dict armado a mano con str()/isoformat() y la serialización por defecto de
+  FastAPI (jsonable_encoder + json.dumps).
+- después: tuplas de columnas -> como_dicts -> orjson (app.utils.respuestas).
+
+Sin --db usa filas sintéticas (no necesita Postgres; la hidratación ORM se
+aproxima con el constructor de las entidades). Con --db ejecuta las dos
+consultas de /admin/asistencias/list contra la BD configurada (DB_*) e incluye
+el fetch.
+
+Uso (desde backend/):
+  python bench/list_rows.py
+  python bench/list_rows.py --filas 500 --repeticiones 50 --db
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.models.registro_asistencia import RegistroAsistencia  # noqa: E402
+from app.models.sede import Sede  # noqa: E402
+from app.models.usuario import Usuario  # noqa: E402
+from app.utils.respuestas import JSONRapido, como_dicts  # noqa: E402
+
+CLAVES = (
+    "registro_id", "timestamp_registro", "local_date", "local_time", "tipo", "dentro_geocerca",
+    "modo", "usuario_codigo", "sede_id", "sede_nombre",
+)
+
+
+def _dumps_fastapi(contenido) -> bytes:
+    # Lo que hace FastAPI con un dict devuelto por el endpoint (JSONResponse).
+    return json.dumps(
+        jsonable_encoder(contenido), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _antes(entidades) -> bytes:
+    items = []
+    for r, u, sd in entidades:
+        items.append(
+            {
+                "registro_id": str(r.registro_id),
+                "timestamp_registro": r.timestamp_registro.isoformat() if r.timestamp_registro else None,
+                "local_date": r.timestamp_registro.date().isoformat(),
+                "local_time": r.timestamp_registro.strftime("%H:%M:%S"),
+                "tipo": (r.tipo or "").lower(),
+                "dentro_geocerca": bool(r.dentro_geocerca) if r.dentro_geocerca is not None else None,
+                "modo": r.modo,
+                "usuario_codigo": u.documento,
+                "sede_id": str(r.sede_id) if r.sede_id else None,
+                "sede_nombre": sd.nombre if sd else None,
+            }
+        )
+    return _dumps_fastapi({"total": len(items), "items": items})
+
+
+def _despues(rows) -> bytes:
+    return JSONRapido({"total": len(rows), "items": como_dicts(CLAVES, rows)}).body
+
+
+def _sinteticas(n: int):
+    sede = dict(sede_id=uuid.uuid4(), nombre="Loja Centro", latitud=-3.99313, longitud=-79.20422, radio_metros=120)
+    t0 = datetime(2026, 10, 1, 8, 0, 0)
+    usuarios = [dict(usuario_id=uuid.uuid4(), documento=f"EMP-LOJ-{i:04d}", rol="EMPLEADO") for i in range(50)]
+    base = []
+    for i in range(n):
+        u = usuarios[i % len(usuarios)]
+        ts = t0 + timedelta(minutes=7 * i, microseconds=1234 * i)
+        base.append((u, ts, "entrada" if i % 2 == 0 else "salida", i % 9 != 0))
+
+    def entidades():
+        sd = Sede(**sede)
+        cache_u = {}
+        out = []
+        for u, ts, tipo, dentro in base:
+            uo = cache_u.get(u["documento"]) or cache_u.setdefault(u["documento"], Usuario(**u))
+            r = RegistroAsistencia(
+                registro_id=uuid.uuid4(), usuario_id=u["usuario_id"], sede_id=sede["sede_id"], tipo=tipo,
+                timestamp_registro=ts, latitud=-3.99, longitud=-79.2, dentro_geocerca=dentro, modo="app",
+                device_info={"ua": "Mozilla/5.0 (Linux; Android 14)", "plataforma": "android", "version": "2.3.1"},
+                evidence=None,
+            )
+            out.append((r, uo, sd))
+        return out
+
+    def columnas():
+        return [
+            (uuid.uuid4(), ts, ts.date().isoformat(), ts.strftime("%H:%M:%S"), tipo, dentro, "app",
+             u["documento"], sede["sede_id"], sede["nombre"])
+            for u, ts, tipo, dentro in base
+        ]
+
+    return entidades, columnas
+
+
+def _db(n: int):
+    from app.database import SessionLocal
+    from app.routes import admin
+
+    def entidades():
+        db = SessionLocal()
+        try:
+            return (
+                db.query(RegistroAsistencia, Usuario, Sede)
+                .join(Usuario, Usuario.usuario_id == RegistroAsistencia.usuario_id)
+                .join(Sede, Sede.sede_id == RegistroAsistencia.sede_id)
+                .order_by(RegistroAsistencia.timestamp_registro.desc())
+                .limit(n)
+                .all()
+            )
+        finally:
+            db.close()
+
+    def columnas():
+        db = SessionLocal()
+        try:
+            return (
+                db.query(
+                    RegistroAsistencia.registro_id,
+                    RegistroAsistencia.timestamp_registro,
+                    *admin._hora_local_cols(RegistroAsistencia.timestamp_registro),
+                    admin._minusculas(RegistroAsistencia.tipo),
+                    RegistroAsistencia.dentro_geocerca,
+                    RegistroAsistencia.modo,
+                    Usuario.documento,
+                    RegistroAsistencia.sede_id,
+                    Sede.nombre,
+                )
+                .join(Usuario, Usuario.usuario_id == RegistroAsistencia.usuario_id)
+                .join(Sede, Sede.sede_id == RegistroAsistencia.sede_id)
+                .order_by(RegistroAsistencia.timestamp_registro.desc())
+                .limit(n)
+                .all()
+            )
+        finally:
+            db.close()
+
+    return entidades, columnas
+
+
+def _medir(cargar, serializar, repeticiones: int) -> tuple[float, int]:
+    tiempos = []
+    n = 0
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        filas = cargar()
+        serializar(filas)
+        tiempos.append(time.perf_counter() - t0)
+        n = len(filas)
+    return statistics.median(tiempos), n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--filas", type=int, default=500)
+    ap.add_argument("--repeticiones", type=int, default=30)
+    ap.add_argument("--db", action="store_true", help="consultar la BD configurada en lugar de filas sintéticas")
+    args = ap.parse_args()
+
+    entidades, columnas = (_db if args.db else _sinteticas)(args.filas)
+    antes, n = _medir(entidades, _antes, args.repeticiones)
+    despues, _ = _medir(columnas, _despues, args.repeticiones)
+    if not n:
+        print("Sin filas para medir.")
+        return
+
+    print(f"{n} filas, mediana de {args.repeticiones} repeticiones ({'BD' if args.db else 'sintético'})")
+    print(f"  antes   (entidades ORM + jsonable_encoder): {antes * 1e3:8.2f} ms  {antes / n * 1e6:7.2f} µs/fila")
+    print(f"  después (columnas + orjson)               : {despues * 1e3:8.2f} ms  {despues / n * 1e6:7.2f} µs/fila")
+    print(f"  mejora: x{antes / despues:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Tiempo de arranque de la API.
+
+Mide, sin necesitar Postgres:
+- arranque en frío: intérprete nuevo que importa app.main, crea la app con
+  create_app() (monta los routers) y atiende un GET /health,
+- respawn de worker: fork desde un master con la app precargada (como gunicorn
+  con preload_app) hasta que el hijo responde GET /health,
+- con --importtime, los módulos que más pesan en el import (python -X importtime).
+
+Uso (desde backend/):
+  python bench/startup_time.py
+  python bench/startup_time.py --repeticiones 20 --importtime
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+_FRIO = """
+import time
+t0 = time.perf_counter()
+from app.main import create_app
+app = create_app()
+t1 = time.perf_counter()
+import sys
+sys.path.insert(0, "bench")
+from startup_time import pedir_health
+assert pedir_health(app) == 200
+t2 = time.perf_counter()
+print(f"{t1 - t0:.6f} {t2 - t0:.6f}")
+"""
+
+
+def pedir_health(app) -> int:
+    """GET /health directo sobre ASGI (sin servidor ni httpx)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/health", "raw_path": b"/health",
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000),
+    }
+    estado = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(msg):
+        if msg["type"] == "http.response.start":
+            estado["status"] = msg["status"]
+
+    asyncio.run(app(scope, receive, send))
+    return estado.get("status", 0)
+
+
+def _resumen(nombre: str, muestras: list[float]) -> None:
+    ms = sorted(m * 1000 for m in muestras)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"{nombre:<34} mediana {statistics.median(ms):8.1f} ms   p95 {p95:8.1f} ms   min {ms[0]:8.1f} ms")
+
+
+def arranque_frio(repeticiones: int) -> None:
+    imports, totales, procesos = [], [], []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", _FRIO], cwd=BACKEND, capture_output=True, text=True, check=True
+        ).stdout.split()
+        procesos.append(time.perf_counter() - t0)
+        imports.append(float(out[0]))
+        totales.append(float(out[1]))
+    _resumen("frío: import + create_app()", imports)
+    _resumen("frío: hasta primer /health", totales)
+    _resumen("frío: proceso completo", procesos)
+
+
+def respawn(repeticiones: int) -> None:
+    from app.database import engine
+    from app.main import create_app, precargar
+
+    app = create_app()
+    precargar()
+    muestras = []
+    for _ in range(repeticiones):
+        r, w = os.pipe()
+        t0 = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(r)
+            engine.dispose(close=False)
+            ok = pedir_health(app) == 200
+            os.write(w, b"1" if ok else b"0")
+            os._exit(0)
+        os.close(w)
+        ok = os.read(r, 1) == b"1"
+        muestras.append(time.perf_counter() - t0)
+        os.close(r)
+        os.waitpid(pid, 0)
+        if not ok:
+            raise SystemExit("el worker no respondió /health")
+    _resumen("respawn (fork precargado)", muestras)
+
+
+def importtime(top: int) -> None:
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main; app.main.create_app()"],
+        cwd=BACKEND, capture_output=True, text=True,
+    ).stderr
+    filas = []
+    for linea in err.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        propio, acumulado, modulo = (p.strip() for p in linea[len("import time:"):].split("|"))
+        filas.append((int(acumulado), int(propio), modulo))
+    print("\nmódulos más costosos (acumulado, µs):")
+    for acumulado, propio, modulo in sorted(filas, reverse=True)[:top]:
+        print(f"  {acumulado:>9,}  {propio:>9,}  {modulo}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--importtime", action="store_true")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    arranque_frio(args.repeticiones)
+    if hasattr(os, "fork"):
+        respawn(args.repeticiones)
+    if args.importtime:
+        importtime(args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
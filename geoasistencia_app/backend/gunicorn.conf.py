@@ -0,0 +1,81 @@
+"""Runner de producción: gunicorn + workers uvicorn.
+
+Uso (desde backend/):
+  gunicorn -c gunicorn.conf.py
+
+Variables de entorno:
+  WEB_BIND              dirección (defecto 0.0.0.0:8000)
+  WEB_WORKERS           nº de procesos (defecto: nº de CPUs)
+  WEB_MAX_REQUESTS      recicla cada worker tras N peticiones (0 = nunca)
+  WEB_MAX_REQUESTS_JITTER  aleatoriza el reciclado para no reiniciar todos a la vez
+  WEB_TIMEOUT / WEB_GRACEFUL_TIMEOUT  segundos
+  DB_MAX_CONNECTIONS    presupuesto total de conexiones a Postgres para todos
+                        los workers; se reparte en DB_POOL_SIZE/DB_MAX_OVERFLOW
+                        por worker (salvo que se fijen explícitamente).
+  HASH_PROCESOS         procesos de hashing por worker (importación masiva);
+                        por defecto las CPUs repartidas entre los workers.
+
+La app se carga en el master antes del fork (preload_app): los workers comparten
+copy-on-write el código, los mappers y lo que haga `app.main.precargar()`.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_WORKERS", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+wsgi_app = "app.main:create_app()"
+
+preload_app = True
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "200"))
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def repartir_conexiones(total: int, n_workers: int) -> tuple[int, int]:
+    """(pool_size, max_overflow) por worker para no pasar de `total` conexiones.
+
+    2/3 persistentes y el resto como overflow para picos.
+    """
+    por_worker = max(1, total // max(1, n_workers))
+    pool_size = max(1, (por_worker * 2) // 3)
+    return pool_size, por_worker - pool_size
+
+
+# Tiene que resolverse antes de importar app.database (preload en el master).
+# app.security.hash reparte las CPUs entre los workers con WEB_WORKERS.
+os.environ["WEB_WORKERS"] = str(workers)
+if os.getenv("DB_MAX_CONNECTIONS"):
+    _size, _overflow = repartir_conexiones(int(os.environ["DB_MAX_CONNECTIONS"]), workers)
+    os.environ.setdefault("DB_POOL_SIZE", str(_size))
+    os.environ.setdefault("DB_MAX_OVERFLOW", str(_overflow))
+
+
+def when_ready(server):
+    from app.main import precargar
+
+    precargar()
+    # Lo cargado hasta aquí queda fuera del GC: sin esto, cada recolección en un
+    # worker toca los refcounts/cabeceras de esos objetos y copia sus páginas.
+    gc.freeze()
+    server.log.info(
+        "workers=%s pool_size=%s max_overflow=%s",
+        workers, os.getenv("DB_POOL_SIZE", "5"), os.getenv("DB_MAX_OVERFLOW", "10"),
+    )
+
+
+def post_fork(server, worker):
+    # Las conexiones abiertas en el master (p. ej. durante el preload) no deben
+    # compartirse entre procesos: el worker arranca con el pool vacío.
+    from app.database import engine, read_engine
+
+    engine.dispose(close=False)
+    if read_engine is not None:
+        read_engine.dispose(close=False)
@@ -0,0 +1,164 @@
+"""Comandos de mantenimiento (base de datos y estáticos del frontend).
+
+Uso (desde backend/):
+  python manage.py db migrar [--hasta N]
+  python manage.py db estado
+  python manage.py db verificar
+  python manage.py particiones crear [--meses 3]
+  python manage.py particiones migrar [--lote 5000]
+  python manage.py particiones verificar [--sede-id UUID]
+  python manage.py estaticos comprimir [--dir app/static/web]
+  python manage.py jornadas reconstruir [--usuario-id UUID] [--desde YYYY-MM-DD]
+  python manage.py franjas reconstruir [--desde YYYY-MM-DD]
+  python manage.py humo
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from app.database import SessionLocal, engine_directo
+from app import models  # noqa: F401
+from app import migrations
+from app.utils import estaticos, franjas, humo, jornadas, particiones
+
+
+def cmd_db(args) -> int:
+    engine = engine_directo()
+    if args.accion == "migrar":
+        hechas = migrations.aplicar(engine, hasta=args.hasta)
+        print("✅ Esquema al día" if not hechas else f"✅ Aplicadas: {', '.join(str(v) for v in hechas)}")
+        return 0
+
+    if args.accion == "estado":
+        for m in migrations.estado(engine):
+            marca = m["aplicada_at"].isoformat(timespec="seconds") if m["aplicada_at"] else "pendiente"
+            print(f"{m['version']:04d} {m['nombre']:<40} {marca}")
+        return 0
+
+    # verificar: EXPLAIN de cada migración con índices
+    fallos = 0
+    for r in migrations.verificar(engine):
+        fallos += 0 if r["ok"] else 1
+        estado = "OK  " if r["ok"] else "FAIL"
+        detalle = ", ".join(r["indices"]) or r["motivo"] or ""
+        print(f"{estado} {r['version']:04d} {r['descripcion']}: {detalle}")
+    return 1 if fallos else 0
+
+
+def cmd_particiones(args) -> int:
+    engine = engine_directo()
+    if args.accion == "crear":
+        creadas = particiones.asegurar_particiones_futuras(engine, meses_adelante=args.meses)
+        if not creadas:
+            print("registro_asistencia no está particionada (ejecuta: particiones migrar)")
+            return 1
+        for nombre in creadas:
+            print("✅", nombre)
+        return 0
+
+    if args.accion == "migrar":
+        if not particiones.migrar_a_particionada(engine, lote=args.lote):
+            print("registro_asistencia ya está particionada")
+        particiones.asegurar_particiones_futuras(engine, meses_adelante=args.meses)
+        return 0
+
+    # verificar
+    db = SessionLocal()
+    try:
+        resultados = particiones.verificar_pruning(db, sede_id=args.sede_id)
+    finally:
+        db.close()
+    fallos = 0
+    for r in resultados:
+        estado = "OK  " if r["ok"] else "FAIL"
+        fallos += 0 if r["ok"] else 1
+        print(f"{estado} {r['consulta']}: {', '.join(r['particiones']) or '(ninguna)'}")
+    return 1 if fallos else 0
+
+
+def cmd_estaticos(args) -> int:
+    # comprimir: variantes .br/.gz para StaticPrecomprimido (tras cada build)
+    total = comprimido = 0
+    for ruta, tam, variantes in estaticos.comprimir_directorio(args.dir):
+        total += tam
+        comprimido += min(variantes.values(), default=tam)
+        detalle = " ".join(f"{cod}={n}" for cod, n in variantes.items()) or "sin variante"
+        print(f"{ruta.relative_to(args.dir)}: {tam} -> {detalle}")
+    if total:
+        print(f"✅ {total} bytes -> {comprimido} bytes ({comprimido / total:.0%})")
+    return 0
+
+
+def cmd_jornadas(args) -> int:
+    # reconstruir: rehace la tabla jornada desde registro_asistencia (histórico o tras corregir datos)
+    desde = datetime.fromisoformat(args.desde) if args.desde else None
+    empleados, total = jornadas.reconstruir(usuario_id=args.usuario_id, desde=desde)
+    print(f"✅ {total} jornadas de {empleados} empleados")
+    return 0
+
+
+def cmd_franjas(args) -> int:
+    # reconstruir: franjas y resumen por periodo de todos los días con marcaciones (tras `jornadas reconstruir`)
+    desde = datetime.fromisoformat(args.desde).date() if args.desde else None
+    total = franjas.reconstruir(desde=desde)
+    print(f"✅ {total} días recalculados")
+    return 0
+
+
+def cmd_humo(args) -> int:
+    # GET de las rutas de lectura contra esta base, como SUPERADMIN y como ADMIN
+    resultados = humo.verificar()
+    if not resultados:
+        print("No hay usuarios SUPERADMIN ni ADMIN (ejecuta: python seed.py)")
+        return 1
+    fallos = 0
+    for r in resultados:
+        ok = 0 < r["status"] < 500
+        fallos += 0 if ok else 1
+        print(f"{'OK  ' if ok else 'FAIL'} {r['rol']:<10} {r['status']} {r['ruta']}" + (f"  {r['error']}" if r["error"] else ""))
+    return 1 if fallos else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="manage.py", description="Mantenimiento de GeoAsistencia")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_db = sub.add_parser("db", help="Migraciones versionadas del esquema")
+    p_db.add_argument("accion", choices=["migrar", "estado", "verificar"])
+    p_db.add_argument("--hasta", type=int, default=None, help="Migrar solo hasta esta versión")
+    p_db.set_defaults(func=cmd_db)
+
+    p_part = sub.add_parser("particiones", help="Particiones mensuales de registro_asistencia")
+    p_part.add_argument("accion", choices=["crear", "migrar", "verificar"])
+    p_part.add_argument("--meses", type=int, default=3, help="Meses futuros a pre-crear")
+    p_part.add_argument("--lote", type=int, default=5000, help="Filas por lote en la migración")
+    p_part.add_argument("--sede-id", default=None, help="Sede para las consultas de verificación")
+    p_part.set_defaults(func=cmd_particiones)
+
+    p_est = sub.add_parser("estaticos", help="Estáticos del frontend (precompresión)")
+    p_est.add_argument("accion", choices=["comprimir"])
+    p_est.add_argument("--dir", type=Path, default=Path(__file__).parent / "app" / "static" / "web")
+    p_est.set_defaults(func=cmd_estaticos)
+
+    p_jor = sub.add_parser("jornadas", help="Hoja de horas (tabla jornada)")
+    p_jor.add_argument("accion", choices=["reconstruir"])
+    p_jor.add_argument("--usuario-id", default=None, help="Solo este empleado")
+    p_jor.add_argument("--desde", default=None, help="Solo marcaciones desde esta fecha (UTC); por defecto todo")
+    p_jor.set_defaults(func=cmd_jornadas)
+
+    p_fra = sub.add_parser("franjas", help="Agregado por franjas de 15 min (analítica)")
+    p_fra.add_argument("accion", choices=["reconstruir"])
+    p_fra.add_argument("--desde", default=None, help="Solo días desde esta fecha; por defecto todo")
+    p_fra.set_defaults(func=cmd_franjas)
+
+    p_humo = sub.add_parser("humo", help="GET de las rutas de lectura contra esta base (sin 5xx)")
+    p_humo.set_defaults(func=cmd_humo)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
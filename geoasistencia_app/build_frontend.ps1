@@ -14,4 +14,9 @@ if (Test-Path "backend/app/static/web") { Remove-Item -Recurse -Force "backend/a
 New-Item -ItemType Directory -Force -Path "backend/app/static/web" | Out-Null
 Copy-Item -Recurse -Force "frontend/dist/*" "backend/app/static/web/"
 
+# Variantes .br/.gz que el backend sirve sin comprimir en cada petición
+Push-Location "backend"
+python manage.py estaticos comprimir
+Pop-Location
+
 Write-Host "✅ Frontend compilado y copiado a backend/app/static/web"
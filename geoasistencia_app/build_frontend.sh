@@ -16,4 +16,7 @@ rm -rf backend/app/static/web
 mkdir -p backend/app/static/web
 cp -r frontend/dist/* backend/app/static/web/
 
+# Variantes .br/.gz que el backend sirve sin comprimir en cada petición
+(cd backend && python manage.py estaticos comprimir)
+
 echo "✅ Frontend compilado y copiado a backend/app/static/web"
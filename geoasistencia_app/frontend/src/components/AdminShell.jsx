@@ -1,6 +1,6 @@
-import { useEffect, useState } from "react";
 import { Link, useLocation } from "react-router-dom";
-import { apiGet, getSession } from "../lib/api";
+import { getSession } from "../lib/api";
+import { usePendingManualCount } from "../lib/eventos";
 
 function Item({ to, label, emoji, badge }) {
   const loc = useLocation();
@@ -28,30 +28,7 @@ export default function AdminShell({ title, children }) {
   const s = getSession();
   const role = (s?.rol || "").toUpperCase();
 
-  const [pendingManual, setPendingManual] = useState(0);
-
-  useEffect(() => {
-    if (!s?.token) return;
-    if (!(role === "ADMIN" || role === "SUPERADMIN")) return;
-
-    let alive = true;
-    const load = async () => {
-      try {
-        const r = await apiGet("/admin/manual-asistencias/count?status=pendiente");
-        if (alive) setPendingManual(Number(r?.count || 0));
-      } catch {
-        // ignore
-      }
-    };
-
-    load();
-    const t = setInterval(load, 15000);
-    return () => {
-      alive = false;
-      clearInterval(t);
-    };
-  }, [s?.token, role]);
-
+  const pendingManual = usePendingManualCount(!!s?.token && (role === "ADMIN" || role === "SUPERADMIN"));
 
   return (
     <div className="mx-auto max-w-6xl px-4 py-8">
@@ -1,36 +1,14 @@
-import { useEffect, useState } from 'react'
 import Logo from './Logo'
 import { Link, NavLink } from 'react-router-dom'
-import { apiGet, getSession, logout as doLogout } from '../lib/api'
+import { getSession, logout as doLogout } from '../lib/api'
+import { usePendingManualCount } from '../lib/eventos'
 
 export default function Topbar({ onLogout }) {
   const s = getSession()
   const rol = (s?.rol || '').toUpperCase()
   const dashboardTo = rol === 'EMPLEADO' ? '/employee' : '/admin'
 
-  const [pendingManual, setPendingManual] = useState(0)
-
-  useEffect(() => {
-    if (!s?.token) return
-    if (!(rol === 'ADMIN' || rol === 'SUPERADMIN')) return
-
-    let alive = true
-    const load = async () => {
-      try {
-        const r = await apiGet('/admin/manual-asistencias/count?status=pendiente')
-        if (alive) setPendingManual(Number(r?.count || 0))
-      } catch {
-        // ignore
-      }
-    }
-
-    load()
-    const t = setInterval(load, 15000)
-    return () => {
-      alive = false
-      clearInterval(t)
-    }
-  }, [s?.token, rol])
+  const pendingManual = usePendingManualCount(!!s?.token && (rol === 'ADMIN' || rol === 'SUPERADMIN'))
 
   const linkBase = "rounded-xl px-3 py-2 text-sm font-semibold transition"
   const navCls = ({ isActive }) =>
@@ -0,0 +1,89 @@
+import { useEffect, useState } from 'react'
+import { apiGet } from './api'
+import { loadSession } from './storage'
+
+// Una sola conexión SSE (/admin/eventos) por pestaña, compartida por todos los
+// componentes suscritos. EventSource reconecta solo; si el servidor la cierra
+// del todo (p. ej. token vencido) los componentes vuelven a sondear.
+
+const TIPOS = ['contadores', 'registro', 'solicitud']
+const listeners = new Set()
+let es = null
+
+function abrir() {
+  const s = loadSession()
+  if (!s?.token) return
+  es = new EventSource(`/admin/eventos?token=${encodeURIComponent(s.token)}`)
+  for (const tipo of TIPOS) {
+    es.addEventListener(tipo, (e) => {
+      let data
+      try {
+        data = JSON.parse(e.data)
+      } catch {
+        return
+      }
+      for (const fn of listeners) fn(tipo, data)
+    })
+  }
+  es.onerror = () => {
+    if (es && es.readyState === EventSource.CLOSED) {
+      for (const fn of listeners) fn('cerrado', null)
+    }
+  }
+}
+
+export function subscribeAdminEventos(fn) {
+  listeners.add(fn)
+  if (!es) abrir()
+  return () => {
+    listeners.delete(fn)
+    if (listeners.size === 0 && es) {
+      es.close()
+      es = null
+    }
+  }
+}
+
+// Badge de solicitudes manuales pendientes: llega por SSE; el sondeo queda
+// como respaldo lento (o rápido si el stream se cerró).
+export function usePendingManualCount(enabled) {
+  const [count, setCount] = useState(0)
+
+  useEffect(() => {
+    if (!enabled) return
+    let alive = true
+    let pollMs = 60000
+    let t = null
+
+    const load = async () => {
+      try {
+        const r = await apiGet('/admin/manual-asistencias/count?status=pendiente')
+        if (alive) setCount(Number(r?.count || 0))
+      } catch {
+        // ignore
+      }
+    }
+    const schedule = () => {
+      clearInterval(t)
+      t = setInterval(load, pollMs)
+    }
+
+    const off = subscribeAdminEventos((tipo, data) => {
+      if (tipo === 'contadores' && alive) setCount(Number(data?.pendientes || 0))
+      if (tipo === 'cerrado') {
+        pollMs = 15000
+        schedule()
+      }
+    })
+
+    load()
+    schedule()
+    return () => {
+      alive = false
+      clearInterval(t)
+      off()
+    }
+  }, [enabled])
+
+  return count
+}
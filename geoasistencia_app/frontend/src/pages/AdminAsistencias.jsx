@@ -3,6 +3,7 @@ import { useLocation } from 'react-router-dom'
 import { formatDateEC, formatTimeEC } from "../utils/dates";
 import AdminShell from '../components/AdminShell'
 import { apiGet, apiPost, getSession } from '../lib/api'
+import { subscribeAdminEventos } from '../lib/eventos'
 
 function Pill({ active, children, onClick }) {
   return (
@@ -175,8 +176,11 @@ export default function AdminAsistencias() {
 
   useEffect(() => {
     refreshPendingCount()
-    const t = setInterval(() => refreshPendingCount(), 15000)
-    return () => clearInterval(t)
+    if (!(role === 'ADMIN' || role === 'SUPERADMIN')) return
+    // Los cambios llegan por SSE (/admin/eventos) en lugar de sondear cada 15 s.
+    return subscribeAdminEventos((tipo, data) => {
+      if (tipo === 'contadores') setPendingManualCount(Number(data?.pendientes || 0))
+    })
   }, [role, sedeId])
 
   async function refreshPendingCount() {
@@ -10,7 +10,7 @@ export default function AdminSedes() {
 
   const [open, setOpen] = useState(false)
   const [editing, setEditing] = useState(null)
-  const [f, setF] = useState({ nombre: '', latitud: '', longitud: '', radio_metros: 120, direccion: '' })
+  const [f, setF] = useState({ nombre: '', latitud: '', longitud: '', radio_metros: 120, direccion: '', zona_horaria: 'America/Guayaquil' })
 
   async function refresh() {
     setErr('')
@@ -26,7 +26,7 @@ export default function AdminSedes() {
 
   function startCreate() {
     setEditing(null)
-    setF({ nombre: '', latitud: '-3.993130', longitud: '-79.204220', radio_metros: 120, direccion: '' })
+    setF({ nombre: '', latitud: '-3.993130', longitud: '-79.204220', radio_metros: 120, direccion: '', zona_horaria: 'America/Guayaquil' })
     setOpen(true)
   }
 
@@ -37,7 +37,8 @@ export default function AdminSedes() {
       latitud: String(s.latitud),
       longitud: String(s.longitud),
       radio_metros: Number(s.radio_metros),
-      direccion: s.direccion || ''
+      direccion: s.direccion || '',
+      zona_horaria: s.zona_horaria || 'America/Guayaquil'
     })
     setOpen(true)
   }
@@ -61,7 +62,8 @@ export default function AdminSedes() {
         latitud: Number(latNum),
         longitud: Number(lngNum),
         radio_metros: Number(f.radio_metros),
-        direccion: f.direccion
+        direccion: f.direccion,
+        zona_horaria: f.zona_horaria
       }
       if (!editing) {
         await apiPost('/admin/sedes', payload)
@@ -152,6 +154,11 @@ export default function AdminSedes() {
                   <input className="input mt-1" value={f.direccion} onChange={e => setF({ ...f, direccion: e.target.value })} placeholder="Ej: Loja - Centro" />
                 </div>
 
+                <div>
+                  <label className="text-xs text-slate-600">Zona horaria (IANA)</label>
+                  <input className="input mt-1" value={f.zona_horaria} onChange={e => setF({ ...f, zona_horaria: e.target.value })} placeholder="America/Guayaquil" required />
+                </div>
+
                 <div className="grid grid-cols-2 gap-3">
                   <div>
                     <label className="text-xs text-slate-600">Latitud</label>
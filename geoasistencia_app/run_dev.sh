@@ -11,6 +11,7 @@ fi
 # 2) Backend
 cd "$(dirname "$0")/backend"
 python -m pip install -r requirements.txt
+python manage.py db migrar
 python seed.py
 
 # 3) Run servers (2 terminals recommended)